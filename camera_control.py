@@ -0,0 +1,167 @@
+"""
+SHT 듀얼 LIVE 카메라 - 카메라 상태 머신 및 명령 큐
+Per-camera state machine, capture leases and a single camera command queue
+"""
+
+import asyncio
+import logging
+import queue
+import threading
+from concurrent.futures import Future
+from contextlib import contextmanager
+from enum import Enum
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class CameraState(str, Enum):
+    """카메라 상태"""
+    STOPPED = "stopped"
+    STARTING = "starting"
+    STREAMING = "streaming"
+    RECORDING = "recording"
+    RECONFIGURING = "reconfiguring"
+
+
+# 캡처 가능한 상태
+ACTIVE_STATES = (CameraState.STREAMING, CameraState.RECORDING)
+
+# 허용되는 상태 전이
+TRANSITIONS = {
+    CameraState.STOPPED: {CameraState.STARTING},
+    CameraState.STARTING: {CameraState.STREAMING, CameraState.STOPPED},
+    CameraState.STREAMING: {CameraState.RECORDING, CameraState.RECONFIGURING, CameraState.STOPPED},
+    CameraState.RECORDING: {CameraState.STREAMING, CameraState.RECONFIGURING, CameraState.STOPPED},
+    CameraState.RECONFIGURING: {CameraState.STREAMING, CameraState.RECORDING, CameraState.STOPPED},
+}
+
+
+class CameraSlot:
+    """카메라 1대의 상태 + 인스턴스 + 캡처 임대(lease) 관리
+
+    스트리밍/녹화 스레드는 lease()로 Picamera2 인스턴스를 빌려 쓰고,
+    중지/재구성은 drain()으로 신규 임대를 막은 뒤 진행 중인 캡처가 끝날 때까지 대기한다.
+    (캡처 중인 인스턴스가 close/삭제되는 경합 방지)
+    """
+
+    def __init__(self, camera_id: int):
+        self.camera_id = camera_id
+        self.state = CameraState.STOPPED
+        self.picam2 = None
+        self._cond = threading.Condition(threading.RLock())
+        self._leases = 0
+
+    @property
+    def lock(self):
+        """카메라별 잠금 (상태 + 인스턴스 보호)"""
+        return self._cond
+
+    def is_active(self) -> bool:
+        """캡처 가능 상태 여부"""
+        return self.state in ACTIVE_STATES
+
+    def transition(self, new_state: CameraState, picam2=None) -> bool:
+        """상태 전이 (허용되지 않는 전이는 무시하고 False 반환)"""
+        with self._cond:
+            if new_state == self.state:
+                return True
+            if new_state not in TRANSITIONS[self.state]:
+                logger.warning(f"[STATE] 카메라 {self.camera_id} 잘못된 상태 전이 무시: "
+                               f"{self.state.value} → {new_state.value}")
+                return False
+            logger.info(f"[STATE] 카메라 {self.camera_id}: {self.state.value} → {new_state.value}")
+            self.state = new_state
+            if picam2 is not None:
+                self.picam2 = picam2
+            if new_state == CameraState.STOPPED:
+                self.picam2 = None
+            self._cond.notify_all()
+            return True
+
+    @contextmanager
+    def lease(self, timeout: float = 5.0):
+        """캡처용 인스턴스 임대 - 사용 불가 상태면 None
+
+        재구성 중이면 완료될 때까지 최대 timeout초 대기
+        """
+        picam2 = None
+        with self._cond:
+            self._cond.wait_for(lambda: self.state != CameraState.RECONFIGURING, timeout)
+            if self.state in ACTIVE_STATES and self.picam2 is not None:
+                picam2 = self.picam2
+                self._leases += 1
+        try:
+            yield picam2
+        finally:
+            if picam2 is not None:
+                with self._cond:
+                    self._leases -= 1
+                    self._cond.notify_all()
+
+    def drain(self, new_state: CameraState, timeout: float = 5.0):
+        """신규 임대 차단 후 진행 중인 캡처 완료 대기 - 현재 인스턴스 반환"""
+        with self._cond:
+            picam2 = self.picam2
+            if not self.transition(new_state):
+                return None
+            # STOPPED 전이 시 slot의 참조는 해제되지만 호출자가 정리할 인스턴스는 반환
+            if not self._cond.wait_for(lambda: self._leases == 0, timeout):
+                logger.warning(f"[STATE] 카메라 {self.camera_id} 캡처 임대 {self._leases}건 대기 시간 초과")
+            return picam2
+
+    def snapshot(self) -> dict:
+        """상태 조회용 스냅샷"""
+        with self._cond:
+            return {"state": self.state.value, "leases": self._leases}
+
+
+class CameraCommandQueue:
+    """카메라 제어 명령 단일 큐 - 모든 카메라 조작을 하나의 워커 스레드에서 순차 실행
+
+    HTTP 핸들러는 run()으로 명령을 넣고 결과를 await하므로 이벤트 루프가 차단되지 않는다.
+    """
+
+    def __init__(self, name: str = "camera-commands"):
+        self._queue: "queue.Queue[Optional[tuple]]" = queue.Queue()
+        self._worker = threading.Thread(target=self._run_worker, name=name, daemon=True)
+        self._worker.start()
+
+    def _run_worker(self):
+        """명령 실행 루프"""
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            future, fn, args, kwargs = item
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(fn(*args, **kwargs))
+            except BaseException as e:
+                logger.error(f"[COMMAND] {getattr(fn, '__name__', fn)} 실행 오류: {e}")
+                future.set_exception(e)
+
+    def submit(self, fn: Callable, *args, **kwargs) -> Future:
+        """명령 추가 (워커 스레드 내부 호출은 즉시 실행 - 교착 방지)"""
+        future: Future = Future()
+        if threading.current_thread() is self._worker:
+            try:
+                future.set_result(fn(*args, **kwargs))
+            except BaseException as e:
+                future.set_exception(e)
+            return future
+        self._queue.put((future, fn, args, kwargs))
+        return future
+
+    async def run(self, fn: Callable, *args, **kwargs) -> Any:
+        """명령 실행 결과를 비동기로 대기"""
+        return await asyncio.wrap_future(self.submit(fn, *args, **kwargs))
+
+    def pending(self) -> int:
+        """대기 중인 명령 수"""
+        return self._queue.qsize()
+
+    def stop(self):
+        """워커 종료"""
+        self._queue.put(None)
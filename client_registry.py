@@ -0,0 +1,238 @@
+"""
+SHT 듀얼 LIVE 카메라 - 스트림 접속 레지스트리
+Per-connection stream registry with quotas (per camera / per IP / global) and accounting
+"""
+
+import itertools
+import logging
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Dict, Any, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# 접속별 캡처 → 전송 지연 표본 수 (최근 프레임 기준 평균 / p95)
+LATENCY_WINDOW = 300
+
+
+class AdmissionRejected(Exception):
+    """스트림 접속 거부 (HTTP 상태 코드 + Retry-After 포함)"""
+
+    def __init__(self, status_code: int, detail: str, retry_after: int):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        self.retry_after = retry_after
+
+
+@dataclass
+class StreamConnection:
+    """스트림 접속 1건 (브라우저 탭/이미지 요소 단위)"""
+    conn_id: str
+    client_ip: str
+    camera_id: int
+    rendition: str
+    connected_at: float = field(default_factory=time.time)
+    bytes_sent: int = 0
+    frames_sent: int = 0
+    frames_dropped: int = 0         # 전송이 밀려 건너뛴 프레임 (항상 최신 프레임으로 건너뜀)
+    started: float = field(default_factory=time.monotonic)
+    closed: bool = False
+    evicted: bool = False           # QoS 부하 감소로 종료 요청됨
+    # 캡처(센서 타임스탬프) → 전송 완료 지연 (초)
+    latencies: deque = field(default_factory=lambda: deque(maxlen=LATENCY_WINDOW), repr=False)
+    latency_over_target: int = 0
+
+    def record_latency(self, latency: float, target: float):
+        """프레임 1장의 캡처 → 전송 지연 기록 (target 초과 횟수 누적)"""
+        self.latencies.append(latency)
+        if latency > target:
+            self.latency_over_target += 1
+
+    def latency_ms(self) -> Dict[str, Any]:
+        """최근 지연 요약 (ms) - 표본이 없으면 None"""
+        samples = sorted(self.latencies)
+        if not samples:
+            return {"last": None, "avg": None, "p95": None, "max": None}
+        return {
+            "last": round(self.latencies[-1] * 1000, 1),
+            "avg": round(sum(samples) / len(samples) * 1000, 1),
+            "p95": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))] * 1000, 1),
+            "max": round(samples[-1] * 1000, 1)
+        }
+
+    def send_rate_bps(self) -> float:
+        """접속 이후 평균 전송률 (bps)"""
+        elapsed = time.monotonic() - self.started
+        return self.bytes_sent * 8 / elapsed if elapsed > 0 else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        """조회용 딕셔너리"""
+        elapsed = time.monotonic() - self.started
+        return {
+            "conn_id": self.conn_id,
+            "client_ip": self.client_ip,
+            "camera_id": self.camera_id,
+            "rendition": self.rendition,
+            "connected_at": self.connected_at,
+            "duration": round(elapsed, 1),
+            "bytes_sent": self.bytes_sent,
+            "frames_sent": self.frames_sent,
+            "frames_dropped": self.frames_dropped,
+            "fps": round(self.frames_sent / elapsed, 1) if elapsed > 0 else 0.0,
+            "bitrate_bps": round(self.send_rate_bps()),
+            "latency_ms": self.latency_ms(),
+            "latency_over_target": self.latency_over_target
+        }
+
+
+class ClientRegistry:
+    """스트림 접속 레지스트리 - IP가 아닌 접속 단위로 추적
+
+    할당량:
+    - 카메라별 최대 시청 수 (streaming.max_clients)          → 423
+    - 전체 최대 접속 수 (streaming.max_connections)           → 423
+    - 전체 전송 대역폭 (streaming.max_bandwidth_mbps, 0=무제한) → 423
+    - IP별 최대 접속 수 (streaming.max_connections_per_ip)    → 429
+    - QoS 부하 감소 중 최대 접속 수 (shed())                    → 503
+    """
+
+    def __init__(self, max_connections: int = 4, max_per_ip: int = 4,
+                 max_bandwidth_mbps: float = 0, retry_after: int = 2, latency_target_ms: float = 150):
+        self.max_connections = max_connections
+        self.max_per_ip = max_per_ip
+        self.max_bandwidth_mbps = max_bandwidth_mbps
+        self.retry_after = retry_after
+        # 캡처 → 전송 지연 목표 (streaming.latency_target_ms, 접속별 p95와 비교)
+        self.latency_target_ms = latency_target_ms
+        self.shed_limit: Optional[int] = None
+
+        self._lock = threading.Lock()
+        self._connections: Dict[str, StreamConnection] = {}
+        self._ids = itertools.count(1)
+
+        # 누적 통계 (용량 계획용)
+        self.total_connections = 0
+        self.total_bytes_sent = 0
+        self.total_frames_sent = 0
+        self.total_frames_dropped = 0
+        self.rejected: Dict[str, int] = {"camera": 0, "global": 0, "bandwidth": 0, "ip": 0, "qos": 0}
+        self.total_evicted = 0
+
+    def _reject(self, reason: str, status_code: int, detail: str):
+        self.rejected[reason] += 1
+        logger.warning(f"[CLIENTS] 접속 거부 ({reason}): {detail}")
+        raise AdmissionRejected(status_code, detail, self.retry_after)
+
+    def admit(self, client_ip: str, camera_id: int, rendition: str, max_per_camera: int) -> StreamConnection:
+        """접속 허용 여부 판단 후 등록 - 거부 시 AdmissionRejected"""
+        with self._lock:
+            connections = list(self._connections.values())
+
+            per_ip = sum(1 for c in connections if c.client_ip == client_ip)
+            if per_ip >= self.max_per_ip:
+                self._reject("ip", 429, f"Maximum {self.max_per_ip} stream(s) per client address")
+
+            per_camera = sum(1 for c in connections if c.camera_id == camera_id)
+            if per_camera >= max_per_camera:
+                self._reject("camera", 423,
+                             f"Maximum {max_per_camera} client(s) allowed. Server at capacity.")
+
+            if self.shed_limit is not None and len(connections) >= self.shed_limit:
+                self._reject("qos", 503, "Live view limited to protect recording. Try again later.")
+
+            if len(connections) >= self.max_connections:
+                self._reject("global", 423,
+                             f"Maximum {self.max_connections} stream(s) allowed. Server at capacity.")
+
+            if self.max_bandwidth_mbps > 0:
+                bandwidth_mbps = sum(c.send_rate_bps() for c in connections) / 1_000_000
+                if bandwidth_mbps >= self.max_bandwidth_mbps:
+                    self._reject("bandwidth", 423,
+                                 f"Streaming bandwidth limit reached ({bandwidth_mbps:.1f}/{self.max_bandwidth_mbps} Mbps)")
+
+            connection = StreamConnection(
+                conn_id=f"c{next(self._ids)}",
+                client_ip=client_ip,
+                camera_id=camera_id,
+                rendition=rendition
+            )
+            self._connections[connection.conn_id] = connection
+            self.total_connections += 1
+
+        logger.info(f"[CLIENTS] 접속 등록 {connection.conn_id}: {client_ip} → 카메라 {camera_id} ({rendition})")
+        return connection
+
+    def release(self, connection: StreamConnection):
+        """접속 해제 (중복 호출 안전)"""
+        with self._lock:
+            if connection.closed:
+                return
+            connection.closed = True
+            self._connections.pop(connection.conn_id, None)
+            self.total_bytes_sent += connection.bytes_sent
+            self.total_frames_sent += connection.frames_sent
+            self.total_frames_dropped += connection.frames_dropped
+
+        logger.info(f"[CLIENTS] 접속 해제 {connection.conn_id}: {connection.client_ip} "
+                    f"({connection.frames_sent} frames, {connection.bytes_sent / 1024 / 1024:.1f}MB)")
+
+    def shed(self, limit: Optional[int]) -> List[StreamConnection]:
+        """QoS 접속 수 제한 적용 - 초과분은 최근 접속부터 종료 요청 (None = 제한 해제)"""
+        with self._lock:
+            self.shed_limit = limit
+            if limit is None:
+                return []
+            active = sorted((c for c in self._connections.values() if not c.evicted),
+                            key=lambda c: c.started)
+            evicted = active[limit:]
+            for connection in evicted:
+                connection.evicted = True
+            self.total_evicted += len(evicted)
+        for connection in evicted:
+            logger.warning(f"[CLIENTS] QoS 부하 감소로 접속 종료 {connection.conn_id}: {connection.client_ip}")
+        return evicted
+
+    def count(self, camera_id: Optional[int] = None) -> int:
+        """활성 접속 수 (camera_id 지정 시 해당 카메라만)"""
+        with self._lock:
+            if camera_id is None:
+                return len(self._connections)
+            return sum(1 for c in self._connections.values() if c.camera_id == camera_id)
+
+    def connections(self) -> List[StreamConnection]:
+        """활성 접속 목록 스냅샷"""
+        with self._lock:
+            return list(self._connections.values())
+
+    def snapshot(self) -> Dict[str, Any]:
+        """접속 목록 + 누적 통계 + 할당량"""
+        active = self.connections()
+        live_bytes = sum(c.bytes_sent for c in active)
+        live_frames = sum(c.frames_sent for c in active)
+        live_dropped = sum(c.frames_dropped for c in active)
+        p95s = [c.latency_ms()["p95"] for c in active if c.latencies]
+        return {
+            "connections": [c.to_dict() for c in active],
+            "totals": {
+                "active": len(active),
+                "connections": self.total_connections,
+                "bytes_sent": self.total_bytes_sent + live_bytes,
+                "frames_sent": self.total_frames_sent + live_frames,
+                "frames_dropped": self.total_frames_dropped + live_dropped,
+                "bandwidth_bps": round(sum(c.send_rate_bps() for c in active)),
+                "rejected": dict(self.rejected),
+                "evicted": self.total_evicted,
+                "latency_p95_ms": max(p95s) if p95s else None,
+                "latency_within_target": all(p95 <= self.latency_target_ms for p95 in p95s)
+            },
+            "limits": {
+                "max_connections": self.max_connections,
+                "max_connections_per_ip": self.max_per_ip,
+                "max_bandwidth_mbps": self.max_bandwidth_mbps,
+                "latency_target_ms": self.latency_target_ms,
+                "qos_max_connections": self.shed_limit
+            }
+        }
@@ -0,0 +1,288 @@
+"""
+SHT 듀얼 LIVE 카메라 - 클립 내보내기
+Export arbitrary time ranges as a single MP4 by stream-copy concatenation of catalogued segments
+"""
+
+import logging
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, Any, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# ffmpeg stdout 읽기 단위
+CHUNK_SIZE = 64 * 1024
+
+
+class ExportError(Exception):
+    """내보내기 요청 오류 (HTTP 상태 코드 포함)"""
+
+    def __init__(self, status_code: int, detail: str, retry_after: Optional[int] = None):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        self.retry_after = retry_after
+
+
+@dataclass
+class ExportJob:
+    """백그라운드 내보내기 작업"""
+    job_id: str
+    camera_id: int
+    start: float
+    end: float
+    output: Path
+    status: str = "queued"          # queued / running / done / failed
+    progress: float = 0.0           # 0.0 ~ 1.0
+    error: Optional[str] = None
+    created: float = field(default_factory=time.time)
+    finished: Optional[float] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.job_id,
+            "camera_id": self.camera_id,
+            "start": self.start,
+            "end": self.end,
+            "status": self.status,
+            "progress": round(self.progress, 3),
+            "error": self.error,
+            "created": self.created,
+            "finished": self.finished,
+            "size": self.output.stat().st_size if self.status == "done" and self.output.exists() else None
+        }
+
+
+class ExportStream:
+    """진행 중인 스트리밍 내보내기 - 반복하면 MP4 청크, close()로 정리 (중복 호출 안전)
+
+    응답 전송이 시작되기 전에 연결이 끊겨도 close()만 호출되면 ffmpeg와 동시 실행 슬롯이 정리된다.
+    """
+
+    def __init__(self, process, list_path: Path, release):
+        self.process = process
+        self.list_path = list_path
+        self._release = release
+        self._closed = False
+        self._lock = threading.Lock()
+
+    def __iter__(self):
+        try:
+            while True:
+                chunk = self.process.stdout.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                yield chunk
+            self.process.wait()
+            if self.process.returncode != 0:
+                logger.error(f"[EXPORT] ffmpeg 종료 코드 {self.process.returncode}")
+        finally:
+            self.close()
+
+    def close(self):
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        # 클라이언트 연결 종료 시에도 ffmpeg 정리
+        if self.process.poll() is None:
+            self.process.kill()
+            self.process.wait()
+        self.process.stdout.close()
+        self.list_path.unlink(missing_ok=True)
+        self._release()
+
+
+class ClipExporter:
+    """카탈로그 기반 클립 내보내기
+
+    - 카탈로그에서 구간과 겹치는 세그먼트 선택 → ffmpeg concat 목록 (inpoint/outpoint)
+    - 스트림 복사(-c copy)로 재다중화만 수행 - 재인코딩 없음, 시작점은 직전 키프레임
+    - 짧은 구간: 조각 MP4(fragmented)로 생성과 동시에 클라이언트에 전송
+    - 긴 구간: 백그라운드 작업으로 파일 생성 + 진행률 조회
+    - 동시 실행 수 제한 + 낮은 CPU/IO 우선순위 (녹화 I/O 보호)
+    """
+
+    def __init__(self, catalog, config: Dict[str, Any], resolve_path: Optional[Callable[[str], Path]] = None):
+        self.catalog = catalog
+        # 카탈로그 경로 → 실제 파일 위치 (영구 저장소 이동 전인 세그먼트는 스테이징 경로)
+        self.resolve_path = resolve_path or Path
+        self.max_concurrent = max(1, int(config.get('max_concurrent', 1)))
+        self.stream_max_seconds = float(config.get('stream_max_seconds', 600))
+        self.max_seconds = float(config.get('max_seconds', 6 * 3600))
+        self.output_dir = Path(config.get('output_dir', 'exports'))
+        self.job_retention_hours = float(config.get('job_retention_hours', 24))
+        self.retry_after = int(config.get('retry_after', 5))
+
+        self._slots = threading.BoundedSemaphore(self.max_concurrent)
+        self._lock = threading.Lock()
+        self.jobs: Dict[str, ExportJob] = {}
+
+    # ------------------------------------------------------------------
+    # 계획 / 명령
+    # ------------------------------------------------------------------
+
+    def plan(self, camera_id: int, start: float, end: float) -> List[Dict[str, Any]]:
+        """구간에 필요한 세그먼트 + 세그먼트 내 시작/종료 지점"""
+        if end <= start:
+            raise ExportError(400, "end must be after start")
+        if end - start > self.max_seconds:
+            raise ExportError(400, f"Range exceeds {self.max_seconds:.0f} seconds")
+
+        parts = []
+        for segment in self.catalog.segments(camera_id, start, end):
+            if segment["end"] <= start or segment["start"] >= end:
+                continue
+            path = self.resolve_path(segment["path"])
+            if not path.exists():
+                continue
+            part = {"path": str(path.resolve()), "duration": segment["end"] - segment["start"]}
+            if start > segment["start"]:
+                part["inpoint"] = start - segment["start"]
+            if end < segment["end"]:
+                part["outpoint"] = end - segment["start"]
+            parts.append(part)
+        if not parts:
+            raise ExportError(404, f"No recordings for camera {camera_id} in the requested range")
+        return parts
+
+    @staticmethod
+    def _write_concat_list(parts: List[Dict[str, Any]]) -> Path:
+        """ffmpeg concat demuxer 목록 파일 생성"""
+        fd, name = tempfile.mkstemp(prefix="export_", suffix=".txt")
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write("ffconcat version 1.0\n")
+            for part in parts:
+                escaped = part["path"].replace("'", "'\\''")
+                f.write(f"file '{escaped}'\n")
+                if "inpoint" in part:
+                    f.write(f"inpoint {part['inpoint']:.3f}\n")
+                if "outpoint" in part:
+                    f.write(f"outpoint {part['outpoint']:.3f}\n")
+        return Path(name)
+
+    @staticmethod
+    def _command(list_path: Path, output: str, fragmented: bool) -> List[str]:
+        """ffmpeg 명령 (낮은 우선순위, 스트림 복사)"""
+        command = []
+        if shutil.which("ionice"):
+            command += ["ionice", "-c", "3"]          # 유휴 I/O 클래스 - 녹화 쓰기 우선
+        if shutil.which("nice"):
+            command += ["nice", "-n", "10"]
+        command += [
+            "ffmpeg", "-hide_banner", "-loglevel", "error", "-nostdin",
+            "-f", "concat", "-safe", "0", "-i", str(list_path),
+            "-c", "copy", "-map", "0",
+            "-progress", "pipe:2"
+        ]
+        if fragmented:
+            # 파일 끝을 기다리지 않고 전송 가능한 조각 MP4
+            command += ["-movflags", "frag_keyframe+empty_moov+default_base_moof", "-f", "mp4", output]
+        else:
+            command += ["-movflags", "+faststart", "-y", output]
+        return command
+
+    def _acquire(self, blocking: bool) -> bool:
+        return self._slots.acquire(blocking=blocking)
+
+    # ------------------------------------------------------------------
+    # 스트리밍 내보내기
+    # ------------------------------------------------------------------
+
+    def open_stream(self, camera_id: int, start: float, end: float) -> ExportStream:
+        """생성과 동시에 전송하는 내보내기 - 반복 가능한 ExportStream 반환
+
+        스트리밍 한도를 넘는 구간은 ExportError(413) → 백그라운드 작업 사용
+        """
+        parts = self.plan(camera_id, start, end)
+        if end - start > self.stream_max_seconds:
+            raise ExportError(413, f"Ranges over {self.stream_max_seconds:.0f} seconds must use a background job")
+        if not self._acquire(blocking=False):
+            raise ExportError(429, "Too many concurrent exports", self.retry_after)
+
+        try:
+            list_path = self._write_concat_list(parts)
+            process = subprocess.Popen(self._command(list_path, "pipe:1", fragmented=True),
+                                       stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        except Exception as e:
+            self._slots.release()
+            raise ExportError(500, f"Failed to start export: {e}")
+
+        logger.info(f"[EXPORT] 카메라 {camera_id} 스트리밍 내보내기 시작 ({len(parts)}개 세그먼트, {end - start:.0f}초)")
+        return ExportStream(process, list_path, self._slots.release)
+
+    # ------------------------------------------------------------------
+    # 백그라운드 작업
+    # ------------------------------------------------------------------
+
+    def submit_job(self, camera_id: int, start: float, end: float) -> ExportJob:
+        """백그라운드 내보내기 작업 등록 (동시 실행 한도 초과 시 대기열에서 대기)"""
+        parts = self.plan(camera_id, start, end)
+        self._cleanup_jobs()
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+
+        job_id = uuid.uuid4().hex[:12]
+        job = ExportJob(job_id, camera_id, start, end, self.output_dir / f"cam{camera_id}_{job_id}.mp4")
+        with self._lock:
+            self.jobs[job_id] = job
+        threading.Thread(target=self._run_job, args=(job, parts), name=f"export-{job_id}", daemon=True).start()
+        logger.info(f"[EXPORT] 작업 {job_id} 등록: 카메라 {camera_id}, {end - start:.0f}초")
+        return job
+
+    def _run_job(self, job: ExportJob, parts: List[Dict[str, Any]]):
+        self._acquire(blocking=True)
+        list_path = None
+        try:
+            job.status = "running"
+            total = sum(part.get("outpoint", part["duration"]) - part.get("inpoint", 0.0) for part in parts)
+            list_path = self._write_concat_list(parts)
+            process = subprocess.Popen(self._command(list_path, str(job.output), fragmented=False),
+                                       stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+                                       text=True, bufsize=1)
+            # -progress 출력 (key=value) 에서 out_time_us로 진행률 계산
+            for line in process.stderr:
+                key, _, value = line.strip().partition("=")
+                if key == "out_time_us" and value.isdigit() and total > 0:
+                    job.progress = min(0.99, int(value) / 1_000_000 / total)
+            process.wait()
+            if process.returncode != 0:
+                raise RuntimeError(f"ffmpeg exited with code {process.returncode}")
+            job.progress = 1.0
+            job.status = "done"
+            logger.info(f"[EXPORT] 작업 {job.job_id} 완료: {job.output}")
+        except Exception as e:
+            job.status = "failed"
+            job.error = str(e)
+            job.output.unlink(missing_ok=True)
+            logger.error(f"[EXPORT] 작업 {job.job_id} 실패: {e}")
+        finally:
+            job.finished = time.time()
+            if list_path is not None:
+                list_path.unlink(missing_ok=True)
+            self._slots.release()
+
+    def get_job(self, job_id: str) -> Optional[ExportJob]:
+        with self._lock:
+            return self.jobs.get(job_id)
+
+    def list_jobs(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            jobs = list(self.jobs.values())
+        return [job.to_dict() for job in sorted(jobs, key=lambda j: j.created, reverse=True)]
+
+    def _cleanup_jobs(self):
+        """보관 기간이 지난 작업과 결과 파일 삭제"""
+        cutoff = time.time() - self.job_retention_hours * 3600
+        with self._lock:
+            expired = [job for job in self.jobs.values() if job.finished is not None and job.finished < cutoff]
+            for job in expired:
+                del self.jobs[job.job_id]
+        for job in expired:
+            job.output.unlink(missing_ok=True)
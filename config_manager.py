@@ -3,23 +3,512 @@ SHT 듀얼 LIVE 카메라 - 설정 관리자
 Configuration Manager for CCTV System
 """
 
+import copy
 import json
 import os
 import logging
-from typing import Dict, Any, Tuple
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Callable, Dict, Any, List, Mapping, Optional, Set, Tuple
 from pathlib import Path
 
 logger = logging.getLogger(__name__)
 
+_MISSING = object()
+
+
+def _freeze(value: Any) -> Any:
+    """dict → 읽기 전용 매핑, list → 튜플 (스냅샷 공유 시 변경 방지)"""
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+def _thaw(value: Any) -> Any:
+    """_freeze 역변환 (JSON 저장용)"""
+    if isinstance(value, Mapping):
+        return {key: _thaw(item) for key, item in value.items()}
+    if isinstance(value, tuple):
+        return [_thaw(item) for item in value]
+    return value
+
+
+def _index(value: Any, prefix: str, out: Dict[str, Any]):
+    """점 표기 경로 → 값 (모든 단계) 색인"""
+    if isinstance(value, Mapping):
+        for key, item in value.items():
+            path = f"{prefix}.{key}" if prefix else str(key)
+            out[path] = item
+            _index(item, path, out)
+
+
+# 카메라별로 재정의 가능한 녹화 프로필 항목 (recording.cameras.{id}.<키>, 없으면 recording.<키> 상속)
+PROFILE_KEYS = ("bitrate", "framerate", "gop", "resolution", "segment_duration")
+
+
+@dataclass(frozen=True)
+class CameraProfile:
+    """카메라 1대의 녹화 프로필 (전역 녹화 설정 + 카메라별 재정의)"""
+    camera_id: str
+    bitrate: int
+    framerate: int
+    gop: int                        # I-프레임 주기 (framerate 기준 프레임 수)
+    resolution: Tuple[int, int]     # 센서 출력(녹화) 크기
+    segment_duration: int
+    storage_path: str               # 영구 저장 위치 (카메라별 디스크/마운트 지정)
+    overrides: Tuple[str, ...]      # 카메라별로 재정의된 항목
+
+    @classmethod
+    def build(cls, index: Mapping[str, Any], camera_id: str) -> "CameraProfile":
+        prefix = f"recording.cameras.{camera_id}."
+
+        def pick(key, default):
+            value = index.get(prefix + key, _MISSING)
+            return index.get(f"recording.{key}", default) if value is _MISSING else value
+
+        framerate = int(pick("framerate", 30))
+        return cls(
+            camera_id=camera_id,
+            bitrate=int(pick("bitrate", 5000000)),
+            framerate=framerate,
+            gop=int(pick("gop", 0)) or framerate,  # 0 = 1초 (프레임레이트와 동일)
+            resolution=tuple(pick("resolution", (640, 480))),
+            segment_duration=int(pick("segment_duration", 31)),
+            storage_path=index.get(prefix + "storage_path", f"videos/cam{camera_id}"),
+            overrides=tuple(key for key in PROFILE_KEYS if prefix + key in index)
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "bitrate": self.bitrate,
+            "framerate": self.framerate,
+            "gop": self.gop,
+            "resolution": list(self.resolution),
+            "segment_duration": self.segment_duration,
+            "storage_path": self.storage_path,
+            "overrides": list(self.overrides)
+        }
+
+
+@dataclass(frozen=True)
+class ConfigSnapshot:
+    """불변 설정 스냅샷 - 로드/변경 시마다 새로 만들어 통째로 교체
+
+    index: 점 표기 경로 전체를 미리 펼친 색인 (조회 = dict 조회 1번)
+    자주 쓰는 값은 타입이 정해진 필드로 미리 계산 (세그먼트/스트림 경로용)
+    """
+    data: Mapping[str, Any]
+    index: Mapping[str, Any]
+    version: int
+    loaded_at: float
+    segment_duration: int
+    bitrate: int
+    framerate: int
+    resolution: Tuple[int, int]
+    max_clients: int
+    web_port: int
+    profiles: Mapping[str, CameraProfile]
+
+    @classmethod
+    def build(cls, config: Dict[str, Any], version: int) -> "ConfigSnapshot":
+        data = _freeze(config)
+        index: Dict[str, Any] = {}
+        _index(data, "", index)
+        return cls(
+            data=data,
+            index=MappingProxyType(index),
+            version=version,
+            loaded_at=time.time(),
+            segment_duration=int(index.get('recording.segment_duration', 31)),
+            bitrate=int(index.get('recording.bitrate', 5000000)),
+            framerate=int(index.get('recording.framerate', 30)),
+            resolution=tuple(index.get('recording.resolution', (640, 480))),
+            max_clients=int(index.get('streaming.max_clients', 2)),
+            web_port=int(index.get('system.web_port', 8001)),
+            profiles=MappingProxyType({
+                str(camera_id): CameraProfile.build(index, str(camera_id))
+                for camera_id in index.get('recording.cameras', {})
+            })
+        )
+
+    def value(self, path: str, default=None) -> Any:
+        return self.index.get(path, default)
+
+    def profile(self, camera_id) -> CameraProfile:
+        """카메라 녹화 프로필 (설정에 없는 카메라는 전역 설정 그대로)"""
+        profile = self.profiles.get(str(camera_id))
+        return profile if profile is not None else CameraProfile.build(self.index, str(camera_id))
+
+    def leaves(self) -> Dict[str, Any]:
+        """말단 값만 (변경 키 비교용)"""
+        return {path: value for path, value in self.index.items() if not isinstance(value, Mapping)}
+
+    def to_dict(self) -> Dict[str, Any]:
+        return _thaw(self.data)
+
+
+# 값 범위 / 허용값 (점 표기 경로 → 규칙) - 타입은 기본 설정값 기준으로 검사
+CONFIG_RULES: Dict[str, Dict[str, Any]] = {
+    "recording.segment_duration": {"min": 5, "max": 3600},
+    "recording.overlap_duration": {"min": 0, "max": 10},
+    "recording.bitrate": {"min": 100000, "max": 50000000},
+    "recording.framerate": {"min": 1, "max": 120},
+    "recording.resolution": {"length": 2, "min": 16, "max": 4096},
+    "recording.gop": {"min": 0, "max": 600},
+    "recording.staging.budget_mb": {"min": 8},
+    "recording.staging.min_free_mb": {"min": 0},
+    "recording.staging.chunk_kb": {"min": 64, "max": 65536},
+    "recording.staging.max_backlog": {"min": 1},
+    "recording.thumbnails.interval": {"min": 0.5},
+    "recording.thumbnails.quality": {"min": 1, "max": 100},
+    "recording.policy.mode": {"choices": ["adaptive", "continuous"]},
+    "recording.policy.idle_bitrate": {"min": 100000, "max": 50000000},
+    "recording.policy.idle_framerate": {"min": 1, "max": 120},
+    "recording.policy.pre_roll_seconds": {"min": 0},
+    "recording.policy.post_roll_seconds": {"min": 0},
+    "streaming.max_clients": {"min": 1, "max": 64},
+    "streaming.max_connections": {"min": 1, "max": 256},
+    "streaming.max_connections_per_ip": {"min": 1, "max": 256},
+    "streaming.max_bandwidth_mbps": {"min": 0},
+    "streaming.retry_after": {"min": 0, "max": 3600},
+    "streaming.latency_target_ms": {"min": 1, "max": 10000},
+    "streaming.default_quality": {"choices": ["640x480", "1280x720"]},
+    "motion.fps": {"min": 0.5, "max": 30},
+    "motion.analysis_width": {"min": 16, "max": 1920},
+    "motion.pixel_threshold": {"min": 0, "max": 255},
+    "motion.background_alpha": {"min": 0, "max": 1},
+    "motion.min_active_frames": {"min": 1},
+    "motion.hold_seconds": {"min": 0},
+    "system.web_port": {"min": 1, "max": 65535},
+    "system.log_level": {"choices": ["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"]},
+    "system.camera_backend": {"choices": ["picamera2", "synthetic"]},
+    "system.config_watch_interval": {"min": 0},
+    "hub.port": {"min": 1, "max": 65535},
+    "thermal.interval": {"min": 0.5},
+    "thermal.hysteresis": {"min": 0},
+    "qos.interval": {"min": 0.5},
+    "qos.step_interval": {"min": 0},
+    "qos.restore_seconds": {"min": 0},
+    "heartbeat.interval": {"min": 1},
+    "forecast.rate_window_hours": {"min": 1, "max": 720},
+    "forecast.warn_days": {"min": 0},
+    "recording.cleanup.max_age_days": {"min": 1},
+    "recording.cleanup.min_free_space_gb": {"min": 0},
+    "export.max_concurrent": {"min": 1, "max": 8},
+    "export.stream_max_seconds": {"min": 1},
+    "export.max_seconds": {"min": 1},
+    "export.job_retention_hours": {"min": 0}
+}
+
+# 모션 감지 영역 최대 수 (세그먼트 카탈로그가 초당 영역 활성 여부를 uint8 비트셋으로 저장)
+MAX_MOTION_ZONES = 8
+
+# 키를 자유롭게 추가하는 설정 (카메라 ID별) - 항목 내용은 validate_config 끝에서 따로 검사
+OPEN_SECTIONS = ("recording.cameras", "privacy.cameras")
+# recording.cameras.{id}에 쓸 수 있는 키
+CAMERA_KEYS = ("enabled", "storage_path") + PROFILE_KEYS
+
+# 변경해도 재시작해야 적용되는 설정 (카메라 구성 / 바인딩 포트 / 저장 경로 / 허브 연결)
+RESTART_REQUIRED_KEYS = {
+    "system.web_port", "system.camera_backend", "recording.resolution",
+    "recording.catalog_path", "streaming.enabled", "motion.enabled",
+    "recording.staging.enabled", "recording.staging.path"
+}
+RESTART_REQUIRED_PREFIXES = ("hub.", "heartbeat.")
+# 카메라별 설정 중 재시작이 필요한 항목 (recording.cameras.{id}.<키>)
+RESTART_REQUIRED_CAMERA_KEYS = {"enabled", "storage_path", "resolution"}
+
+
+def requires_restart(path: str) -> bool:
+    if path.startswith("recording.cameras."):
+        return path.rsplit(".", 1)[-1] in RESTART_REQUIRED_CAMERA_KEYS
+    return path in RESTART_REQUIRED_KEYS or path.startswith(RESTART_REQUIRED_PREFIXES)
+
+
+def _check_rule(value: Any, rule: Dict[str, Any]) -> Optional[str]:
+    if "choices" in rule and value not in rule["choices"]:
+        return f"must be one of {rule['choices']}"
+    if "length" in rule:
+        if len(value) != rule["length"]:
+            return f"must have {rule['length']} items"
+        for item in value:
+            if isinstance(item, bool) or not isinstance(item, (int, float)):
+                return "items must be numbers"
+            error = _check_rule(item, {k: v for k, v in rule.items() if k in ("min", "max")})
+            if error:
+                return f"items {error}"
+        return None
+    if "min" in rule and value < rule["min"]:
+        return f"must be >= {rule['min']}"
+    if "max" in rule and value > rule["max"]:
+        return f"must be <= {rule['max']}"
+    return None
+
+
+def check_setting(path: str, value: Any) -> Optional[str]:
+    """단일 값 범위 검사 (CONFIG_RULES) - 설정 파일 밖에서 들어오는 실시간 변경값용 (정상이면 None)"""
+    rule = CONFIG_RULES.get(path)
+    if rule is None:
+        return None
+    if "choices" not in rule and (isinstance(value, bool) or not isinstance(value, (int, float))):
+        return "number expected"
+    return _check_rule(value, rule)
+
+
+def _check_polygons(polygons: Any) -> Optional[str]:
+    """프라이버시 마스크 다각형 목록 검사 (정상이면 None)"""
+    if not isinstance(polygons, list):
+        return "array of polygons expected"
+    for polygon in polygons:
+        if not isinstance(polygon, list) or len(polygon) < 3:
+            return "each polygon must be an array of at least 3 [x, y] points"
+        for point in polygon:
+            if (not isinstance(point, list) or len(point) != 2
+                    or any(isinstance(v, bool) or not isinstance(v, (int, float)) for v in point)):
+                return "points must be [x, y] numbers"
+            if any(v < 0 or v > 1 for v in point):
+                return "points must be within 0..1 (fraction of frame width/height)"
+    return None
+
+
+def _is_number(value: Any) -> bool:
+    return not isinstance(value, bool) and isinstance(value, (int, float))
+
+
+def _check_zones(zones: Any) -> Optional[str]:
+    """모션 감지 영역 목록 검사 - [{"name", "rect": [x, y, w, h] (0~1), "threshold" (0~1)}], 최대 MAX_MOTION_ZONES개"""
+    if len(zones) > MAX_MOTION_ZONES:
+        return f"at most {MAX_MOTION_ZONES} zones supported"
+    names = set()
+    for index, zone in enumerate(zones):
+        if not isinstance(zone, dict):
+            return f"zone {index}: object expected"
+        unknown = set(zone) - {"name", "rect", "threshold"}
+        if unknown:
+            return f"zone {index}: unknown key {sorted(unknown)[0]}"
+        name = zone.get("name")
+        if not isinstance(name, str) or not name:
+            return f"zone {index}: name (non-empty string) required"
+        if name in names:
+            return f"zone {index}: duplicate name {name}"
+        names.add(name)
+        rect = zone.get("rect", [0.0, 0.0, 1.0, 1.0])
+        if not isinstance(rect, list) or len(rect) != 4 or not all(_is_number(v) for v in rect):
+            return f"zone {name}: rect must be [x, y, w, h] numbers"
+        x, y, w, h = rect
+        if min(x, y) < 0 or w <= 0 or h <= 0 or x + w > 1 or y + h > 1:
+            return f"zone {name}: rect must lie within 0..1 with positive size"
+        threshold = zone.get("threshold", 0.01)
+        if not _is_number(threshold) or not 0 < threshold <= 1:
+            return f"zone {name}: threshold must be within (0, 1]"
+    return None
+
+
+def _check_tiers(tiers: Any) -> Optional[str]:
+    """QoS 단계 목록 검사 - [{"stream_fps", "rendition", "max_connections"}] (null = 제한 없음)"""
+    renditions = CONFIG_RULES["streaming.default_quality"]["choices"]
+    for index, tier in enumerate(tiers):
+        if not isinstance(tier, dict):
+            return f"tier {index + 1}: object expected"
+        unknown = set(tier) - {"stream_fps", "rendition", "max_connections"}
+        if unknown:
+            return f"tier {index + 1}: unknown key {sorted(unknown)[0]}"
+        fps = tier.get("stream_fps")
+        if fps is not None and (not _is_number(fps) or not 0 < fps <= 120):
+            return f"tier {index + 1}: stream_fps must be null or within (0, 120]"
+        rendition = tier.get("rendition")
+        if rendition is not None and rendition not in renditions:
+            return f"tier {index + 1}: rendition must be null or one of {renditions}"
+        connections = tier.get("max_connections")
+        if connections is not None and (isinstance(connections, bool) or not isinstance(connections, int)
+                                        or connections < 0):
+            return f"tier {index + 1}: max_connections must be null or an integer >= 0"
+    return None
+
+
+def _check_threshold_pair(pair: Any) -> Optional[str]:
+    """QoS 임계값 검사 - [warn, critical] (0 이상, warn <= critical)"""
+    if len(pair) != 2 or not all(_is_number(v) for v in pair):
+        return "must be [warn, critical] numbers"
+    if pair[0] < 0 or pair[0] > pair[1]:
+        return "must satisfy 0 <= warn <= critical"
+    return None
+
+
+# 목록 값의 항목 검사 (점 표기 경로 → 검사 함수, 오류 메시지 또는 None 반환)
+CONFIG_VALIDATORS: Dict[str, Callable[[Any], Optional[str]]] = {
+    "motion.zones": _check_zones,
+    "qos.tiers": _check_tiers,
+    "qos.thresholds.encode_load": _check_threshold_pair,
+    "qos.thresholds.capture_ms": _check_threshold_pair,
+    "qos.thresholds.disk_write_ms": _check_threshold_pair,
+    "qos.thresholds.cpu_load": _check_threshold_pair,
+}
+
+
+def validate_config(config: Dict[str, Any], defaults: Dict[str, Any], prefix: str = "") -> Dict[str, str]:
+    """설정 검증 - 키별 오류 메시지 {경로: 메시지} (비어 있으면 통과)
+
+    - 키: 기본 설정에 없는 키는 거부 (카메라 ID별 설정 OPEN_SECTIONS 제외)
+    - 타입: 기본 설정값과 같은 타입인지
+    - 범위/허용값: CONFIG_RULES, 목록 항목: CONFIG_VALIDATORS
+    - 항목 간 관계: 온도 경고 < 위험
+    """
+    errors: Dict[str, str] = {}
+    section = prefix[:-1]
+    if not any(section == open_section or section.startswith(open_section + ".")
+               for open_section in OPEN_SECTIONS):
+        for key in config:
+            if key not in defaults:
+                errors[f"{prefix}{key}"] = "unknown setting"
+    for key, default in defaults.items():
+        if key not in config:
+            continue
+        value = config[key]
+        path = f"{prefix}{key}"
+        if isinstance(default, dict):
+            if not isinstance(value, dict):
+                errors[path] = "object expected"
+            else:
+                errors.update(validate_config(value, default, f"{path}."))
+            continue
+        if isinstance(default, bool):
+            if not isinstance(value, bool):
+                errors[path] = "boolean expected"
+                continue
+        elif isinstance(default, (int, float)):
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                errors[path] = "number expected"
+                continue
+        elif isinstance(default, str):
+            if not isinstance(value, str):
+                errors[path] = "string expected"
+                continue
+        elif isinstance(default, list):
+            if not isinstance(value, list):
+                errors[path] = "array expected"
+                continue
+        rule = CONFIG_RULES.get(path)
+        if rule is not None:
+            error = _check_rule(value, rule)
+            if error:
+                errors[path] = error
+        validator = CONFIG_VALIDATORS.get(path)
+        if validator is not None and path not in errors:
+            error = validator(value)
+            if error:
+                errors[path] = error
+
+    if not prefix:
+        # 카메라별 프로필 재정의: 전역 녹화 설정과 같은 타입/범위
+        recording = config.get("recording")
+        cameras = recording.get("cameras") if isinstance(recording, dict) else None
+        if isinstance(cameras, dict) and isinstance(recording, dict):
+            for camera_id, camera in cameras.items():
+                if not isinstance(camera, dict):
+                    errors[f"recording.cameras.{camera_id}"] = "object expected"
+                    continue
+                for key in camera:
+                    if key not in CAMERA_KEYS:
+                        errors[f"recording.cameras.{camera_id}.{key}"] = "unknown setting"
+                for key, expected in (("enabled", bool), ("storage_path", str)):
+                    if key in camera and not isinstance(camera[key], expected):
+                        errors[f"recording.cameras.{camera_id}.{key}"] = f"{expected.__name__} expected"
+                overrides = {key: camera[key] for key in PROFILE_KEYS if key in camera}
+                base = {key: defaults.get("recording", {}).get(key) for key in overrides}
+                for path, message in validate_config(overrides, base, "recording.").items():
+                    errors[path.replace("recording.", f"recording.cameras.{camera_id}.", 1)] = message
+
+        # 프라이버시 마스크: 카메라별 다각형 목록 ([[x, y], ...] 0~1 비율 좌표)
+        privacy = config.get("privacy")
+        masks = privacy.get("cameras") if isinstance(privacy, dict) else None
+        if isinstance(masks, dict):
+            for camera_id, polygons in masks.items():
+                error = _check_polygons(polygons)
+                if error:
+                    errors[f"privacy.cameras.{camera_id}"] = error
+
+        thermal = config.get("thermal")
+        if isinstance(thermal, dict) and "thermal.warn_temp" not in errors and "thermal.critical_temp" not in errors:
+            if thermal.get("warn_temp", 70) >= thermal.get("critical_temp", 77):
+                errors["thermal.critical_temp"] = "must be greater than thermal.warn_temp"
+    return errors
+
+
+def _atomic_write(path: str, text: str):
+    """임시 파일 기록 → fsync → rename (중간에 전원이 끊겨도 이전 파일 또는 새 파일 중 하나만 남음)"""
+    target = Path(path)
+    directory = target.parent if str(target.parent) else Path(".")
+    # 임시 파일 이름은 호출마다 고유 (동시 저장이 같은 임시 파일을 잘라 쓰지 않도록)
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{target.name}.", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, target)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+    # rename 자체를 디스크에 반영 (디렉터리 엔트리 fsync)
+    try:
+        dir_fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(dir_fd)
+    finally:
+        os.close(dir_fd)
+
+
 class ConfigManager:
-    """설정 파일 관리자"""
+    """설정 파일 관리자
+
+    - 설정은 불변 스냅샷(ConfigSnapshot)으로 보관, 변경 시 새 스냅샷으로 원자적 교체
+    - start_watching(): config.json 변경 감시 (mtime) → 검증 → 교체 → 바뀐 키를 구독자에게 통지
+    - 검증 실패/파싱 실패 시 기존 스냅샷 유지
+    - 저장은 원자적 교체(임시 파일 + fsync + rename), 검증을 통과한 설정은 <config>.good에 보관
+      → 기동 시 config.json이 손상되었으면 기본값이 아닌 마지막 정상 설정으로 시작
+    """
 
     def __init__(self, config_path: str = "config.json"):
         self.config_path = config_path
-        self.config = {}
+        self.backup_path = config_path + ".good"
         self.default_config = self._get_default_config()
+        self._snapshot = ConfigSnapshot.build(self.default_config, 0)
+        self._subscribers: List[Tuple[Tuple[str, ...], Callable[[Set[str], ConfigSnapshot], None]]] = []
+        self._swap_lock = threading.Lock()
+        # 변경 전체(스냅샷 읽기 → 교체 → 저장)를 직렬화 - 동시 PATCH가 서로의 변경을 덮어쓰지 않도록
+        self._write_lock = threading.RLock()
+        self._watch_thread: Optional[threading.Thread] = None
+        self._watch_stop = threading.Event()
+        self._file_signature = None
+        self.last_error: Optional[str] = None
+        self.last_errors: Dict[str, str] = {}
+        # 생성 시점(모듈 import)에는 파일을 쓰지 않음 - config.json 생성 / .good 백업은 persist_pending()에서
+        self._defer_writes = True
+        self._pending_save = False
+        self._pending_backup = False
         self.load_config()
 
+    @property
+    def snapshot(self) -> ConfigSnapshot:
+        """현재 설정 스냅샷 (불변 - 참조를 잡아두면 일관된 값 보장)"""
+        return self._snapshot
+
+    @property
+    def config(self) -> Mapping[str, Any]:
+        """현재 설정 (읽기 전용 매핑)"""
+        return self._snapshot.data
+
     def _get_default_config(self) -> Dict[str, Any]:
         """기본 설정값 반환"""
         return {
@@ -29,6 +518,7 @@ class ConfigManager:
                 "overlap_duration": 1,
                 "bitrate": 5000000,
                 "framerate": 30,
+                "gop": 0,
                 "resolution": [640, 480],
                 "cameras": {
                     "0": {
@@ -40,53 +530,227 @@ class ConfigManager:
                         "storage_path": "videos/cam1"
                     }
                 },
+                "catalog_path": "videos/catalog.jsonl",
+                "thumbnails": {
+                    "enabled": True,
+                    "interval": 2,
+                    "width": 160,
+                    "columns": 5,
+                    "quality": 70
+                },
+                "policy": {
+                    "mode": "adaptive",
+                    "idle_bitrate": 1000000,
+                    "idle_framerate": 10,
+                    "pre_roll_seconds": 5,
+                    "post_roll_seconds": 10
+                },
                 "cleanup": {
                     "enabled": False,
                     "max_age_days": 30,
                     "min_free_space_gb": 10
+                },
+                "staging": {
+                    "enabled": True,
+                    "path": "/dev/shm/livecam",
+                    "budget_mb": 192,
+                    "min_free_mb": 64,
+                    "chunk_kb": 1024,
+                    "max_backlog": 8
                 }
             },
             "streaming": {
+                "enabled": True,
                 "max_clients": 2,
+                "max_connections": 4,
+                "max_connections_per_ip": 4,
+                "max_bandwidth_mbps": 0,
+                "retry_after": 2,
+                "latency_target_ms": 150,
                 "default_quality": "640x480",
                 "mirror_mode": True,
                 "buffer_size": 10,
                 "stats_interval": 2000,
                 "heartbeat_interval": 3000
             },
+            "export": {
+                "output_dir": "exports",
+                "max_concurrent": 1,
+                "stream_max_seconds": 600,
+                "max_seconds": 21600,
+                "job_retention_hours": 24
+            },
+            "motion": {
+                "enabled": True,
+                "fps": 5,
+                "analysis_width": 160,
+                "pixel_threshold": 25,
+                "background_alpha": 0.05,
+                "min_active_frames": 2,
+                "hold_seconds": 3.0,
+                "zones": [
+                    {"name": "full", "rect": [0.0, 0.0, 1.0, 1.0], "threshold": 0.01}
+                ]
+            },
             "system": {
                 "web_port": 8001,
                 "log_level": "INFO",
-                "gpu_memory_split": 256
+                "gpu_memory_split": 256,
+                "camera_backend": "picamera2",
+                "config_watch_interval": 2
+            },
+            "hub": {
+                "port": 8000,
+                "nodes": [],
+                "timeout": 2.0,
+                "cache_ttl": 2.0,
+                "max_connections_per_node": 8,
+                "stream_idle_timeout": 5
+            },
+            "thermal": {
+                "enabled": True,
+                "interval": 2,
+                "history": 300,
+                "warn_temp": 70,
+                "critical_temp": 77,
+                "hysteresis": 5
+            },
+            "qos": {
+                "enabled": True,
+                "interval": 1.0,
+                "step_interval": 3.0,
+                "restore_seconds": 15.0,
+                "thresholds": {
+                    "encode_load": [0.5, 1.0],
+                    "capture_ms": [100, 250],
+                    "disk_write_ms": [50, 200],
+                    "cpu_load": [0.9, 1.5]
+                },
+                "tiers": [
+                    {"stream_fps": 15, "rendition": None, "max_connections": None},
+                    {"stream_fps": 10, "rendition": "640x480", "max_connections": None},
+                    {"stream_fps": 5, "rendition": "640x480", "max_connections": 1}
+                ]
+            },
+            "forecast": {
+                "rate_window_hours": 24,
+                "warn_days": 7
+            },
+            "privacy": {
+                "enabled": True,
+                "cameras": {
+                    "0": [],
+                    "1": []
+                }
+            },
+            "heartbeat": {
+                "hub_url": "",
+                "node_name": "",
+                "interval": 10
             }
         }
 
+    def _read_file(self, path: Optional[str] = None) -> Dict[str, Any]:
+        with open(path or self.config_path, 'r', encoding='utf-8') as f:
+            loaded = json.load(f)
+        if not isinstance(loaded, dict):
+            raise ValueError("config root must be an object")
+        return loaded
+
+    def _signature(self):
+        try:
+            stat = os.stat(self.config_path)
+            return stat.st_mtime_ns, stat.st_size
+        except OSError:
+            return None
+
     def load_config(self) -> bool:
-        """설정 파일 로드"""
+        """설정 파일 로드 (검증 통과 시 스냅샷 교체)"""
+        with self._write_lock:
+            return self._load_config()
+
+    def _load_config(self) -> bool:
         try:
             if os.path.exists(self.config_path):
-                with open(self.config_path, 'r', encoding='utf-8') as f:
-                    self.config = json.load(f)
+                self._file_signature = self._signature()
+                loaded = self._read_file()
                 logger.info(f"[CONFIG] 설정 파일 로드 완료: {self.config_path}")
 
                 # 누락된 설정값을 기본값으로 채움
-                self._merge_default_config()
-                return True
+                if self._apply(self._merge_default_config(loaded)):
+                    if self._defer_writes:
+                        self._pending_backup = True
+                    else:
+                        self._write_backup()
+                    return True
+                if self._snapshot.version == 0:
+                    self._load_backup()
+                return False
             else:
                 logger.warning(f"[CONFIG] 설정 파일이 없습니다. 기본값 사용: {self.config_path}")
-                self.config = self.default_config.copy()
-                self.save_config()
+                self._apply(copy.deepcopy(self.default_config))
+                if self._defer_writes:
+                    self._pending_save = True
+                else:
+                    self.save_config()
                 return False
 
         except Exception as e:
+            self.last_error = str(e)
             logger.error(f"[CONFIG] 설정 파일 로드 실패: {e}")
-            self.config = self.default_config.copy()
+            if self._snapshot.version == 0:
+                self._load_backup()
+            return False
+
+    def persist_pending(self):
+        """기동 시 호출 - 로드 중 미뤄둔 기록 반영 (config.json이 없었으면 기본값 저장, 정상 설정 백업)
+
+        이후의 다시 로드(파일 감시)는 바로 기록
+        """
+        with self._write_lock:
+            self._defer_writes = False
+            if self._pending_save:
+                self._pending_save = self._pending_backup = False
+                self.save_config()
+            elif self._pending_backup:
+                self._pending_backup = False
+                self._write_backup()
+
+    def _dump(self) -> str:
+        return json.dumps(self._snapshot.to_dict(), indent=2, ensure_ascii=False) + "\n"
+
+    def _write_backup(self):
+        """검증을 통과한 현재 설정을 마지막 정상 설정으로 보관 (내용이 같으면 생략)"""
+        text = self._dump()
+        try:
+            if os.path.exists(self.backup_path) and Path(self.backup_path).read_text(encoding='utf-8') == text:
+                return
+            _atomic_write(self.backup_path, text)
+        except OSError as e:
+            logger.warning(f"[CONFIG] 정상 설정 백업 실패: {e}")
+
+    def _load_backup(self) -> bool:
+        """기동 시 config.json 손상 → 마지막 정상 설정으로 시작 (config.json은 덮어쓰지 않음)"""
+        if not os.path.exists(self.backup_path):
+            logger.warning("[CONFIG] 정상 설정 백업 없음 - 기본값 사용")
+            return False
+        try:
+            loaded = self._read_file(self.backup_path)
+        except Exception as e:
+            logger.error(f"[CONFIG] 정상 설정 백업 로드 실패: {e}")
             return False
+        error = self.last_error
+        if not self._apply(self._merge_default_config(loaded)):
+            return False
+        # config.json 오류는 계속 보고 (운영자가 파일을 고칠 때까지)
+        self.last_error = f"{self.config_path}: {error} (using {self.backup_path})"
+        logger.warning(f"[CONFIG] 마지막 정상 설정으로 시작: {self.backup_path}")
+        return True
 
-    def _merge_default_config(self):
+    def _merge_default_config(self, loaded: Dict[str, Any]) -> Dict[str, Any]:
         """기본 설정과 로드된 설정 병합"""
         def merge_dict(default: dict, loaded: dict) -> dict:
-            result = default.copy()
+            result = copy.deepcopy(default)
             for key, value in loaded.items():
                 if key in result and isinstance(result[key], dict) and isinstance(value, dict):
                     result[key] = merge_dict(result[key], value)
@@ -94,53 +758,159 @@ class ConfigManager:
                     result[key] = value
             return result
 
-        self.config = merge_dict(self.default_config, self.config)
+        return merge_dict(self.default_config, loaded)
+
+    def _apply(self, config: Dict[str, Any]) -> bool:
+        """검증 → 새 스냅샷 원자적 교체 → 바뀐 키 통지"""
+        return not self._swap(config)[0]
+
+    def _swap(self, config: Dict[str, Any]) -> Tuple[Dict[str, str], Set[str]]:
+        """_apply 본체 - (키별 검증 오류, 바뀐 키) 반환"""
+        errors = validate_config(config, self.default_config)
+        if errors:
+            self.last_errors = errors
+            self.last_error = "; ".join(f"{path}: {message}" for path, message in errors.items())
+            logger.error(f"[CONFIG] 설정 검증 실패 - 기존 설정 유지: {self.last_error}")
+            return errors, set()
+
+        with self._swap_lock:
+            old = self._snapshot
+            new = ConfigSnapshot.build(config, old.version + 1)
+            old_leaves, new_leaves = old.leaves(), new.leaves()
+            changed = {path for path in old_leaves.keys() | new_leaves.keys()
+                       if old_leaves.get(path, _MISSING) != new_leaves.get(path, _MISSING)}
+            self._snapshot = new
+        self.last_error = None
+        self.last_errors = {}
+
+        if changed and old.version > 0:
+            logger.info(f"[CONFIG] 설정 변경 적용 (v{new.version}): {', '.join(sorted(changed))}")
+            self._notify(changed, new)
+        return {}, changed
+
+    def patch(self, changes: Dict[str, Any], persist: bool = True) -> Tuple[Dict[str, str], Set[str]]:
+        """여러 설정값을 한 번에 변경 (점 표기 경로 → 값) - 하나라도 잘못되면 전체 거부
+
+        persist=True: 적용 후 config.json에 원자적으로 저장
+        반환: (키별 오류, 바뀐 키)
+        """
+        with self._write_lock:
+            return self._patch(changes, persist)
+
+    def _patch(self, changes: Dict[str, Any], persist: bool) -> Tuple[Dict[str, str], Set[str]]:
+        config = self._snapshot.to_dict()
+        errors: Dict[str, str] = {}
+        for path, value in changes.items():
+            keys = path.split('.')
+            node = config
+            for key in keys[:-1]:
+                node = node.get(key) if isinstance(node, dict) else None
+                if node is None:
+                    break
+            if not isinstance(node, dict) or not all(keys):
+                errors[path] = "unknown setting"
+                continue
+            node[keys[-1]] = value
+        if errors:
+            # 경로 오류가 있어도 나머지 값의 검증 결과까지 함께 보고
+            errors.update(validate_config(config, self.default_config))
+            return errors, set()
+
+        errors, changed = self._swap(config)
+        if not errors and changed and persist and not self.save_config():
+            errors = {"": f"save failed: {self.last_error}"}
+        return errors, changed
+
+    def subscribe(self, callback: Callable[[Set[str], "ConfigSnapshot"], None], *prefixes: str):
+        """설정 변경 구독 - callback(바뀐 키 집합, 새 스냅샷)
+
+        prefixes 지정 시 해당 경로 아래 키가 바뀐 경우에만 호출 (바뀐 키도 그 범위로 한정)
+        """
+        self._subscribers.append((prefixes, callback))
+
+    def _notify(self, changed: Set[str], snapshot: "ConfigSnapshot"):
+        for prefixes, callback in list(self._subscribers):
+            keys = {key for key in changed
+                    if not prefixes or any(key == p or key.startswith(p + ".") for p in prefixes)}
+            if not keys:
+                continue
+            try:
+                callback(keys, snapshot)
+            except Exception as e:
+                logger.error(f"[CONFIG] 설정 변경 처리 오류 ({getattr(callback, '__name__', callback)}): {e}")
+
+    def start_watching(self, interval: float = 2.0):
+        """config.json 변경 감시 시작 (mtime/크기 주기 확인 - 추가 의존성 없음)"""
+        self.persist_pending()
+        if interval <= 0 or (self._watch_thread is not None and self._watch_thread.is_alive()):
+            return
+        self._watch_stop.clear()
+
+        def watch():
+            while not self._watch_stop.wait(interval):
+                signature = self._signature()
+                if signature is None or signature == self._file_signature:
+                    continue
+                # 편집기가 쓰기를 마칠 때까지 잠시 대기 후 다시 확인
+                time.sleep(0.2)
+                if self._signature() != signature:
+                    continue
+                logger.info(f"[CONFIG] 설정 파일 변경 감지: {self.config_path}")
+                self.load_config()
+
+        self._watch_thread = threading.Thread(target=watch, name="config-watch", daemon=True)
+        self._watch_thread.start()
+        logger.info(f"[CONFIG] 설정 파일 감시 시작 ({interval:g}초 간격)")
+
+    def stop_watching(self):
+        self._watch_stop.set()
 
     def save_config(self) -> bool:
-        """설정 파일 저장"""
-        try:
-            with open(self.config_path, 'w', encoding='utf-8') as f:
-                json.dump(self.config, f, indent=2, ensure_ascii=False)
-            logger.info(f"[CONFIG] 설정 파일 저장 완료: {self.config_path}")
+        """설정 파일 저장 (원자적 교체 + 정상 설정 백업 갱신)"""
+        with self._write_lock:
+            try:
+                _atomic_write(self.config_path, self._dump())
+                self._file_signature = self._signature()
+                logger.info(f"[CONFIG] 설정 파일 저장 완료: {self.config_path}")
+            except Exception as e:
+                self.last_error = str(e)
+                logger.error(f"[CONFIG] 설정 파일 저장 실패: {e}")
+                return False
+            self._write_backup()
             return True
-        except Exception as e:
-            logger.error(f"[CONFIG] 설정 파일 저장 실패: {e}")
-            return False
 
     def get(self, path: str, default=None) -> Any:
-        """설정값 조회 (점 표기법 지원)
+        """설정값 조회 (점 표기법 지원 - 미리 펼친 색인에서 조회)
         예: get('recording.bitrate') -> 5000000
+        dict/list 값은 호출자 소유 사본으로 반환 (스냅샷 자체는 불변 유지)
         """
-        keys = path.split('.')
-        value = self.config
-
-        try:
-            for key in keys:
-                value = value[key]
-            return value
-        except (KeyError, TypeError):
+        value = self._snapshot.index.get(path, _MISSING)
+        if value is _MISSING:
             return default
+        return _thaw(value) if isinstance(value, (Mapping, tuple)) else value
 
     def set(self, path: str, value: Any) -> bool:
-        """설정값 변경 (점 표기법 지원)
+        """설정값 변경 (점 표기법 지원) - 새 스냅샷으로 교체 후 구독자 통지
         예: set('recording.bitrate', 8000000)
         """
         keys = path.split('.')
-        config = self.config
+        with self._write_lock:
+            config = self._snapshot.to_dict()
+            node = config
 
-        try:
-            # 마지막 키를 제외하고 경로 생성
-            for key in keys[:-1]:
-                if key not in config:
-                    config[key] = {}
-                config = config[key]
+            try:
+                # 마지막 키를 제외하고 경로 생성
+                for key in keys[:-1]:
+                    if key not in node:
+                        node[key] = {}
+                    node = node[key]
 
-            # 마지막 키에 값 설정
-            config[keys[-1]] = value
-            return True
-        except Exception as e:
-            logger.error(f"[CONFIG] 설정값 변경 실패 {path}={value}: {e}")
-            return False
+                # 마지막 키에 값 설정
+                node[keys[-1]] = value
+            except Exception as e:
+                logger.error(f"[CONFIG] 설정값 변경 실패 {path}={value}: {e}")
+                return False
+            return self._apply(config)
 
     def reload(self) -> bool:
         """설정 파일 다시 로드"""
@@ -164,30 +934,41 @@ class ConfigManager:
         """특정 카메라 설정 반환"""
         return self.get(f'recording.cameras.{camera_id}', {})
 
-    def get_resolution(self) -> Tuple[int, int]:
-        """해상도 반환"""
-        resolution = self.get('recording.resolution', [640, 480])
-        return tuple(resolution)
+    def get_camera_profile(self, camera_id) -> CameraProfile:
+        """카메라별 녹화 프로필 반환 (전역 설정 상속 + 카메라별 재정의)"""
+        return self._snapshot.profile(camera_id)
+
+    def get_resolution(self, camera_id=None) -> Tuple[int, int]:
+        """해상도 반환 (camera_id 지정 시 카메라 프로필 값)"""
+        if camera_id is not None:
+            return self._snapshot.profile(camera_id).resolution
+        return self._snapshot.resolution
 
-    def get_segment_duration(self) -> int:
-        """세그먼트 길이 반환"""
-        return self.get('recording.segment_duration', 31)
+    def get_segment_duration(self, camera_id=None) -> int:
+        """세그먼트 길이 반환 (camera_id 지정 시 카메라 프로필 값)"""
+        if camera_id is not None:
+            return self._snapshot.profile(camera_id).segment_duration
+        return self._snapshot.segment_duration
 
-    def get_bitrate(self) -> int:
-        """비트레이트 반환"""
-        return self.get('recording.bitrate', 5000000)
+    def get_bitrate(self, camera_id=None) -> int:
+        """비트레이트 반환 (camera_id 지정 시 카메라 프로필 값)"""
+        if camera_id is not None:
+            return self._snapshot.profile(camera_id).bitrate
+        return self._snapshot.bitrate
 
-    def get_framerate(self) -> int:
-        """프레임레이트 반환"""
-        return self.get('recording.framerate', 30)
+    def get_framerate(self, camera_id=None) -> int:
+        """프레임레이트 반환 (camera_id 지정 시 카메라 프로필 값)"""
+        if camera_id is not None:
+            return self._snapshot.profile(camera_id).framerate
+        return self._snapshot.framerate
 
     def get_max_clients(self) -> int:
         """최대 클라이언트 수 반환"""
-        return self.get('streaming.max_clients', 2)
+        return self._snapshot.max_clients
 
     def get_web_port(self) -> int:
         """웹 서버 포트 반환"""
-        return self.get('system.web_port', 8001)
+        return self._snapshot.web_port
 
     def is_camera_enabled(self, camera_id: str) -> bool:
         """카메라 활성화 여부 확인"""
@@ -195,7 +976,7 @@ class ConfigManager:
 
     def get_storage_path(self, camera_id: str) -> str:
         """카메라별 저장 경로 반환"""
-        return self.get(f'recording.cameras.{camera_id}.storage_path', f'videos/cam{camera_id}')
+        return self._snapshot.profile(camera_id).storage_path
 
 # 글로벌 설정 관리자 인스턴스
 config_manager = ConfigManager()
\ No newline at end of file
@@ -0,0 +1,550 @@
+#!/usr/bin/env python3
+"""
+SHT 듀얼 LIVE 카메라 - 하드웨어 없는 통합 점검 (합성 카메라 백엔드)
+In-process end-to-end harness: boots CCTVWebAPI on the synthetic backend and checks latency, fps and cleanup
+
+사용: python3 integration_check.py [--keep] [--verbose]
+- 임시 작업 디렉토리(설정 / 녹화 / 스테이징 경로)에서 같은 프로세스 안에 웹 서버를 띄움 (임의 포트)
+- 기동 → 동시 /stream 시청자 → 접속 할당량 → /api/dual_mode → /switch → /api/resolution → /api/shutdown
+  순서로 호출하며 명령 지연 시간 / 첫 프레임 지연 / 스트림 FPS / 접속·스레드·FD 정리 / 녹화 파일 마무리를 확인
+- 일반 리눅스 PC에서 1분 이내, 실패 항목이 있으면 종료 코드 1 (배포 전 점검용)
+"""
+
+import argparse
+import json
+import logging
+import os
+import shutil
+import socket
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+import httpx
+
+REPO_DIR = Path(__file__).resolve().parent
+
+# 점검용 설정 덮어쓰기 (짧은 세그먼트, 임시 경로, QoS 비활성화 - 점검 중 CPU 부하로 FPS가 제한되지 않도록)
+CHECK_CONFIG = {
+    "recording": {
+        "segment_duration": 6,
+        "cameras": {"0": {"storage_path": "videos/cam0"}, "1": {"storage_path": "videos/cam1"}},
+        "catalog_path": "videos/catalog.jsonl",
+        "staging": {"path": "staging", "min_free_mb": 1},
+        "cleanup": {"enabled": False}
+    },
+    "qos": {"enabled": False},
+    "heartbeat": {"hub_url": ""}
+}
+
+# 앱 스레드 이름 (종료 후 남아 있으면 정리 누락)
+APP_THREAD_PREFIXES = ("camera-commands", "staging-mover", "thermal", "qos", "motion", "thumbs",
+                       "recorder", "heartbeat", "config-watch")
+# 웹 서버 / 스레드 풀 스레드 (요청 처리용 - 유휴 후 자동 종료되므로 누수 집계에서 제외)
+POOL_THREAD_PREFIXES = ("AnyIO worker", "ThreadPoolExecutor", "asyncio_", "sprites_", "cam-init_")
+
+
+def _merge(base: Dict[str, Any], overrides: Dict[str, Any]) -> Dict[str, Any]:
+    for key, value in overrides.items():
+        if isinstance(value, dict) and isinstance(base.get(key), dict):
+            _merge(base[key], value)
+        else:
+            base[key] = value
+    return base
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def open_fds() -> int:
+    """열린 파일 디스크립터 수 (/proc/self/fd)"""
+    try:
+        return len(os.listdir("/proc/self/fd"))
+    except OSError:
+        return 0
+
+
+def app_threads() -> List[str]:
+    """요청 처리 풀 / 타이머(녹화 정책 post-roll 등 스스로 끝남)를 제외한 살아 있는 스레드 이름"""
+    return sorted(t.name for t in threading.enumerate()
+                  if t is not threading.main_thread() and not isinstance(t, threading.Timer)
+                  and not t.name.startswith(POOL_THREAD_PREFIXES))
+
+
+class SyntheticNode:
+    """합성 카메라 백엔드로 CameraManager + CCTVWebAPI를 같은 프로세스에서 실행
+
+    config_manager는 임포트 시점의 작업 디렉토리에서 config.json을 읽으므로,
+    webmain 임포트 전에 임시 작업 디렉토리로 이동해 점검용 설정을 기록한다 (프로세스당 1회).
+    """
+
+    def __init__(self, workdir: Path, overrides: Optional[Dict[str, Any]] = None, speed: float = 1.0):
+        self.workdir = Path(workdir)
+        self.overrides = overrides or {}
+        self.speed = speed
+        self.port = _free_port()
+        self.base_url = f"http://127.0.0.1:{self.port}"
+        self.webmain = None
+        self.camera_manager = None
+        self.web_api = None
+        self.server = None
+        self._thread: Optional[threading.Thread] = None
+        self.warmup_started: Optional[float] = None
+        self.exited = threading.Event()
+
+    def _prepare(self):
+        self.workdir.mkdir(parents=True, exist_ok=True)
+        with open(REPO_DIR / "config.json", "r", encoding="utf-8") as f:
+            config = _merge(_merge(json.load(f), CHECK_CONFIG), self.overrides)
+        with open(self.workdir / "config.json", "w", encoding="utf-8") as f:
+            json.dump(config, f, indent=2)
+        web_link = self.workdir / "web"
+        if not web_link.exists():
+            web_link.symlink_to(REPO_DIR / "web")
+        os.chdir(self.workdir)
+        if str(REPO_DIR) not in sys.path:
+            sys.path.insert(0, str(REPO_DIR))
+
+    def start(self, timeout: float = 15.0):
+        """웹 서버 기동 + 카메라 warming 시작 (서버 바인딩까지 대기)"""
+        self._prepare()
+        import uvicorn
+        import webmain
+        from web.api import CCTVWebAPI
+        import synthetic_camera
+
+        synthetic_camera.SyntheticPicamera2.speed = self.speed
+        webmain.load_camera_modules("synthetic")
+        self.webmain = webmain
+        self.camera_manager = webmain.CameraManager()
+        self.web_api = CCTVWebAPI(self.camera_manager, exit_process=self._exit_server)
+        self.server = uvicorn.Server(uvicorn.Config(self.web_api.app, host="127.0.0.1", port=self.port,
+                                                    log_level="warning"))
+        self._thread = threading.Thread(target=self.server.run, name="check-server", daemon=True)
+        self._thread.start()
+        deadline = time.monotonic() + timeout
+        while not self.server.started:
+            if time.monotonic() > deadline or not self._thread.is_alive():
+                raise RuntimeError("web server did not start")
+            time.sleep(0.02)
+        self.warmup_started = time.monotonic()
+        self.camera_manager.start_warmup(enable_recording=True)
+
+    def _exit_server(self):
+        """/api/shutdown 이후 프로세스 대신 웹 서버만 종료"""
+        self.server.should_exit = True
+        self.exited.set()
+
+    def stop(self, timeout: float = 10.0):
+        """점검 중단 시 정리 (/api/shutdown을 거치지 않은 경우)"""
+        if self.camera_manager is not None and not self.exited.is_set():
+            self.camera_manager.shutdown_sync()
+        if self.server is not None:
+            self.server.should_exit = True
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    @property
+    def server_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+
+class StreamReader(threading.Thread):
+    """MJPEG(multipart/x-mixed-replace) 시청자 - 프레임 수 / 첫 프레임 지연 / 마지막 JPEG 기록"""
+
+    def __init__(self, url: str, name: str):
+        super().__init__(name=f"check-{name}", daemon=True)
+        self.url = url
+        self.status: Optional[int] = None
+        self.headers: Dict[str, str] = {}
+        self.frames = 0
+        self.bytes = 0
+        self.first_frame: Optional[float] = None
+        self.last_frame: Optional[bytes] = None
+        self.ended = False          # 서버가 스트림을 끝냄 (클라이언트 중단이 아님)
+        self.error: Optional[str] = None
+        self._opened = None
+        self._counting_since = None
+        self._counted = 0
+        self._stop_event = threading.Event()
+        self.connected = threading.Event()
+
+    def run(self):
+        self._opened = time.monotonic()
+        buffer = b""
+        try:
+            with httpx.stream("GET", self.url, timeout=httpx.Timeout(10.0)) as response:
+                self.status = response.status_code
+                self.headers = dict(response.headers)
+                self.connected.set()
+                if response.status_code != 200:
+                    return
+                for chunk in response.iter_bytes():
+                    buffer += chunk
+                    buffer = self._parse(buffer)
+                    if self._stop_event.is_set():
+                        return
+                self.ended = True
+        except httpx.HTTPError as e:
+            self.error = str(e)
+        finally:
+            self.connected.set()
+
+    def _parse(self, buffer: bytes) -> bytes:
+        while True:
+            header_end = buffer.find(b"\r\n\r\n")
+            if header_end < 0:
+                return buffer
+            headers = buffer[:header_end].decode("latin-1").split("\r\n")
+            length = next((int(line.split(":", 1)[1]) for line in headers
+                           if line.lower().startswith("content-length")), None)
+            if length is None:
+                raise ValueError(f"multipart part without Content-Length: {headers}")
+            body_start = header_end + 4
+            if len(buffer) < body_start + length + 2:
+                return buffer
+            self.last_frame = buffer[body_start:body_start + length]
+            self.frames += 1
+            self.bytes += length
+            now = time.monotonic()
+            if self.first_frame is None:
+                self.first_frame = now - self._opened
+                self._counting_since = now
+            else:
+                self._counted += 1
+            buffer = buffer[body_start + length + 2:]
+
+    @property
+    def fps(self) -> float:
+        """첫 프레임 이후 평균 FPS"""
+        if self._counting_since is None:
+            return 0.0
+        elapsed = time.monotonic() - self._counting_since
+        return self._counted / elapsed if elapsed > 0 else 0.0
+
+    def frame_image(self):
+        """마지막 JPEG 디코딩 (BGR 배열, 없으면 None)"""
+        import cv2
+        import numpy as np
+        if not self.last_frame:
+            return None
+        return cv2.imdecode(np.frombuffer(self.last_frame, dtype=np.uint8), cv2.IMREAD_COLOR)
+
+    def frame_size(self):
+        """마지막 JPEG의 (가로, 세로)"""
+        image = self.frame_image()
+        return None if image is None else (image.shape[1], image.shape[0])
+
+    def close(self, timeout: float = 5.0):
+        self._stop_event.set()
+        self.join(timeout)
+
+
+class IntegrationCheck:
+    """점검 시나리오 + 결과 기록"""
+
+    def __init__(self, node: SyntheticNode, args):
+        self.node = node
+        self.args = args
+        self.client = httpx.Client(base_url=node.base_url, timeout=httpx.Timeout(30.0))
+        self.results: List[Dict[str, Any]] = []
+        self.readers: List[StreamReader] = []
+
+    def check(self, name: str, ok: bool, detail: str = ""):
+        self.results.append({"name": name, "ok": bool(ok), "detail": detail})
+        print(f"  [{'PASS' if ok else 'FAIL'}] {name}" + (f" - {detail}" if detail else ""), flush=True)
+
+    def timed(self, method: str, path: str):
+        """요청 1회 → (응답, 소요 초)"""
+        started = time.monotonic()
+        response = self.client.request(method, path)
+        return response, time.monotonic() - started
+
+    def command(self, name: str, path: str, limit: float):
+        """카메라 명령 API 호출 - 200 + 지연 시간 상한 확인"""
+        response, elapsed = self.timed("POST", path)
+        self.check(f"{name} 응답", response.status_code == 200,
+                   f"HTTP {response.status_code} {elapsed * 1000:.0f}ms (상한 {limit * 1000:.0f}ms)")
+        self.check(f"{name} 지연", elapsed <= limit, f"{elapsed * 1000:.0f}ms")
+        return response
+
+    def open_streams(self, paths: List[str]) -> List[StreamReader]:
+        readers = [StreamReader(self.node.base_url + path, f"{path.strip('/').replace('/', '-')}-{i}")
+                   for i, path in enumerate(paths)]
+        for reader in readers:
+            reader.start()
+            self.readers.append(reader)
+        for reader in readers:
+            reader.connected.wait(10)
+        return readers
+
+    def measure_streams(self, label: str, readers: List[StreamReader], expected_size=None):
+        """시청자별 첫 프레임 지연 / FPS / 캡처 → 전송 지연 확인 (stream_seconds 동안 수신)"""
+        time.sleep(self.args.stream_seconds)
+        clients = self.client.get("/api/clients").json()
+        target = clients["limits"]["latency_target_ms"]
+        for connection in clients["connections"]:
+            p95 = connection["latency_ms"]["p95"]
+            self.check(f"{label} {connection['conn_id']} 캡처→전송 지연", p95 is not None and p95 <= target,
+                       f"p95 {p95}ms, 최대 {connection['latency_ms']['max']}ms (목표 {target}ms), "
+                       f"건너뜀 {connection['frames_dropped']}")
+        for reader in readers:
+            name = f"{label} {reader.url.replace(self.node.base_url, '')}"
+            first = reader.first_frame
+            self.check(f"{name} 첫 프레임", reader.status == 200 and first is not None
+                       and first <= self.args.max_first_frame,
+                       f"HTTP {reader.status}, " + (f"{first * 1000:.0f}ms" if first is not None else "프레임 없음"))
+            self.check(f"{name} FPS", reader.fps >= self.args.min_fps,
+                       f"{reader.fps:.1f}fps (하한 {self.args.min_fps}), {reader.frames} frames")
+            if expected_size is not None:
+                size = reader.frame_size()
+                self.check(f"{name} 프레임 크기", size == expected_size, f"{size} (기대 {expected_size})")
+
+    def check_node_status(self):
+        """노드 상태 조건부 폴링 - 세그먼트 안에서 두 번 폴링하면 304 (계측값은 헤더로 전달)
+
+        녹화 화질은 세그먼트 경계에서 바뀌므로 두 카메라 모두 새 세그먼트가 시작된 직후에 폴링
+        """
+        def last_segments():
+            return self.client.get("/api/node/status").json()["metrics"]["last_segment"]
+
+        initial = last_segments()
+        deadline = time.monotonic() + CHECK_CONFIG["recording"]["segment_duration"] + 4
+        while time.monotonic() < deadline:
+            current = last_segments()
+            if all(current[camera_id] != initial[camera_id] for camera_id in current):
+                break
+            time.sleep(0.2)
+        response = self.client.get("/api/node/status")
+        etag = response.headers.get("ETag")
+        self.check("노드 상태", response.status_code == 200 and etag is not None,
+                   f"HTTP {response.status_code}, ETag {etag}")
+        time.sleep(1.0)
+        response = self.client.get("/api/node/status", headers={"If-None-Match": etag or ""})
+        metrics = response.headers.get("X-Node-Metrics")
+        self.check("노드 상태 304 (같은 세그먼트)", response.status_code == 304 and metrics is not None,
+                   f"HTTP {response.status_code}, 계측값 {metrics}")
+
+    def check_aspect(self, label: str, expected: float):
+        """렌디션 화면비가 캡처와 다를 때 찌그러지지 않는지 (검은 띠를 제외한 영상 영역의 가로/세로 비율)"""
+        reader = self.open_streams(["/stream"])[0]
+        time.sleep(1.0)
+        image = reader.frame_image()
+        self.close_streams(label, [reader])
+        if image is None:
+            self.check(f"{label} 화면비", False, "프레임 없음")
+            return
+        rows = (image.mean(axis=(1, 2)) > 8).nonzero()[0]
+        cols = (image.mean(axis=(0, 2)) > 8).nonzero()[0]
+        if rows.size == 0 or cols.size == 0:
+            self.check(f"{label} 화면비", False, "영상 영역 없음")
+            return
+        width, height = cols[-1] - cols[0] + 1, rows[-1] - rows[0] + 1
+        aspect = width / height
+        self.check(f"{label} 화면비", abs(aspect - expected) <= expected * 0.03,
+                   f"프레임 {image.shape[1]}x{image.shape[0]}, 영상 {width}x{height} = {aspect:.3f} (기대 {expected:.3f})")
+
+    def check_privacy_mask(self, camera_id: int):
+        """설정 변경만으로 마스크 적용 / 해제 (왼쪽 절반 가림 → 스트림 프레임 확인)"""
+        path = f"privacy.cameras.{camera_id}"
+        response = self.client.patch("/api/config?persist=false", json={path: [[[0, 0], [1.5, 0], [0.5, 1]]]})
+        self.check("잘못된 마스크 거부", response.status_code == 422, f"HTTP {response.status_code}")
+        left_half = [[0, 0], [0.5, 0], [0.5, 1], [0, 1]]
+        response = self.client.patch("/api/config?persist=false", json={path: [left_half]})
+        self.check("마스크 설정", response.status_code == 200, f"HTTP {response.status_code}")
+        reader = self.open_streams(["/stream"])[0]
+        time.sleep(1.0)
+        image = reader.frame_image()
+        self.close_streams("마스크", [reader])
+        if image is None:
+            self.check("마스크 적용", False, "프레임 없음")
+        else:
+            width = image.shape[1]
+            masked, visible = image[:, :width // 2 - 8].mean(), image[:, width // 2 + 8:].mean()
+            self.check("마스크 적용", masked < 8 and visible > 40,
+                       f"가린 영역 평균 {masked:.1f}, 나머지 {visible:.1f}")
+        status = self.client.get("/api/stats").json()["privacy"][str(camera_id)]
+        self.check("마스크 캐시", status["rebuilds"] <= 4, f"{status}")
+        response = self.client.patch("/api/config?persist=false", json={path: []})
+        self.check("마스크 해제", response.status_code == 200 and not self.node.camera_manager.privacy_masks[camera_id].active,
+                   f"HTTP {response.status_code}")
+
+    def close_streams(self, label: str, readers: List[StreamReader]):
+        """시청자 종료 → 서버 측 접속 해제 확인"""
+        for reader in readers:
+            reader.close()
+        deadline = time.monotonic() + self.args.cleanup_timeout
+        while self.node.camera_manager.clients.count() > 0 and time.monotonic() < deadline:
+            time.sleep(0.05)
+        remaining = self.node.camera_manager.clients.count()
+        self.check(f"{label} 접속 해제", remaining == 0, f"남은 접속 {remaining}")
+
+    def run(self) -> bool:
+        manager = self.node.camera_manager
+        started = time.monotonic()
+
+        print("[CHECK] 기동", flush=True)
+        ready = manager.ready_event.wait(self.args.max_warmup)
+        warmup = time.monotonic() - self.node.warmup_started
+        self.check("카메라 기동", ready and manager.startup_state == "ready",
+                   f"{manager.startup_state} {warmup * 1000:.0f}ms")
+        if not ready:
+            return False
+        response = self.client.get("/api/stats")
+        self.check("/api/stats", response.status_code == 200, f"HTTP {response.status_code}")
+        recording = [camera_id for camera_id, recorder in manager.recorders.items() if recorder.is_recording]
+        self.check("연속 녹화 시작", sorted(recording) == [0, 1], f"녹화 중 {sorted(recording)}")
+        self.check_node_status()
+        baseline_threads = app_threads()
+        baseline_fds = open_fds()
+
+        print("[CHECK] 싱글 뷰 동시 시청 + 접속 할당량", flush=True)
+        self.command("/switch/0", "/switch/0", self.args.max_command)
+        max_clients = manager.get_max_clients()
+        readers = self.open_streams(["/stream"] * max_clients)
+        rejected = self.open_streams(["/stream"])[0]
+        rejected.join(5)
+        self.check("할당량 초과 거부", rejected.status in (423, 429) and "retry-after" in rejected.headers,
+                   f"HTTP {rejected.status} (카메라당 최대 {max_clients})")
+        self.measure_streams("싱글", readers, expected_size=(640, 480))
+        self.close_streams("싱글", readers)
+
+        print("[CHECK] 듀얼 모드", flush=True)
+        self.command("/api/dual_mode/true", "/api/dual_mode/true", self.args.max_command)
+        readers = self.open_streams(["/stream/0", "/stream/1"])
+        self.measure_streams("듀얼", readers)
+        self.close_streams("듀얼", readers)
+
+        print("[CHECK] 카메라 전환 (시청 중)", flush=True)
+        reader = self.open_streams(["/stream"])[0]
+        time.sleep(0.5)
+        self.command("/switch/1", "/switch/1", self.args.max_command)
+        stats = self.client.get("/api/stats").json()
+        self.check("전환 후 현재 카메라", stats["current_camera"] == 1 and not manager.dual_mode,
+                   f"current_camera={stats['current_camera']}, dual_mode={manager.dual_mode}")
+        self.check("전환 중 녹화 유지", all(recorder.is_recording for recorder in manager.recorders.values()),
+                   f"{ {camera_id: recorder.is_recording for camera_id, recorder in manager.recorders.items()} }")
+        self.close_streams("전환", [reader])
+        readers = self.open_streams(["/stream"])
+        self.measure_streams("전환 후", readers)
+        self.close_streams("전환 후", readers)
+
+        print("[CHECK] 해상도 변경", flush=True)
+        self.command("/api/resolution/1280x720", "/api/resolution/1280x720", self.args.max_reconfigure)
+        readers = self.open_streams(["/stream"])
+        self.measure_streams("720p", readers, expected_size=(1280, 720))
+        self.close_streams("720p", readers)
+        self.command("/api/resolution/640x480", "/api/resolution/640x480", self.args.max_reconfigure)
+        # 캡처는 1280x720 유지 (축소만) → 4:3 렌디션에 16:9 영상이 레터박스로 들어가야 함
+        self.check_aspect("720p 캡처 → 640x480", 16 / 9)
+        response, _ = self.timed("POST", "/api/resolution/999x999")
+        self.check("잘못된 해상도 거부", response.status_code == 500, f"HTTP {response.status_code}")
+        for changes in ({"framerate": 0}, {"framerate": -5}, {"bitrate": 10 ** 12}):
+            response = self.client.post(f"/api/reconfigure/{manager.current_camera}", json=changes)
+            self.check(f"잘못된 실시간 변경 거부 {changes}", response.status_code == 400, f"HTTP {response.status_code}")
+
+        print("[CHECK] 프라이버시 마스크", flush=True)
+        self.check_privacy_mask(manager.current_camera)
+
+        print("[CHECK] 리소스 정리", flush=True)
+        deadline = time.monotonic() + self.args.cleanup_timeout
+        while time.monotonic() < deadline:
+            leaked_threads = sorted(set(app_threads()) - set(baseline_threads))
+            fds = open_fds()
+            if not leaked_threads and fds <= baseline_fds + self.args.fd_slack:
+                break
+            time.sleep(0.1)
+        self.check("스레드 누수", not leaked_threads, f"추가 스레드 {leaked_threads or '없음'}")
+        self.check("FD 누수", fds <= baseline_fds + self.args.fd_slack, f"{baseline_fds} → {fds}")
+
+        print("[CHECK] 종료 (/api/shutdown, 시청 중)", flush=True)
+        reader = self.open_streams(["/stream"])[0]
+        time.sleep(0.5)
+        response, elapsed = self.timed("POST", "/api/shutdown")
+        self.check("/api/shutdown 응답", response.status_code == 200, f"HTTP {response.status_code} {elapsed * 1000:.0f}ms")
+        reader.join(self.args.cleanup_timeout)
+        self.check("종료 시 스트림 종료", not reader.is_alive(),
+                   f"{reader.frames} frames, " + ("서버가 스트림 종료" if reader.ended else reader.error or "수신 중"))
+        self.node.exited.wait(self.args.cleanup_timeout)
+        deadline = time.monotonic() + self.args.cleanup_timeout
+        while self.node.server_running and time.monotonic() < deadline:
+            time.sleep(0.05)
+        self.check("웹 서버 종료", not self.node.server_running)
+        states = {camera_id: slot.state.value for camera_id, slot in manager.slots.items()}
+        self.check("카메라 중지", all(state == "stopped" for state in states.values()), f"{states}")
+        self.check("녹화 중지", not any(recorder.is_recording for recorder in manager.recorders.values()))
+        leftover = [name for name in app_threads() if name.startswith(APP_THREAD_PREFIXES)]
+        self.check("앱 스레드 정리", not leftover, f"남은 스레드 {leftover or '없음'}")
+        self.check("접속 레지스트리 비움", manager.clients.count() == 0, f"남은 접속 {manager.clients.count()}")
+        if manager.staging is not None:
+            staged = list(manager.staging.root.glob("cam*/*/*.mp4"))
+            self.check("스테이징 비움", manager.staging.backlog == 0 and not staged,
+                       f"대기 {manager.staging.backlog}, 남은 파일 {len(staged)}")
+        for camera_id in (0, 1):
+            segments = list(Path(self.node.webmain.config_manager.get_storage_path(str(camera_id))).glob("*/*.mp4"))
+            self.check(f"카메라 {camera_id} 녹화 파일", segments and all(path.stat().st_size > 0 for path in segments),
+                       f"{len(segments)}개")
+
+        total = time.monotonic() - started
+        self.check("전체 소요 시간", total <= self.args.max_total, f"{total:.1f}초 (상한 {self.args.max_total:.0f}초)")
+        return all(result["ok"] for result in self.results)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="합성 카메라 백엔드 통합 점검 (하드웨어 불필요)")
+    parser.add_argument("--workdir", default=None, help="작업 디렉토리 (기본: 임시 디렉토리, 종료 시 삭제)")
+    parser.add_argument("--keep", action="store_true", help="작업 디렉토리 유지 (녹화 파일 / 로그 확인용)")
+    parser.add_argument("--verbose", action="store_true", help="앱 로그 출력")
+    parser.add_argument("--json", action="store_true", help="결과를 JSON으로 출력")
+    parser.add_argument("--stream-seconds", type=float, default=3.0, help="스트림 측정 구간 (초)")
+    parser.add_argument("--min-fps", type=float, default=10.0, help="시청자별 최소 FPS")
+    parser.add_argument("--max-first-frame", type=float, default=2.0, help="첫 프레임 지연 상한 (초)")
+    parser.add_argument("--max-warmup", type=float, default=10.0, help="카메라 기동 상한 (초)")
+    parser.add_argument("--max-command", type=float, default=3.0, help="전환 / 듀얼 모드 명령 지연 상한 (초)")
+    parser.add_argument("--max-reconfigure", type=float, default=5.0, help="해상도 변경(센서 재구성) 지연 상한 (초)")
+    parser.add_argument("--cleanup-timeout", type=float, default=5.0, help="접속 / 스레드 정리 대기 상한 (초)")
+    parser.add_argument("--fd-slack", type=int, default=4, help="허용 FD 증가 수")
+    parser.add_argument("--max-total", type=float, default=60.0, help="전체 소요 시간 상한 (초)")
+    return parser.parse_args(argv)
+
+
+def main():
+    args = parse_args()
+    workdir = Path(args.workdir or tempfile.mkdtemp(prefix="livecam-check-"))
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING,
+                        format='%(asctime)s - %(levelname)s - %(message)s')
+    node = SyntheticNode(workdir)
+    print(f"[CHECK] 작업 디렉토리: {workdir}", flush=True)
+    passed = False
+    check = None
+    try:
+        node.start()
+        if not args.verbose:
+            logging.getLogger().setLevel(logging.WARNING)
+        print(f"[CHECK] 서버: {node.base_url}", flush=True)
+        check = IntegrationCheck(node, args)
+        passed = check.run()
+    except Exception as e:
+        print(f"[CHECK] 점검 중단: {e!r}", flush=True)
+    finally:
+        node.stop()
+        os.chdir(REPO_DIR)
+        if not args.keep and args.workdir is None:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    results = check.results if check is not None else []
+    failed = [result for result in results if not result["ok"]]
+    if args.json:
+        print(json.dumps({"passed": passed, "results": results}, ensure_ascii=False, indent=2))
+    print(f"[CHECK] {'통과' if passed else '실패'}: {len(results) - len(failed)}/{len(results)} 항목", flush=True)
+    sys.exit(0 if passed else 1)
+
+
+if __name__ == "__main__":
+    main()
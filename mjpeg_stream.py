@@ -0,0 +1,192 @@
+"""
+SHT 듀얼 LIVE 카메라 - MJPEG 프레임 브로드캐스트
+Encode-once MJPEG fan-out: one contiguous multipart part per frame, shared by every viewer of a camera,
+capture-timestamped and delivered newest-first (slow viewers skip straight to the latest frame)
+"""
+
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# multipart 파트 헤더의 고정 부분 (경계 + Content-Type + Content-Length 이름)
+PART_PREFIX = b"--frame\r\nContent-Type: image/jpeg\r\nContent-Length: "
+# 마지막 시청자가 나간 뒤 캡처/인코딩을 멈추기까지 대기 (새로고침 / 재접속 시 재시작 방지, 초)
+IDLE_STOP_SECONDS = 2.0
+# 프레임 생성 오류 후 재시도 간격 (초)
+ERROR_BACKOFF_SECONDS = 0.1
+
+
+def multipart_part(jpeg) -> bytes:
+    """JPEG 1장 → multipart 파트 1개 (경계 + 헤더 + 본문 + CRLF를 연속 버퍼 하나로, 본문 복사 1회)
+
+    jpeg: bytes 또는 버퍼 프로토콜 객체 (cv2.imencode 결과 배열을 tobytes() 없이 그대로)
+    """
+    view = memoryview(jpeg)
+    return b"".join((PART_PREFIX, b"%d\r\n\r\n" % view.nbytes, view, b"\r\n"))
+
+
+class StreamEnded(Exception):
+    """카메라 중지 - 브로드캐스트 종료 (produce 함수에서 발생)"""
+
+
+@dataclass(frozen=True)
+class StreamFrame:
+    """발행된 프레임 1장 (모든 시청자가 같은 part 객체를 전송)"""
+    seq: int
+    part: bytes          # multipart 파트 전체 (ASGI send 1회)
+    size: int            # JPEG 본문 크기
+    captured: float      # 센서 캡처 시각 (monotonic 초, SensorTimestamp)
+    published: float     # 발행 시각 (monotonic)
+
+
+class FrameSubscription:
+    """시청자 1명의 구독 - 항상 가장 최근 프레임만 받음 (늦으면 밀린 프레임은 건너뜀)"""
+
+    def __init__(self, broadcaster: "FrameBroadcaster", generation: int):
+        self.broadcaster = broadcaster
+        self.generation = generation
+        self.last_seq = 0
+        self.skipped = 0        # 전송이 밀려 건너뛴 프레임 수 (발행 번호 간격)
+        self.ended = False      # 카메라 중지로 브로드캐스트 종료
+        self.closed = False
+
+    def next(self, timeout: float = 1.0) -> Optional[StreamFrame]:
+        """새 프레임 대기 - 시간 초과 또는 종료 시 None (종료 여부는 ended)"""
+        return self.broadcaster._wait(self, timeout)
+
+    def close(self):
+        self.broadcaster._unsubscribe(self)
+
+
+class FrameBroadcaster:
+    """카메라 1대의 MJPEG 프레임 브로드캐스트
+
+    시청자 수와 무관하게 캡처 → 렌디션 축소 → JPEG 인코딩을 카메라당 한 번만 하고,
+    multipart 파트를 연속 버퍼 하나로 조립해 모든 시청자에게 같은 객체로 전달한다
+    (시청자별 인코딩 / tobytes() 복사 / 조각 전송 없음 - 프레임당 ASGI send 1회).
+    첫 시청자가 구독하면 생산 스레드를 시작하고, 시청자가 모두 나가면 IDLE_STOP_SECONDS 후 멈춘다.
+
+    produce(): (JPEG 버퍼, 센서 캡처 시각) 반환 (프레임 건너뜀이면 None, 카메라 중지 시 StreamEnded)
+    """
+
+    def __init__(self, camera_id: int, produce: Callable[[], Optional[Tuple[Any, float]]]):
+        self.camera_id = camera_id
+        self.produce = produce
+
+        self._cond = threading.Condition()
+        self._frame: Optional[StreamFrame] = None
+        self._seq = 0
+        self._subscribers = 0
+        self._idle_since: Optional[float] = None
+        # 생산 스레드 세대 - 종료된 세대의 구독자만 끝내고, 이후 구독은 새 스레드로
+        self._generation = 0
+        self._ended_generation = 0
+        self._thread: Optional[threading.Thread] = None
+
+        self.frames_published = 0
+        self.frames_skipped = 0
+        self.bytes_published = 0
+        # 최근 프레임의 캡처 → 발행 지연 (캡처 대기 제외, 축소 + 인코딩 + 조립, 초)
+        self.publish_latency = 0.0
+
+    def subscribe(self) -> FrameSubscription:
+        """시청자 구독 (생산 스레드가 없으면 시작)"""
+        with self._cond:
+            self._subscribers += 1
+            self._idle_since = None
+            if self._thread is None:
+                self._generation += 1
+                self._frame = None
+                self._thread = threading.Thread(target=self._run, args=(self._generation,),
+                                                name=f"mjpeg-cam{self.camera_id}", daemon=True)
+                self._thread.start()
+            return FrameSubscription(self, self._generation)
+
+    def _unsubscribe(self, subscription: FrameSubscription):
+        with self._cond:
+            if subscription.closed:
+                return
+            subscription.closed = True
+            self._subscribers -= 1
+            if self._subscribers == 0:
+                self._idle_since = time.monotonic()
+
+    def _wait(self, subscription: FrameSubscription, timeout: float) -> Optional[StreamFrame]:
+        with self._cond:
+            def ready():
+                return (self._ended_generation >= subscription.generation
+                        or (self._frame is not None and self._frame.seq > subscription.last_seq))
+
+            self._cond.wait_for(ready, timeout)
+            if self._ended_generation >= subscription.generation:
+                subscription.ended = True
+                return None
+            frame = self._frame
+            if frame is None or frame.seq <= subscription.last_seq:
+                return None
+            if subscription.last_seq:
+                subscription.skipped += frame.seq - subscription.last_seq - 1
+            subscription.last_seq = frame.seq
+            return frame
+
+    def _idle(self) -> bool:
+        """시청자 없이 IDLE_STOP_SECONDS 경과 (잠금 안에서 호출)"""
+        return (self._subscribers == 0 and self._idle_since is not None
+                and time.monotonic() - self._idle_since >= IDLE_STOP_SECONDS)
+
+    def _run(self, generation: int):
+        logger.info(f"[STREAM] 카메라 {self.camera_id} 프레임 브로드캐스트 시작")
+        reason = "시청자 없음"
+        try:
+            while True:
+                with self._cond:
+                    if self._idle():
+                        # 같은 잠금 안에서 해제해야 이후 구독이 새 스레드를 시작함
+                        self._thread = None
+                        break
+                try:
+                    produced = self.produce()
+                except StreamEnded:
+                    reason = "카메라 중지"
+                    break
+                except Exception as e:
+                    logger.error(f"[STREAM] 카메라 {self.camera_id} 프레임 생성 오류: {e}")
+                    time.sleep(ERROR_BACKOFF_SECONDS)
+                    continue
+                if produced is None:
+                    self.frames_skipped += 1
+                    continue
+                self._publish(*produced)
+        finally:
+            with self._cond:
+                self._ended_generation = max(self._ended_generation, generation)
+                if self._thread is threading.current_thread():
+                    self._thread = None
+                self._cond.notify_all()
+            logger.info(f"[STREAM] 카메라 {self.camera_id} 프레임 브로드캐스트 종료 ({reason})")
+
+    def _publish(self, jpeg, captured: float):
+        size = memoryview(jpeg).nbytes
+        part = multipart_part(jpeg)
+        with self._cond:
+            self._seq += 1
+            self._frame = StreamFrame(self._seq, part, size, captured, time.monotonic())
+            self.frames_published += 1
+            self.bytes_published += len(part)
+            self.publish_latency = self._frame.published - captured
+            self._cond.notify_all()
+
+    def get_status(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "running": self._thread is not None,
+                "subscribers": self._subscribers,
+                "frames_published": self.frames_published,
+                "frames_skipped": self.frames_skipped,
+                "bytes_published": self.bytes_published,
+                "publish_latency_ms": round(self.publish_latency * 1000, 1)
+            }
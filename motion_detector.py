@@ -0,0 +1,281 @@
+"""
+SHT 듀얼 LIVE 카메라 - 모션 감지 엔진
+Motion detection on a downscaled luma (Y) plane with a vectorized NumPy background model
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Any, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# 최근 이벤트 보관 수 (카메라별)
+MAX_RECENT_EVENTS = 100
+
+
+@dataclass
+class MotionEvent:
+    """모션 시작/종료 이벤트"""
+    camera_id: int
+    kind: str                       # "start" / "stop"
+    timestamp: float                # 벽시계 시각 (time.time())
+    zones: List[str] = field(default_factory=list)
+    energy: float = 0.0             # 시작: 감지 시점 에너지 / 종료: 구간 최대 에너지
+    duration: Optional[float] = None  # 종료 이벤트에서만 (초)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "camera_id": self.camera_id,
+            "kind": self.kind,
+            "timestamp": self.timestamp,
+            "zones": self.zones,
+            "energy": round(self.energy, 4),
+            "duration": round(self.duration, 2) if self.duration is not None else None
+        }
+
+
+class MotionZone:
+    """감지 영역 (정규화 좌표 rect = [x, y, w, h], threshold = 변화 픽셀 비율)"""
+
+    def __init__(self, name: str, rect: List[float], threshold: float):
+        self.name = name
+        self.rect = rect
+        self.threshold = threshold
+        self.slices = None
+
+    def bind(self, height: int, width: int):
+        """분석 해상도에 맞춰 픽셀 영역 계산"""
+        x, y, w, h = self.rect
+        x0, y0 = int(x * width), int(y * height)
+        x1, y1 = max(x0 + 1, int((x + w) * width)), max(y0 + 1, int((y + h) * height))
+        self.slices = (slice(y0, y1), slice(x0, x1))
+
+
+class MotionDetector:
+    """카메라 1대의 모션 감지기 - 캡처 스레드와 분리된 전용 스레드에서 설정된 속도로 실행
+
+    capture_luma: Y 평면(2차원 uint8 배열)을 반환하는 함수 (카메라 사용 불가 시 None)
+
+    처리 과정 (모두 NumPy 벡터 연산):
+    1. Y 평면을 블록 평균으로 analysis_width 폭까지 축소 (예: 640x480 → 160x120)
+    2. 배경 모델(지수 이동 평균)과의 차이가 pixel_threshold 초과인 픽셀 마스크 생성
+    3. 영역별 변화 픽셀 비율이 영역 threshold 초과 시 해당 영역 활성
+    4. min_active_frames 연속 활성 → start 이벤트, hold_seconds 동안 비활성 → stop 이벤트
+    """
+
+    def __init__(self, camera_id: int, capture_luma: Callable[[], Optional[np.ndarray]],
+                 config: Dict[str, Any]):
+        self.camera_id = camera_id
+        self.capture_luma = capture_luma
+
+        # 배경 모델 (분석 해상도, float32)
+        self._background: Optional[np.ndarray] = None
+        self._factor = 1
+        self.update_config(config)
+
+        # 이벤트 상태
+        self.active = False
+        self._active_frames = 0
+        self._last_motion = 0.0
+        self._event_start = 0.0
+        self._event_zones: set = set()
+        self._peak_energy = 0.0
+        self.energy = 0.0
+        self.zone_bits = 0
+        self.recent_events: deque = deque(maxlen=MAX_RECENT_EVENTS)
+
+        # 구독자 (이벤트 / 샘플)
+        self._event_listeners: List[Callable[[MotionEvent], None]] = []
+        self._sample_listeners: List[Callable[[int, float, float, int], None]] = []
+
+        # CPU 비용 측정
+        self.samples = 0
+        self._analysis_time = 0.0
+        self._cpu_window_start = (time.monotonic(), time.thread_time())
+        self.cpu_percent = 0.0
+
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def update_config(self, config: Dict[str, Any]):
+        """감지 파라미터 적용 (설정 변경 시 재시작 없이 호출 가능)"""
+        self.fps = max(0.5, float(config.get('fps', 5)))
+        analysis_width = int(config.get('analysis_width', 160))
+        if analysis_width != getattr(self, 'analysis_width', analysis_width):
+            self._background = None  # 분석 해상도 변경 → 다음 프레임에서 배경 모델 재초기화
+        self.analysis_width = analysis_width
+        self.pixel_threshold = float(config.get('pixel_threshold', 25))
+        self.alpha = float(config.get('background_alpha', 0.05))
+        self.min_active_frames = int(config.get('min_active_frames', 2))
+        self.hold_seconds = float(config.get('hold_seconds', 3.0))
+        zones = []
+        for index, z in enumerate(config.get('zones') or ()):
+            try:
+                x, y, w, h = (float(v) for v in z.get("rect", [0.0, 0.0, 1.0, 1.0]))
+                zones.append(MotionZone(str(z["name"]), [x, y, w, h], float(z.get("threshold", 0.01))))
+            except (AttributeError, KeyError, TypeError, ValueError) as e:
+                # 검증을 거치지 않은 설정 - 잘못된 영역만 건너뜀 (감지 자체는 계속)
+                logger.warning(f"[MOTION] 카메라 {self.camera_id} 영역 {index} 무시 (잘못된 설정: {e!r})")
+        if not zones:
+            zones = [MotionZone("full", [0.0, 0.0, 1.0, 1.0], 0.01)]
+        background = self._background
+        if background is not None:
+            for zone in zones:
+                zone.bind(*background.shape)
+        # 목록 통째로 교체 (감지 스레드는 항상 완전한 목록을 봄)
+        self.zones = zones
+
+    def add_listener(self, callback: Callable[[MotionEvent], None]):
+        """모션 시작/종료 이벤트 구독"""
+        self._event_listeners.append(callback)
+
+    def add_sample_listener(self, callback: Callable[[int, float, float, int], None]):
+        """분석 샘플 구독 - callback(camera_id, timestamp, energy, zone_bits)"""
+        self._sample_listeners.append(callback)
+
+    def start(self):
+        """감지 스레드 시작"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name=f"motion-cam{self.camera_id}", daemon=True)
+        self._thread.start()
+        logger.info(f"[MOTION] 카메라 {self.camera_id} 모션 감지 시작 ({self.fps}fps, 폭 {self.analysis_width}px)")
+
+    def stop(self):
+        """감지 스레드 중지 (진행 중인 모션은 종료 이벤트 발생)"""
+        self._stop_event.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=2)
+        self._thread = None
+        if self.active:
+            self._finish_event(time.time())
+        logger.info(f"[MOTION] 카메라 {self.camera_id} 모션 감지 중지")
+
+    def _run(self):
+        next_time = time.monotonic()
+        while not self._stop_event.is_set():
+            try:
+                luma = self.capture_luma()
+                if luma is not None:
+                    self.analyze(luma, time.time())
+            except Exception as e:
+                logger.error(f"[MOTION] 카메라 {self.camera_id} 분석 오류: {e}")
+            # 매 주기마다 읽음 - update_config()로 바뀐 fps가 다음 샘플부터 적용
+            next_time += 1.0 / self.fps
+            delay = next_time - time.monotonic()
+            if delay < 0:
+                # 분석이 밀리면 따라잡지 않고 현재 시점부터 다시 시작
+                next_time = time.monotonic()
+                delay = 0
+            self._stop_event.wait(delay)
+
+    def _downscale(self, luma: np.ndarray) -> np.ndarray:
+        """블록 평균 축소 (정수 배율)"""
+        height, width = luma.shape[:2]
+        factor = max(1, width // self.analysis_width)
+        out_h, out_w = height // factor, width // factor
+        if factor == 1:
+            return luma[:out_h, :out_w].astype(np.float32)
+        blocks = luma[:out_h * factor, :out_w * factor].reshape(out_h, factor, out_w, factor)
+        return blocks.mean(axis=(1, 3), dtype=np.float32)
+
+    def analyze(self, luma: np.ndarray, timestamp: float):
+        """Y 평면 1장 분석 (감지 스레드에서 호출)"""
+        started = time.perf_counter()
+        frame = self._downscale(luma)
+
+        if self._background is None or self._background.shape != frame.shape:
+            # 최초 프레임 또는 해상도 변경 → 배경 모델 재초기화
+            self._background = frame
+            for zone in self.zones:
+                zone.bind(*frame.shape)
+            return
+
+        changed = np.abs(frame - self._background) > self.pixel_threshold
+        self._background *= (1.0 - self.alpha)
+        self._background += self.alpha * frame
+
+        energy = float(changed.mean())
+        zone_bits = 0
+        active_zones = []
+        for index, zone in enumerate(self.zones):
+            if changed[zone.slices].mean() > zone.threshold:
+                zone_bits |= 1 << index
+                active_zones.append(zone.name)
+
+        self.energy = energy
+        self.zone_bits = zone_bits
+        self.samples += 1
+        self._analysis_time += time.perf_counter() - started
+        self._update_cpu()
+
+        self._update_state(timestamp, energy, active_zones)
+
+        for callback in self._sample_listeners:
+            try:
+                callback(self.camera_id, timestamp, energy, zone_bits)
+            except Exception as e:
+                logger.error(f"[MOTION] 샘플 구독자 오류: {e}")
+
+    def _update_cpu(self):
+        """감지 스레드 CPU 사용률 (5초 구간)"""
+        wall_start, cpu_start = self._cpu_window_start
+        wall_now = time.monotonic()
+        if wall_now - wall_start >= 5.0:
+            cpu_now = time.thread_time()
+            self.cpu_percent = round((cpu_now - cpu_start) / (wall_now - wall_start) * 100, 2)
+            self._cpu_window_start = (wall_now, cpu_now)
+
+    def _update_state(self, timestamp: float, energy: float, active_zones: List[str]):
+        """모션 시작/종료 판정"""
+        if active_zones:
+            self._active_frames += 1
+            self._last_motion = timestamp
+            if self.active:
+                self._event_zones.update(active_zones)
+                self._peak_energy = max(self._peak_energy, energy)
+            elif self._active_frames >= self.min_active_frames:
+                self.active = True
+                self._event_start = timestamp
+                self._event_zones = set(active_zones)
+                self._peak_energy = energy
+                self._emit(MotionEvent(self.camera_id, "start", timestamp, list(active_zones), energy))
+        else:
+            self._active_frames = 0
+            if self.active and timestamp - self._last_motion >= self.hold_seconds:
+                self._finish_event(timestamp)
+
+    def _finish_event(self, timestamp: float):
+        self.active = False
+        self._emit(MotionEvent(self.camera_id, "stop", timestamp, sorted(self._event_zones),
+                               self._peak_energy, duration=timestamp - self._event_start))
+
+    def _emit(self, event: MotionEvent):
+        self.recent_events.append(event)
+        logger.info(f"[MOTION] 카메라 {self.camera_id} 모션 {event.kind} "
+                    f"(영역: {', '.join(event.zones) or '-'}, 에너지 {event.energy:.3f})")
+        for callback in self._event_listeners:
+            try:
+                callback(event)
+            except Exception as e:
+                logger.error(f"[MOTION] 이벤트 구독자 오류: {e}")
+
+    def get_status(self) -> Dict[str, Any]:
+        """상태 + CPU 비용 조회"""
+        return {
+            "running": self._thread is not None and self._thread.is_alive(),
+            "active": self.active,
+            "energy": round(self.energy, 4),
+            "zones": [zone.name for index, zone in enumerate(self.zones) if self.zone_bits & (1 << index)],
+            "fps": self.fps,
+            "samples": self.samples,
+            "avg_analysis_ms": round(self._analysis_time / self.samples * 1000, 3) if self.samples else 0.0,
+            "cpu_percent": self.cpu_percent,
+            "recent_events": [event.to_dict() for event in list(self.recent_events)[-10:]]
+        }
@@ -0,0 +1,88 @@
+"""
+SHT 듀얼 LIVE 카메라 - 노드 상태 요약 + 허브 하트비트
+Compact node status digest (ETag) and push heartbeat to the hub
+"""
+
+import hashlib
+import json
+import logging
+import threading
+import urllib.request
+from typing import Callable, Dict, Any, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+# 수시로 바뀌는 계측값 블록 - ETag 계산에서 제외 (304 응답 헤더 / 매 하트비트로 따로 전달)
+METRICS_KEY = "metrics"
+METRICS_HEADER = "X-Node-Metrics"
+
+
+def status_digest(status: Dict[str, Any]) -> str:
+    """상태 요약의 ETag (계측값 블록을 제외한 내용이 같으면 같은 값)"""
+    stable = {key: value for key, value in status.items() if key != METRICS_KEY}
+    encoded = json.dumps(stable, sort_keys=True, separators=(",", ":")).encode()
+    return '"' + hashlib.sha1(encoded).hexdigest()[:16] + '"'
+
+
+class HeartbeatSender:
+    """허브로 주기적 하트비트 전송 (백그라운드 스레드)
+
+    상태가 바뀌지 않으면 노드 이름 + ETag + 계측값만 보내고, 바뀌었거나 허브가 요청하면
+    (허브 재시작 등으로 해당 ETag를 모를 때) 전체 상태 요약을 함께 보낸다.
+    """
+
+    def __init__(self, node_name: str, hub_url: str, interval: float, port: int,
+                 get_status: Callable[[], Tuple[Dict[str, Any], str]]):
+        self.node_name = node_name
+        self.url = hub_url.rstrip("/") + "/api/hub/heartbeat"
+        self.interval = max(1.0, float(interval))
+        self.port = port
+        self.get_status = get_status
+
+        self._sent_etag: Optional[str] = None
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.sent = 0
+        self.failures = 0
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="heartbeat", daemon=True)
+        self._thread.start()
+        logger.info(f"[HEARTBEAT] 허브 하트비트 시작: {self.url} ({self.interval:.0f}초 간격)")
+
+    def stop(self):
+        self._stop_event.set()
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            try:
+                self.send()
+            except Exception as e:
+                self.failures += 1
+                self._sent_etag = None  # 복구 후 전체 상태 재전송
+                if self.failures == 1 or self.failures % 60 == 0:
+                    logger.warning(f"[HEARTBEAT] 허브 전송 실패 ({self.failures}회): {e}")
+            self._stop_event.wait(self.interval)
+
+    def send(self):
+        """하트비트 1회 전송"""
+        status, etag = self.get_status()
+        body = {"node": self.node_name, "port": self.port, "interval": self.interval, "etag": etag,
+                METRICS_KEY: status.get(METRICS_KEY)}
+        if etag != self._sent_etag:
+            body["status"] = status
+        request = urllib.request.Request(
+            self.url, data=json.dumps(body).encode(), method="POST",
+            headers={"Content-Type": "application/json"}
+        )
+        with urllib.request.urlopen(request, timeout=self.interval) as response:
+            reply = json.loads(response.read() or b"{}")
+        self._sent_etag = None if reply.get("need_status") else etag
+        if self.failures:
+            logger.info("[HEARTBEAT] 허브 연결 복구")
+        self.failures = 0
+        self.sent += 1
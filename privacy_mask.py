@@ -0,0 +1,129 @@
+"""
+SHT 듀얼 LIVE 카메라 - 프라이버시 마스크
+Per-camera polygon privacy masks, rasterized once per frame size and applied in place with vectorized NumPy
+"""
+
+import logging
+import threading
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# 가림 색상 (RGB 검정 / YUV 검정: Y=16, U=V=128)
+RGB_FILL = 0
+Y_FILL = 16
+CHROMA_FILL = 128
+
+
+def normalize_polygons(polygons: Optional[Sequence]) -> Tuple[Tuple[Tuple[float, float], ...], ...]:
+    """설정값 → 다각형 튜플 ((x, y) 0~1 비율 좌표, 꼭짓점 3개 이상)"""
+    result = []
+    for polygon in polygons or ():
+        points = tuple((float(x), float(y)) for x, y in polygon)
+        if len(points) >= 3:
+            result.append(points)
+    return tuple(result)
+
+
+class _Raster:
+    """한 해상도의 래스터화된 마스크 - 다각형을 감싸는 영역만 보관 (그 밖의 화소는 건드리지 않음)"""
+    __slots__ = ("rows", "cols", "mask")
+
+    def __init__(self, rows: slice, cols: slice, mask: np.ndarray):
+        self.rows = rows
+        self.cols = cols
+        self.mask = mask
+
+
+class PrivacyMask:
+    """카메라 1대의 프라이버시 마스크
+
+    - 다각형은 화면(좌우 반전 적용 후) 기준 0~1 비율 좌표 → 해상도와 무관하게 한 벌로 정의
+    - 프레임 크기별로 처음 쓸 때 한 번만 래스터화(cv2.fillPoly)해 캐시, 다각형이 바뀌면 캐시 폐기
+      (해상도 변경은 새 크기 키로 자연히 재생성)
+    - 적용은 다각형 외접 사각형 영역에만 np.copyto(where=mask) 1회 (평면별) - 파이썬 루프 / 임시 배열 없음
+    - Picamera2 pre_callback에서 호출되어 녹화(main YUV420)와 스트림/미리보기(lores RGB)에 모두 반영
+    """
+
+    def __init__(self, camera_id: int, polygons: Optional[Sequence] = None):
+        self.camera_id = camera_id
+        self._lock = threading.Lock()
+        self.polygons: Tuple = ()
+        self._rasters: Dict[Tuple[int, int], Optional[_Raster]] = {}
+        self.rebuilds = 0
+        self.set_polygons(polygons)
+
+    @property
+    def active(self) -> bool:
+        return bool(self.polygons)
+
+    def set_polygons(self, polygons: Optional[Sequence]) -> bool:
+        """다각형 교체 (바뀐 경우에만 캐시 폐기) - 변경 여부 반환"""
+        polygons = normalize_polygons(polygons)
+        with self._lock:
+            if polygons == self.polygons:
+                return False
+            self.polygons = polygons
+            # 새 딕셔너리로 교체 - 콜백 스레드는 이전/새 캐시 중 하나를 통째로 봄
+            self._rasters = {}
+        logger.info(f"[PRIVACY] 카메라 {self.camera_id} 마스크 {len(polygons)}개 적용")
+        return True
+
+    def _raster(self, width: int, height: int) -> Optional[_Raster]:
+        """(width, height) 마스크 - 캐시에 없으면 래스터화 (마스크가 화면 밖이면 None)"""
+        rasters = self._rasters
+        key = (width, height)
+        if key in rasters:
+            return rasters[key]
+        with self._lock:
+            rasters = self._rasters
+            if key not in rasters:
+                rasters[key] = self._rasterize(self.polygons, width, height)
+                self.rebuilds += 1
+            return rasters[key]
+
+    @staticmethod
+    def _rasterize(polygons: Tuple, width: int, height: int) -> Optional[_Raster]:
+        # cv2는 마스크가 설정된 경우에만 로드 (래스터화는 해상도별 1회)
+        import cv2
+
+        full = np.zeros((height, width), dtype=np.uint8)
+        scale = np.array([width, height], dtype=np.float64)
+        cv2.fillPoly(full, [np.round(np.array(polygon) * scale).astype(np.int32) for polygon in polygons], 1)
+        ys, xs = np.nonzero(full.any(axis=1))[0], np.nonzero(full.any(axis=0))[0]
+        if ys.size == 0:
+            return None
+        rows, cols = slice(ys[0], ys[-1] + 1), slice(xs[0], xs[-1] + 1)
+        return _Raster(rows, cols, full[rows, cols].astype(bool))
+
+    def apply_rgb(self, array: np.ndarray):
+        """RGB/BGR (H, W, 3) 프레임에 마스크 적용 (제자리)"""
+        raster = self._raster(array.shape[1], array.shape[0]) if self.polygons else None
+        if raster is None:
+            return
+        np.copyto(array[raster.rows, raster.cols], RGB_FILL, where=raster.mask[..., None])
+
+    def apply_yuv420(self, array: np.ndarray, width: int, height: int):
+        """YUV420 평면 프레임 (H*3/2, stride)에 마스크 적용 (제자리) - Y는 전체, U/V는 1/2 해상도 마스크"""
+        raster = self._raster(width, height) if self.polygons else None
+        if raster is None:
+            return
+        np.copyto(array[:height, :width][raster.rows, raster.cols], Y_FILL, where=raster.mask)
+
+        chroma = self._raster(width // 2, height // 2)
+        stride = array.shape[1]
+        planes = array[height:height + height // 2]
+        if chroma is None or not planes.flags.c_contiguous:
+            return
+        # U, V 평면: 각각 (H/2, stride/2) - 행 단위로 이어져 있으므로 reshape는 복사 없는 뷰
+        for plane in planes.reshape(2, height // 2, stride // 2):
+            np.copyto(plane[:, :width // 2][chroma.rows, chroma.cols], CHROMA_FILL, where=chroma.mask)
+
+    def get_status(self) -> Dict[str, Any]:
+        return {
+            "polygons": len(self.polygons),
+            "cached_sizes": [f"{w}x{h}" for (w, h), raster in list(self._rasters.items()) if raster is not None],
+            "rebuilds": self.rebuilds
+        }
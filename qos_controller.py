@@ -0,0 +1,262 @@
+"""
+SHT 듀얼 LIVE 카메라 - QoS 컨트롤러 (녹화 우선 부하 감소)
+Tiered live-view load shedding driven by encode load, capture latency, disk write latency, CPU and temperature
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Callable, Dict, Any, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# 신호 수준
+OK, WARN, CRITICAL = 0, 1, 2
+LEVEL_NAMES = {OK: "ok", WARN: "warn", CRITICAL: "critical"}
+# 결정 기록 보관 수
+MAX_DECISIONS = 100
+
+DEFAULT_TIERS = [
+    {"stream_fps": 15, "rendition": None, "max_connections": None},
+    {"stream_fps": 10, "rendition": "640x480", "max_connections": None},
+    {"stream_fps": 5, "rendition": "640x480", "max_connections": 1}
+]
+DEFAULT_THRESHOLDS = {
+    "encode_load": [0.5, 1.0],       # MJPEG 인코딩에 쓰인 CPU 코어 수 (초당 인코딩 시간)
+    "capture_ms": [100, 250],        # lores 프레임 1장 캡처 대기 시간
+    "disk_write_ms": [50, 200],      # 저장 장치 쓰기 1건 평균 처리 시간 (/proc/diskstats)
+    "cpu_load": [0.9, 1.5]           # 1분 load average / CPU 코어 수
+}
+
+
+class DiskLatencyProbe:
+    """저장 경로가 있는 블록 장치의 평균 쓰기 지연 (/proc/diskstats 누적값 차분)"""
+
+    def __init__(self, path: str):
+        self.device = None
+        try:
+            st_dev = os.stat(Path(path).resolve()).st_dev
+            self.device = (os.major(st_dev), os.minor(st_dev))
+        except OSError:
+            pass
+        self._last = None
+
+    def _read(self):
+        try:
+            with open("/proc/diskstats", "r") as f:
+                for line in f:
+                    fields = line.split()
+                    if (int(fields[0]), int(fields[1])) == self.device:
+                        return int(fields[7]), int(fields[10])  # 쓰기 완료 수, 쓰기 소요 ms
+        except (OSError, ValueError, IndexError):
+            pass
+        return None
+
+    def sample(self) -> Optional[float]:
+        """직전 호출 이후 쓰기 1건 평균 ms (쓰기가 없으면 0, 측정 불가면 None)"""
+        if self.device is None:
+            return None
+        current = self._read()
+        last, self._last = self._last, current
+        if current is None or last is None:
+            return None
+        writes = current[0] - last[0]
+        return (current[1] - last[1]) / writes if writes > 0 else 0.0
+
+
+class QoSController:
+    """라이브 뷰 부하를 단계적으로 낮춰 녹화를 보호하는 컨트롤러
+
+    interval초마다 신호(인코딩 부하, 캡처 지연, 디스크 쓰기 지연, CPU 부하, 온도 단계)를 평가:
+    - critical 신호가 있으면 step_interval초마다 한 단계씩 제한 강화
+    - warn 신호만 있으면 최소 1단계 유지 (복귀 보류)
+    - 모든 신호가 restore_seconds초 동안 정상이면 한 단계씩 복귀
+
+    단계(tier) 0 = 제한 없음, 1~N = config tiers (스트림 FPS / 렌디션 상한 / 최대 접속 수).
+    녹화 인코더/세그먼트는 제어 대상이 아니다 (항상 설정된 화질 그대로).
+    """
+
+    def __init__(self, config: Dict[str, Any], storage_path: str,
+                 thermal_level: Optional[Callable[[], int]] = None):
+        self.thermal_level = thermal_level
+        self.disk_probe = DiskLatencyProbe(storage_path)
+
+        self.tier = 0
+        self.signals: Dict[str, Any] = {}
+        self.decisions: deque = deque(maxlen=MAX_DECISIONS)
+        self.tier_seconds: List[float] = []
+        self.update_config(config)
+        self.shed_count = 0
+        self.restore_count = 0
+        self._listeners: List[Callable[[int, Dict[str, Any]], None]] = []
+
+        # 스트림 프레임 계측 누적 (평가 시 초기화)
+        self._frame_lock = threading.Lock()
+        self._frames = 0
+        self._capture_total = 0.0
+        self._encode_total = 0.0
+
+        now = time.monotonic()
+        self._last_eval = now
+        self._last_change = now
+        self._last_pressure = now
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def update_config(self, config: Dict[str, Any]):
+        """임계값 / 단계 정의 적용 (다음 평가부터, 단계 수가 줄면 현재 단계를 최대 단계로 제한)"""
+        self.interval = max(0.5, float(config.get('interval', 1.0)))
+        self.step_interval = float(config.get('step_interval', 3.0))
+        self.restore_seconds = float(config.get('restore_seconds', 15.0))
+        thresholds = dict(DEFAULT_THRESHOLDS)
+        for name, pair in (config.get('thresholds') or {}).items():
+            try:
+                warn, critical = (float(v) for v in pair)
+            except (TypeError, ValueError):
+                # 검증을 거치지 않은 설정 - 해당 신호만 기본 임계값 유지
+                logger.warning(f"[QOS] 임계값 {name} 무시 ([warn, critical] 아님: {pair!r})")
+                continue
+            thresholds[name] = [warn, critical]
+        tiers: List[Dict[str, Any]] = [{"stream_fps": None, "rendition": None, "max_connections": None}]
+        for tier in config.get('tiers', DEFAULT_TIERS):
+            if not isinstance(tier, dict):
+                logger.warning(f"[QOS] 단계 정의 무시 (객체 아님: {tier!r})")
+                continue
+            tiers.append(tier)
+        self.tier_seconds = (self.tier_seconds + [0.0] * len(tiers))[:len(tiers)]
+        self.thresholds = thresholds
+        self.tier = min(self.tier, len(tiers) - 1)
+        self.tiers = tiers
+
+    @property
+    def limits(self) -> Dict[str, Any]:
+        return self.tiers[self.tier]
+
+    def add_listener(self, callback: Callable[[int, Dict[str, Any]], None]):
+        """단계 변경 구독 - callback(tier, limits)"""
+        self._listeners.append(callback)
+
+    def record_frame(self, capture_seconds: float, encode_seconds: float):
+        """스트림 프레임 1장 계측 (캡처 대기 / 축소+JPEG 인코딩 시간)"""
+        with self._frame_lock:
+            self._frames += 1
+            self._capture_total += capture_seconds
+            self._encode_total += encode_seconds
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="qos", daemon=True)
+        self._thread.start()
+        logger.info(f"[QOS] QoS 컨트롤러 시작 (단계 {len(self.tiers) - 1}개)")
+
+    def stop(self):
+        self._stop_event.set()
+
+    def _run(self):
+        while not self._stop_event.wait(self.interval):
+            try:
+                self.evaluate()
+            except Exception as e:
+                logger.error(f"[QOS] 평가 오류: {e}")
+
+    def _collect(self, elapsed: float) -> Dict[str, Any]:
+        with self._frame_lock:
+            frames, capture_total, encode_total = self._frames, self._capture_total, self._encode_total
+            self._frames, self._capture_total, self._encode_total = 0, 0.0, 0.0
+        disk_write_ms = self.disk_probe.sample()
+        try:
+            cpu_load = os.getloadavg()[0] / (os.cpu_count() or 1)
+        except OSError:
+            cpu_load = None
+        return {
+            "encode_load": round(encode_total / elapsed, 3) if elapsed > 0 else 0.0,
+            "encode_ms": round(encode_total / frames * 1000, 1) if frames else None,
+            "capture_ms": round(capture_total / frames * 1000, 1) if frames else None,
+            "disk_write_ms": round(disk_write_ms, 1) if disk_write_ms is not None else None,
+            "cpu_load": round(cpu_load, 2) if cpu_load is not None else None,
+            "thermal": self.thermal_level() if self.thermal_level is not None else None,
+            "stream_fps": round(frames / elapsed, 1) if elapsed > 0 else 0.0
+        }
+
+    def _levels(self, signals: Dict[str, Any]) -> Dict[str, int]:
+        levels = {}
+        for name, (warn, critical) in self.thresholds.items():
+            value = signals.get(name)
+            if value is None:
+                continue
+            levels[name] = CRITICAL if value >= critical else WARN if value >= warn else OK
+        if signals.get("thermal") is not None:
+            levels["thermal"] = min(CRITICAL, signals["thermal"])  # ThermalMonitor 단계 (0/1/2)
+        return levels
+
+    def evaluate(self) -> int:
+        """신호 수집 → 단계 결정 (변경 시 구독자 통지), 현재 단계 반환"""
+        now = time.monotonic()
+        elapsed = now - self._last_eval
+        self.tier_seconds[self.tier] += elapsed
+        self._last_eval = now
+
+        signals = self._collect(elapsed)
+        levels = self._levels(signals)
+        self.signals = dict(signals, levels={k: LEVEL_NAMES[v] for k, v in levels.items()})
+        worst = max(levels.values(), default=OK)
+        if worst > OK:
+            self._last_pressure = now
+
+        target = self.tier
+        since_change = now - self._last_change
+        if worst == CRITICAL and self.tier < len(self.tiers) - 1 and since_change >= self.step_interval:
+            target = self.tier + 1
+        elif worst == WARN and self.tier == 0 and since_change >= self.step_interval:
+            target = 1
+        elif (worst == OK and self.tier > 0 and now - self._last_pressure >= self.restore_seconds
+              and since_change >= self.restore_seconds):
+            target = self.tier - 1
+
+        if target != self.tier:
+            self._change_tier(target, levels, signals)
+        return self.tier
+
+    def _change_tier(self, tier: int, levels: Dict[str, int], signals: Dict[str, Any]):
+        pressured = {name: signals[name] for name, level in levels.items() if level > OK}
+        reason = ", ".join(f"{name}={value}" for name, value in pressured.items()) or "pressure cleared"
+        decision = {
+            "timestamp": time.time(),
+            "from": self.tier,
+            "to": tier,
+            "reason": reason,
+            "limits": self.tiers[tier]
+        }
+        self.decisions.append(decision)
+        if tier > self.tier:
+            self.shed_count += 1
+        else:
+            self.restore_count += 1
+        self.tier = tier
+        self._last_change = time.monotonic()
+        log = logger.warning if tier > decision["from"] else logger.info
+        log(f"[QOS] 라이브 뷰 단계 {decision['from']} → {tier} ({reason}) 제한: {self.tiers[tier]}")
+        for callback in self._listeners:
+            try:
+                callback(tier, self.tiers[tier])
+            except Exception as e:
+                logger.error(f"[QOS] 단계 변경 처리 오류: {e}")
+
+    def get_status(self) -> Dict[str, Any]:
+        """현재 단계 / 신호 / 결정 기록 / 단계별 누적 시간 (메트릭)"""
+        return {
+            "tier": self.tier,
+            "limits": self.limits,
+            "signals": self.signals,
+            "thresholds": self.thresholds,
+            "tiers": self.tiers,
+            "tier_seconds": [round(seconds, 1) for seconds in self.tier_seconds],
+            "shed_decisions": self.shed_count,
+            "restore_decisions": self.restore_count,
+            "decisions": list(self.decisions)[-20:]
+        }
@@ -0,0 +1,138 @@
+"""
+SHT 듀얼 LIVE 카메라 - 모션 연동 녹화 정책
+Event-triggered recording quality: low bitrate/frame rate while idle, full quality on motion
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from typing import Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+# 최근 이벤트 구간 보관 수 (카메라별)
+MAX_RECENT_WINDOWS = 100
+
+
+class RecordingPolicy:
+    """카메라 1대의 녹화 화질 정책 (MotionDetector 이벤트 구독)
+
+    mode:
+    - "continuous": 항상 최고 화질 (기존 동작)
+    - "adaptive":   유휴 시 idle_bitrate / idle_framerate, 모션 시작 시 현재 세그먼트를 닫고
+                    다음 키프레임(새 인코더)부터 최고 화질, 모션 종료 후 post_roll_seconds 경과 시 유휴 화질 복귀
+
+    유휴 구간도 저화질로 끊김 없이 녹화되므로 사전 녹화(pre-roll)는 직전 세그먼트의 마지막
+    pre_roll_seconds 구간이 된다. 이벤트 구간은 pre-roll/post-roll을 포함해 기록된다.
+    """
+
+    def __init__(self, camera_id: int, recorder, config: Dict[str, Any]):
+        self.camera_id = camera_id
+        self.recorder = recorder
+        self.mode = config.get('mode', 'adaptive')
+
+        self.state = "idle"
+        self._lock = threading.Lock()
+        self._idle_timer: Optional[threading.Timer] = None
+        self._current_window: Optional[Dict[str, Any]] = None
+        self.windows: deque = deque(maxlen=MAX_RECENT_WINDOWS)
+
+        # 시작 시 유휴 화질 (다음 세그먼트부터)
+        self.update_config(config)
+        logger.info(f"[POLICY] 카메라 {camera_id} 녹화 정책: {self.mode}")
+
+    def update_config(self, config: Dict[str, Any]):
+        """유휴 화질 / 프리·포스트 롤 적용 (모드 변경은 재시작 필요)"""
+        self.idle_encoding = {
+            "bitrate": int(config.get('idle_bitrate', 1000000)),
+            "framerate": int(config.get('idle_framerate', 10))
+        }
+        self.pre_roll_seconds = float(config.get('pre_roll_seconds', 5))
+        self.post_roll_seconds = float(config.get('post_roll_seconds', 10))
+        with self._lock:
+            if self.mode == "adaptive" and self.state == "idle":
+                # 유휴 중이면 다음 세그먼트부터 새 유휴 화질
+                self.recorder.set_idle_encoding(self.idle_encoding)
+
+    def on_motion(self, event):
+        """MotionDetector 이벤트 처리"""
+        if self.mode != "adaptive":
+            return
+        with self._lock:
+            if event.kind == "start":
+                self._cancel_idle_timer()
+                if self.state == "idle":
+                    self.state = "event"
+                    self._current_window = {
+                        "start": event.timestamp - self.pre_roll_seconds,
+                        "motion_start": event.timestamp,
+                        "motion_stop": None,
+                        "stop": None,
+                        "zones": list(event.zones)
+                    }
+                    # 다음 키프레임부터 최고 화질 (현재 세그먼트 즉시 종료)
+                    self.recorder.set_idle_encoding(None, apply_now=True)
+                    logger.info(f"[POLICY] 카메라 {self.camera_id} 모션 감지 → 최고 화질 녹화")
+            elif event.kind == "stop" and self.state == "event":
+                if self._current_window is not None:
+                    self._current_window["motion_stop"] = event.timestamp
+                    self._current_window["zones"] = sorted(set(self._current_window["zones"]) | set(event.zones))
+                self._cancel_idle_timer()
+                self._idle_timer = threading.Timer(self.post_roll_seconds, self._return_to_idle)
+                self._idle_timer.daemon = True
+                self._idle_timer.start()
+
+    def _cancel_idle_timer(self):
+        if self._idle_timer is not None:
+            self._idle_timer.cancel()
+            self._idle_timer = None
+
+    def _return_to_idle(self):
+        """post-roll 경과 → 유휴 화질 복귀"""
+        with self._lock:
+            self._idle_timer = None
+            if self.state != "event":
+                return
+            self.state = "idle"
+            if self._current_window is not None:
+                self._current_window["stop"] = time.time()
+                self.windows.append(self._current_window)
+                self._current_window = None
+            self.recorder.set_idle_encoding(self.idle_encoding, apply_now=True)
+        logger.info(f"[POLICY] 카메라 {self.camera_id} 모션 종료 → 유휴 화질 녹화")
+
+    def stop(self):
+        """정책 중지 (진행 중인 이벤트 구간 마감)"""
+        with self._lock:
+            self._cancel_idle_timer()
+            if self._current_window is not None:
+                self._current_window["stop"] = time.time()
+                self.windows.append(self._current_window)
+                self._current_window = None
+            self.state = "idle"
+
+    def get_status(self) -> Dict[str, Any]:
+        """정책 상태 + 화질별 녹화량 (카메라-일 기준 예상 용량)"""
+        usage = {quality: dict(values) for quality, values in self.recorder.usage_by_quality.items()}
+        total_bytes = sum(values["bytes"] for values in usage.values())
+        total_seconds = sum(values["seconds"] for values in usage.values())
+        full = usage["full"]
+        full_rate = full["bytes"] / full["seconds"] if full["seconds"] > 0 else None
+
+        status = {
+            "mode": self.mode,
+            "state": self.state,
+            "recording_quality": self.recorder.current_quality,
+            "idle_encoding": self.idle_encoding,
+            "pre_roll_seconds": self.pre_roll_seconds,
+            "post_roll_seconds": self.post_roll_seconds,
+            "usage": usage,
+            "recent_windows": list(self.windows)[-10:]
+        }
+        if total_seconds > 0:
+            status["projected_gb_per_day"] = round(total_bytes / total_seconds * 86400 / 1024 ** 3, 2)
+            if full_rate:
+                # 같은 시간을 모두 최고 화질로 녹화했을 때 대비 절감 배율
+                status["savings_ratio"] = round(full_rate * total_seconds / total_bytes, 2)
+        return status
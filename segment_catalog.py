@@ -0,0 +1,302 @@
+"""
+SHT 듀얼 LIVE 카메라 - 녹화 세그먼트 카탈로그 + 모션 활동 인덱스
+Segment catalog with per-second motion activity summaries for fast search (no video decoding)
+"""
+
+import base64
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# 에너지 저장 단위: 변화 픽셀 비율 × 1000 (‰), 1바이트 (최대 255 = 25.5%에서 포화)
+ENERGY_SCALE = 1000
+# 초 단위 샘플 버퍼 보관 시간 (세그먼트 종료 전까지 필요한 범위)
+SAMPLE_RETENTION_SECONDS = 600
+# 보존 기간 지난 세그먼트 정리 주기 (메모리 인덱스, 세그먼트 추가 시 확인)
+PRUNE_INTERVAL = 3600
+
+
+def sprite_paths(segment_path) -> Dict[str, Path]:
+    """세그먼트 파일에 대응하는 미리보기 경로 (세그먼트와 같은 디렉토리)"""
+    segment_path = Path(segment_path)
+    return {
+        "sprite": segment_path.with_suffix(".sprite.jpg"),
+        "vtt": segment_path.with_suffix(".vtt")
+    }
+
+
+def _encode(data: bytes) -> str:
+    return base64.b64encode(data).decode('ascii')
+
+
+def _decode(text: str) -> bytes:
+    return base64.b64decode(text) if text else b""
+
+
+class SegmentCatalog:
+    """녹화 세그먼트 목록 (catalog.jsonl) + 세그먼트별 활동 요약
+
+    세그먼트 1건 = JSON 1줄:
+    {"camera_id", "path", "start", "end", "bytes", "quality",
+     "energy": base64(초당 최대 모션 에너지 ‰, uint8),
+     "zones":  base64(초당 영역 활성 비트셋, uint8 - 영역 8개까지),
+     "zone_names": [...]}
+
+    검색은 메모리에 올린 요약만 사용 (영상 디코딩 없음)
+    - 파일 로드는 기동 시 preload()로 백그라운드 스레드에서 (이벤트 루프 / 녹화 스레드에서 파싱하지 않음)
+    - retention_days 지정 시 보존 기간이 지난 세그먼트를 메모리 인덱스에서 정리 (로드 시 파일도 압축)
+    """
+
+    def __init__(self, path: str, retention_days: Optional[float] = None):
+        self.path = Path(path)
+        self.retention_days = retention_days
+        self._lock = threading.Lock()
+        # 파일 로드 직렬화 (파싱 중에는 _lock을 잡지 않음 - 모션 샘플 누적이 막히지 않도록)
+        self._load_lock = threading.Lock()
+        self._loaded = False
+        self._last_prune = time.monotonic()
+        self._segments: Dict[int, List[Dict[str, Any]]] = {}
+        # 카메라별 초 단위 활동 버퍼 {camera_id: {second: [energy_max, zone_bits]}}
+        self._samples: Dict[int, Dict[int, List[int]]] = {}
+
+    def preload(self) -> threading.Thread:
+        """카탈로그 파일 백그라운드 로드 시작 (기동 시 호출 - 첫 조회/세그먼트 추가 전에 끝나도록)"""
+        thread = threading.Thread(target=self._ensure_loaded, name="catalog-load", daemon=True)
+        thread.start()
+        return thread
+
+    def _cutoff(self) -> Optional[float]:
+        """보존 기간 기준 시각 (이보다 먼저 끝난 세그먼트는 정리, 보존 기간 미지정 시 None)"""
+        return time.time() - self.retention_days * 86400 if self.retention_days else None
+
+    def _ensure_loaded(self):
+        """카탈로그 파일 로드 (1회) - 로드 전에 호출되면 로드가 끝날 때까지 대기"""
+        if self._loaded:
+            return
+        with self._load_lock:
+            if self._loaded:
+                return
+            segments: Dict[int, List[Dict[str, Any]]] = {}
+            count = expired = 0
+            cutoff = self._cutoff()
+            if self.path.exists():
+                try:
+                    with open(self.path, 'r', encoding='utf-8') as f:
+                        for line in f:
+                            line = line.strip()
+                            if not line:
+                                continue
+                            try:
+                                entry = json.loads(line)
+                            except json.JSONDecodeError:
+                                continue
+                            if cutoff is not None and entry.get("end", 0) < cutoff:
+                                expired += 1
+                                continue
+                            self._index_entry(segments, entry)
+                            count += 1
+                except OSError as e:
+                    logger.error(f"[CATALOG] 카탈로그 로드 실패: {e}")
+                for entries in segments.values():
+                    entries.sort(key=lambda s: s["start"])
+                logger.info(f"[CATALOG] 세그먼트 {count}건 로드: {self.path}")
+            with self._lock:
+                self._segments = segments
+                if expired:
+                    self._rewrite()
+                    logger.info(f"[CATALOG] 보존 기간 지난 세그먼트 {expired}건 정리")
+            self._loaded = True
+
+    @staticmethod
+    def _index_entry(segments: Dict[int, List[Dict[str, Any]]], entry: Dict[str, Any]):
+        entry["_energy"] = _decode(entry.get("energy", ""))
+        entry["_zones"] = _decode(entry.get("zones", ""))
+        entry["_peak"] = max(entry["_energy"], default=0)
+        segments.setdefault(entry["camera_id"], []).append(entry)
+
+    def _add_entry(self, entry: Dict[str, Any]):
+        self._index_entry(self._segments, entry)
+
+    def _rewrite(self):
+        """남은 세그먼트로 카탈로그 파일 다시 쓰기 (임시 파일 → 교체, _lock 보유 상태에서 호출)"""
+        tmp_path = self.path.with_name(f".{self.path.name}.tmp")
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                for entries in self._segments.values():
+                    for entry in entries:
+                        f.write(json.dumps({k: v for k, v in entry.items() if not k.startswith("_")}) + "\n")
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.error(f"[CATALOG] 카탈로그 정리 기록 실패: {e}")
+            tmp_path.unlink(missing_ok=True)
+
+    def prune(self) -> int:
+        """보존 기간이 지난 세그먼트를 메모리 인덱스에서 제거 - 제거 건수 반환 (파일은 다음 로드 시 정리)"""
+        cutoff = self._cutoff()
+        if cutoff is None:
+            return 0
+        self._ensure_loaded()
+        removed = 0
+        with self._lock:
+            for camera_id, entries in self._segments.items():
+                keep = [entry for entry in entries if entry["end"] >= cutoff]
+                removed += len(entries) - len(keep)
+                self._segments[camera_id] = keep
+        if removed:
+            logger.info(f"[CATALOG] 보존 기간 지난 세그먼트 {removed}건 인덱스에서 제거")
+        return removed
+
+    def add_sample(self, camera_id: int, timestamp: float, energy: float, zone_bits: int):
+        """모션 분석 샘플 누적 (MotionDetector 샘플 구독자)"""
+        second = int(timestamp)
+        value = min(255, int(energy * ENERGY_SCALE + 0.5))
+        with self._lock:
+            buckets = self._samples.setdefault(camera_id, {})
+            bucket = buckets.get(second)
+            if bucket is None:
+                buckets[second] = [value, zone_bits & 0xFF]
+            else:
+                bucket[0] = max(bucket[0], value)
+                bucket[1] |= zone_bits & 0xFF
+
+    def add_segment(self, camera_id: int, path: str, start: float, end: float, size: int,
+                    quality: str = "full", zone_names: Optional[List[str]] = None):
+        """세그먼트 종료 시 활동 요약 생성 후 카탈로그에 추가 (GPURecorder 세그먼트 구독자)"""
+        first, last = int(start), int(end)
+        self._ensure_loaded()
+        if time.monotonic() - self._last_prune >= PRUNE_INTERVAL:
+            self._last_prune = time.monotonic()
+            self.prune()
+        with self._lock:
+            buckets = self._samples.get(camera_id, {})
+            energy = bytearray(max(0, last - first + 1))
+            zones = bytearray(len(energy))
+            for offset in range(len(energy)):
+                bucket = buckets.get(first + offset)
+                if bucket is not None:
+                    energy[offset], zones[offset] = bucket
+            # 오래된 샘플 정리
+            cutoff = time.time() - SAMPLE_RETENTION_SECONDS
+            for second in [s for s in buckets if s < cutoff]:
+                del buckets[second]
+
+            entry = {
+                "camera_id": camera_id,
+                "path": str(path),
+                "start": round(start, 3),
+                "end": round(end, 3),
+                "bytes": size,
+                "quality": quality,
+                "energy": _encode(bytes(energy)),
+                "zones": _encode(bytes(zones)),
+                "zone_names": zone_names or []
+            }
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                with open(self.path, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(entry) + "\n")
+            except OSError as e:
+                logger.error(f"[CATALOG] 카탈로그 기록 실패: {e}")
+            self._add_entry(entry)
+
+    def segments(self, camera_id: Optional[int] = None, start: Optional[float] = None,
+                 end: Optional[float] = None) -> List[Dict[str, Any]]:
+        """기간과 겹치는 세그먼트 목록 (요약 제외)"""
+        self._ensure_loaded()
+        with self._lock:
+            cameras = [camera_id] if camera_id is not None else sorted(self._segments)
+            result = []
+            for cam in cameras:
+                for segment in self._segments.get(cam, []):
+                    if start is not None and segment["end"] < start:
+                        continue
+                    if end is not None and segment["start"] > end:
+                        continue
+                    result.append({k: v for k, v in segment.items()
+                                   if not k.startswith("_") and k not in ("energy", "zones")})
+            return result
+
+    def find(self, camera_id: int, name: str) -> Optional[Dict[str, Any]]:
+        """파일 이름(확장자 제외)으로 세그먼트 조회"""
+        self._ensure_loaded()
+        with self._lock:
+            for segment in reversed(self._segments.get(camera_id, [])):
+                if Path(segment["path"]).stem == name:
+                    return {k: v for k, v in segment.items()
+                            if not k.startswith("_") and k not in ("energy", "zones")}
+        return None
+
+    def search(self, threshold: float = 0.02, start: Optional[float] = None, end: Optional[float] = None,
+               cameras: Optional[List[int]] = None, zone: Optional[str] = None,
+               merge_gap: int = 2, min_duration: int = 1) -> List[Dict[str, Any]]:
+        """모션 에너지가 threshold 이상인 시간 구간 검색 (카메라 통합)
+
+        threshold: 변화 픽셀 비율 (0~1), zone: 해당 영역이 활성인 초만 포함
+        merge_gap: 이 초 수 이하로 떨어진 구간은 하나로 합침
+        """
+        level = max(1, int(threshold * ENERGY_SCALE + 0.5))
+        ranges = []
+        self._ensure_loaded()
+        with self._lock:
+            for cam in (cameras if cameras is not None else sorted(self._segments)):
+                current = None
+                for segment in self._segments.get(cam, []):
+                    if start is not None and segment["end"] < start:
+                        continue
+                    if end is not None and segment["start"] > end:
+                        break
+                    if segment["_peak"] < level:
+                        continue  # 활동 없는 세그먼트는 요약 최대값만으로 건너뜀
+                    zone_mask = 0
+                    if zone is not None:
+                        if zone not in segment["zone_names"]:
+                            continue
+                        zone_mask = 1 << segment["zone_names"].index(zone)
+
+                    first = int(segment["start"])
+                    energy, zones = segment["_energy"], segment["_zones"]
+                    for offset, value in enumerate(energy):
+                        if value < level or (zone_mask and not zones[offset] & zone_mask):
+                            continue
+                        second = first + offset
+                        if (start is not None and second < start) or (end is not None and second > end):
+                            continue
+                        if current is not None and second - current["end"] <= merge_gap:
+                            current["end"] = second
+                            current["peak"] = max(current["peak"], value)
+                            if segment["path"] not in current["segments"]:
+                                current["segments"].append(segment["path"])
+                        else:
+                            if current is not None:
+                                ranges.append(current)
+                            current = {"camera_id": cam, "start": second, "end": second,
+                                       "peak": value, "segments": [segment["path"]]}
+                if current is not None:
+                    ranges.append(current)
+
+        result = []
+        for item in ranges:
+            item["end"] += 1  # 초 구간의 끝 (배타적)
+            if item["end"] - item["start"] < min_duration:
+                continue
+            item["peak"] = round(item["peak"] / ENERGY_SCALE, 3)
+            result.append(item)
+        result.sort(key=lambda r: r["start"])
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        """카탈로그 요약"""
+        self._ensure_loaded()
+        with self._lock:
+            return {
+                "path": str(self.path),
+                "cameras": {cam: {"segments": len(segments),
+                                  "bytes": sum(s["bytes"] for s in segments)}
+                            for cam, segments in self._segments.items()}
+            }
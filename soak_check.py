@@ -0,0 +1,363 @@
+#!/usr/bin/env python3
+"""
+SHT 듀얼 LIVE 카메라 - 장시간 메모리 누수 점검 (합성 카메라 백엔드)
+Accelerated soak run of streaming + recording with RSS / tracemalloc / fd / thread / child process growth checks
+
+사용: python3 soak_check.py --duration 2h --speed 4 [--report soak_report.json]
+- integration_check.SyntheticNode로 같은 프로세스 안에 서버를 띄우고, 합성 카메라 프레임레이트를 speed배로 가속
+- 동시 /stream 시청자(주기적 재접속) + 짧은 세그먼트 연속 녹화 + 카메라 전환/듀얼 모드/해상도 변경 반복
+- interval초마다 RSS, tracemalloc 추적 메모리, 열린 FD, 스레드, 자식 프로세스(남은 ffmpeg 등) 기록
+- warmup 이후 기준값 대비 증가량이 상한을 넘으면 실패 (종료 코드 1),
+  보고서에는 기준 시점 대비 가장 많이 늘어난 할당 위치(파일:줄 + 호출 경로) 포함
+"""
+
+import argparse
+import json
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from statistics import median
+from typing import Dict, Any, List
+
+import integration_check
+from integration_check import REPO_DIR, SyntheticNode, StreamReader, app_threads, open_fds
+from startup_profile import read_rss_kb
+
+# 반복 실행할 카메라 조작 묶음 (재구성 / 전환 경로의 누수 확인)
+# 묶음 단위로 연속 실행해 샘플 시점의 상태(듀얼 모드, 640x480)를 항상 같게 유지
+CHURN_COMMANDS = ["/switch/1", "/api/resolution/1280x720", "/switch/0", "/api/resolution/640x480",
+                  "/api/dual_mode/true"]
+# 할당 위치 집계에서 제외 (측정 도구 / 점검용 시청자 자체)
+IGNORED_TRACES = (tracemalloc.__file__, __file__, integration_check.__file__, "<frozen importlib._bootstrap>",
+                  "<frozen importlib._bootstrap_external>", "<unknown>")
+
+
+def parse_duration(value: str) -> float:
+    """"90" / "30s" / "15m" / "2h" → 초"""
+    units = {"s": 1, "m": 60, "h": 3600}
+    value = value.strip().lower()
+    if value and value[-1] in units:
+        return float(value[:-1]) * units[value[-1]]
+    return float(value)
+
+
+def child_processes() -> List[Dict[str, Any]]:
+    """현재 프로세스의 자식 프로세스 (/proc/*/stat의 부모 PID 기준)"""
+    children = []
+    own_pid = os.getpid()
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", "r") as f:
+                stat = f.read()
+        except OSError:
+            continue
+        # 형식: pid (comm) state ppid ... - comm에 공백/괄호가 있을 수 있으므로 마지막 ')' 기준
+        comm = stat[stat.find("(") + 1:stat.rfind(")")]
+        fields = stat[stat.rfind(")") + 2:].split()
+        if len(fields) > 1 and int(fields[1]) == own_pid:
+            children.append({"pid": int(entry), "name": comm})
+    return children
+
+
+class SoakRun:
+    """가속 장시간 실행 + 주기 샘플링 + 증가량 판정"""
+
+    def __init__(self, node: SyntheticNode, args):
+        self.node = node
+        self.args = args
+        self.samples: List[Dict[str, Any]] = []
+        self.readers: List[StreamReader] = []
+        self.reader_opened: Dict[StreamReader, float] = {}
+        self.frames_received = 0
+        self.reconnects = 0
+        self.commands_run = 0
+        self.command_failures = 0
+        self.baseline_snapshot = None
+        self.final_snapshot = None
+
+    def _open_reader(self, index: int):
+        path = "/stream" if index % 2 == 0 else f"/stream/{index % 2}"
+        reader = StreamReader(self.node.base_url + path, f"soak-{index}")
+        reader.start()
+        self.readers.append(reader)
+        self.reader_opened[reader] = time.monotonic()
+
+    def _rotate_readers(self):
+        """끊긴 / 재접속 주기가 지난 시청자를 새 접속으로 교체 (접속·해제 경로 반복)"""
+        for index, reader in enumerate(list(self.readers)):
+            expired = time.monotonic() - self.reader_opened[reader] >= self.args.reconnect
+            if reader.is_alive() and not expired:
+                continue
+            reader.close()
+            self.frames_received += reader.frames
+            self.readers.remove(reader)
+            del self.reader_opened[reader]
+            self.reconnects += 1
+            self._open_reader(index)
+
+    def _run_churn(self, client):
+        for path in CHURN_COMMANDS:
+            try:
+                response = client.post(path)
+                ok = response.status_code == 200
+            except Exception:
+                ok = False
+            self.commands_run += 1
+            if not ok:
+                self.command_failures += 1
+                logging.getLogger(__name__).warning(f"[SOAK] 카메라 조작 실패: {path}")
+
+    def _prune_recordings(self):
+        """오래된 녹화 / 미리보기 파일 삭제 (장시간 실행 시 임시 디스크 사용량 제한)"""
+        cutoff = time.time() - self.args.keep_minutes * 60
+        for path in Path(self.node.workdir, "videos").glob("cam*/*/*"):
+            try:
+                if path.stat().st_mtime < cutoff:
+                    path.unlink()
+            except OSError:
+                pass
+
+    def sample(self, started: float) -> Dict[str, Any]:
+        manager = self.node.camera_manager
+        traced = tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else None
+        sample = {
+            "elapsed": round(time.monotonic() - started, 1),
+            "rss_kb": read_rss_kb(),
+            "traced_kb": traced // 1024 if traced is not None else None,
+            "fds": open_fds(),
+            "threads": len(app_threads()),
+            "children": len(child_processes()),
+            "connections": manager.clients.count(),
+            "frames_received": self.frames_received + sum(reader.frames for reader in self.readers),
+            "segments": len(manager.catalog.segments())
+        }
+        self.samples.append(sample)
+        print(f"[SOAK] {sample['elapsed']:8.0f}s  RSS {sample['rss_kb'] / 1024:7.1f}MB  "
+              f"traced {(sample['traced_kb'] or 0) / 1024:6.1f}MB  fd {sample['fds']:4d}  "
+              f"threads {sample['threads']:3d}  children {sample['children']}  "
+              f"conn {sample['connections']}  frames {sample['frames_received']}", flush=True)
+        return sample
+
+    def run(self):
+        import httpx
+
+        manager = self.node.camera_manager
+        if not manager.ready_event.wait(30) or manager.startup_state != "ready":
+            raise RuntimeError(f"cameras not ready: {manager.startup_state}")
+        client = httpx.Client(base_url=self.node.base_url, timeout=httpx.Timeout(30.0))
+        for index in range(self.args.readers):
+            self._open_reader(index)
+
+        started = time.monotonic()
+        deadline = started + self.args.duration
+        next_sample = started
+        next_churn = started + self.args.churn
+        warmed = False
+        try:
+            while time.monotonic() < deadline:
+                now = time.monotonic()
+                if not warmed and now - started >= self.args.warmup:
+                    warmed = True
+                    if tracemalloc.is_tracing():
+                        self.baseline_snapshot = tracemalloc.take_snapshot()
+                    self.samples.append({"baseline": True})
+                if now >= next_sample:
+                    self.sample(started)
+                    self._prune_recordings()
+                    next_sample += self.args.interval
+                if self.args.churn and now >= next_churn:
+                    self._run_churn(client)
+                    next_churn += self.args.churn
+                self._rotate_readers()
+                time.sleep(0.2)
+            self.sample(started)
+            if tracemalloc.is_tracing():
+                self.final_snapshot = tracemalloc.take_snapshot()
+                tracemalloc.stop()  # 분석 중 할당까지 추적하지 않도록
+        finally:
+            for reader in self.readers:
+                reader.close()
+                self.frames_received += reader.frames
+            client.close()
+
+    def _measured(self) -> List[Dict[str, Any]]:
+        """warmup 이후 샘플"""
+        for index, sample in enumerate(self.samples):
+            if sample.get("baseline"):
+                return [s for s in self.samples[index + 1:] if not s.get("baseline")]
+        return []
+
+    def growth(self) -> Dict[str, Any]:
+        """지표별 증가량 (warmup 직후 샘플 3개 중앙값 → 마지막 샘플 3개 중앙값) + 시간당 기울기"""
+        samples = self._measured()
+        result = {}
+        if len(samples) < 2:
+            return result
+        hours = max(1e-6, (samples[-1]["elapsed"] - samples[0]["elapsed"]) / 3600)
+        for key in ("rss_kb", "traced_kb", "fds", "threads", "children"):
+            values = [s[key] for s in samples if s.get(key) is not None]
+            if len(values) < 2:
+                continue
+            window = max(1, min(3, len(values) // 3))
+            start, end = median(values[:window]), median(values[-window:])
+            result[key] = {"start": start, "end": end, "growth": end - start,
+                           "per_hour": round((end - start) / hours, 1)}
+        return result
+
+    def verdict(self, growth: Dict[str, Any]) -> List[str]:
+        """상한 초과 항목 목록 (비어 있으면 통과)"""
+        limits = {
+            "rss_kb": self.args.max_rss_growth_mb * 1024,
+            "traced_kb": self.args.max_traced_growth_mb * 1024,
+            "fds": self.args.max_fd_growth,
+            "threads": self.args.max_thread_growth,
+            "children": self.args.max_child_growth
+        }
+        failures = []
+        if not growth:
+            failures.append("warmup 이후 샘플 부족 (--duration / --interval 확인)")
+        for key, limit in limits.items():
+            if key in growth and growth[key]["growth"] > limit:
+                failures.append(f"{key} 증가 {growth[key]['growth']} > 상한 {limit}")
+        if self.command_failures:
+            failures.append(f"카메라 조작 실패 {self.command_failures}/{self.commands_run}회")
+        return failures
+
+    def allocation_sites(self) -> Dict[str, Any]:
+        """기준 시점 대비 증가한 할당 위치 (줄 단위 상위 N + 상위 호출 경로)"""
+        if self.baseline_snapshot is None or self.final_snapshot is None:
+            return {}
+        filters = [tracemalloc.Filter(False, pattern) for pattern in IGNORED_TRACES]
+        baseline = self.baseline_snapshot.filter_traces(filters)
+        final = self.final_snapshot.filter_traces(filters)
+        by_line = [stat for stat in final.compare_to(baseline, "lineno") if stat.size_diff > 0][:self.args.top]
+        by_trace = [stat for stat in final.compare_to(baseline, "traceback") if stat.size_diff > 0][:5]
+        return {
+            "top_lines": [{
+                "site": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+                "size_diff_kb": round(stat.size_diff / 1024, 1),
+                "count_diff": stat.count_diff,
+                "size_kb": round(stat.size / 1024, 1)
+            } for stat in by_line],
+            "top_tracebacks": [{
+                "size_diff_kb": round(stat.size_diff / 1024, 1),
+                "count_diff": stat.count_diff,
+                "traceback": [f"{frame.filename}:{frame.lineno}" for frame in reversed(stat.traceback)]
+            } for stat in by_trace]
+        }
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    lines = [f"[SOAK] {'통과' if report['passed'] else '실패'} - {report['duration']:.0f}초 실행 "
+             f"(speed x{report['speed']}, 시청자 {report['readers']}, 수신 프레임 {report['frames_received']}, "
+             f"재접속 {report['reconnects']}, 카메라 조작 {report['commands_run']})"]
+    for key, value in report["growth"].items():
+        lines.append(f"  {key:<10} {value['start']:>10} → {value['end']:>10}  "
+                     f"(+{value['growth']}, {value['per_hour']}/h)")
+    for failure in report["failures"]:
+        lines.append(f"  [FAIL] {failure}")
+    sites = report.get("allocations", {})
+    if sites.get("top_lines"):
+        lines.append("  증가한 할당 위치 (기준 시점 대비):")
+        for site in sites["top_lines"]:
+            lines.append(f"    +{site['size_diff_kb']:>9.1f}KB  {site['count_diff']:>+8d}  {site['site']}")
+    for index, trace in enumerate(sites.get("top_tracebacks", []), 1):
+        lines.append(f"  호출 경로 #{index} (+{trace['size_diff_kb']}KB, {trace['count_diff']:+d}):")
+        for frame in trace["traceback"]:
+            lines.append(f"      {frame}")
+    return "\n".join(lines)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="합성 카메라 백엔드 장시간 메모리 누수 점검")
+    parser.add_argument("--duration", type=parse_duration, default=parse_duration("30m"),
+                        help="실행 시간 (예: 600, 30m, 4h)")
+    parser.add_argument("--speed", type=float, default=4.0, help="합성 카메라 프레임레이트 배율")
+    parser.add_argument("--readers", type=int, default=3, help="동시 스트림 시청자 수")
+    parser.add_argument("--reconnect", type=float, default=60.0, help="시청자 재접속 주기 (초)")
+    parser.add_argument("--churn", type=float, default=30.0, help="카메라 조작 묶음 반복 주기 (초, 0 = 안 함)")
+    parser.add_argument("--interval", type=float, default=30.0, help="샘플링 주기 (초)")
+    # 크기 제한이 있는 버퍼가 가득 찰 때까지 (미리보기 샘플은 실제 시간 기준 300초 보관 - 가속되지 않음)
+    parser.add_argument("--warmup", type=parse_duration, default=parse_duration("6m"),
+                        help="기준값 측정 전 안정화 시간 (미리보기 버퍼 / 스레드 풀 생성 등)")
+    parser.add_argument("--segment-duration", type=int, default=5, help="녹화 세그먼트 길이 (초)")
+    parser.add_argument("--keep-minutes", type=float, default=10.0, help="녹화 파일 보관 시간 (분)")
+    parser.add_argument("--no-tracemalloc", action="store_true", help="할당 추적 끄기 (오버헤드 없이 RSS만 측정)")
+    parser.add_argument("--trace-frames", type=int, default=8, help="할당 호출 경로 깊이")
+    parser.add_argument("--top", type=int, default=15, help="보고서의 할당 위치 수")
+    parser.add_argument("--max-rss-growth-mb", type=float, default=20.0, help="RSS 증가 상한 (MB)")
+    parser.add_argument("--max-traced-growth-mb", type=float, default=10.0, help="추적 메모리 증가 상한 (MB)")
+    parser.add_argument("--max-fd-growth", type=int, default=4, help="FD 증가 상한")
+    parser.add_argument("--max-thread-growth", type=int, default=2, help="스레드 증가 상한")
+    parser.add_argument("--max-child-growth", type=int, default=0, help="자식 프로세스 증가 상한")
+    parser.add_argument("--report", default="soak_report.json", help="JSON 보고서 경로")
+    parser.add_argument("--workdir", default=None, help="작업 디렉토리 (기본: 임시 디렉토리, 종료 시 삭제)")
+    parser.add_argument("--keep", action="store_true", help="작업 디렉토리 유지")
+    parser.add_argument("--verbose", action="store_true", help="앱 로그 출력")
+    return parser.parse_args(argv)
+
+
+def main():
+    args = parse_args()
+    report_path = Path(args.report).resolve()
+    workdir = Path(args.workdir or tempfile.mkdtemp(prefix="livecam-soak-"))
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING,
+                        format='%(asctime)s - %(levelname)s - %(message)s')
+    if not args.no_tracemalloc:
+        tracemalloc.start(args.trace_frames)
+
+    node = SyntheticNode(workdir, overrides={"recording": {"segment_duration": args.segment_duration},
+                                             "streaming": {"max_clients": max(2, args.readers),
+                                                           "max_connections": args.readers + 2}},
+                         speed=args.speed)
+    print(f"[SOAK] 작업 디렉토리: {workdir}, {args.duration:.0f}초 (speed x{args.speed})", flush=True)
+    soak = SoakRun(node, args)
+    error = None
+    try:
+        node.start()
+        if not args.verbose:
+            logging.getLogger().setLevel(logging.WARNING)
+        soak.run()
+    except KeyboardInterrupt:
+        error = "중단됨 (Ctrl+C)"
+    except Exception as e:
+        error = repr(e)
+    finally:
+        node.stop()
+        os.chdir(REPO_DIR)
+        if not args.keep and args.workdir is None:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    if soak.final_snapshot is not None:
+        print("[SOAK] 할당 위치 분석 중...", flush=True)
+    growth = soak.growth()
+    failures = soak.verdict(growth) + ([f"실행 오류: {error}"] if error else [])
+    report = {
+        "passed": not failures,
+        "duration": soak.samples[-1]["elapsed"] if soak.samples and "elapsed" in soak.samples[-1] else 0,
+        "speed": args.speed,
+        "readers": args.readers,
+        "frames_received": soak.frames_received,
+        "reconnects": soak.reconnects,
+        "commands_run": soak.commands_run,
+        "growth": growth,
+        "failures": failures,
+        "allocations": soak.allocation_sites(),
+        "samples": [s for s in soak.samples if not s.get("baseline")]
+    }
+    with open(report_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(format_report(report), flush=True)
+    print(f"[SOAK] 보고서: {report_path}", flush=True)
+    sys.exit(0 if report["passed"] else 1)
+
+
+if __name__ == "__main__":
+    main()
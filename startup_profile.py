@@ -0,0 +1,150 @@
+"""
+SHT 듀얼 LIVE 카메라 - 시작 시간 측정
+Startup timing breakdown (imports, camera open/configure, first frame, recorder start)
+"""
+
+import builtins
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Any, List, Optional
+
+
+def read_rss_kb() -> int:
+    """현재 프로세스 RSS (KB) - /proc/self/statm 기반 (psutil 불필요)"""
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf('SC_PAGE_SIZE') // 1024
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+class StartupProfiler:
+    """프로세스 시작부터 첫 녹화 프레임까지의 단계별 시간 기록"""
+
+    def __init__(self):
+        # 모든 오프셋의 기준 시점 (모듈 최초 임포트 시점)
+        self.origin = time.monotonic()
+        self.phases: List[Dict[str, Any]] = []
+        self.milestones: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()  # 스레드별 구간 스택 (트리 구성용)
+        self._original_import = None
+
+    def now(self) -> float:
+        """기준 시점 이후 경과 시간 (초)"""
+        return time.monotonic() - self.origin
+
+    def _stack(self) -> List[str]:
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    @contextmanager
+    def measure(self, name: str, parent: Optional[str] = None):
+        """구간 시간 측정 (중첩 시 트리로 기록)
+        예: with startup_profiler.measure('cam0.open'): ...
+
+        parent: 다른 스레드에서 시작된 상위 구간 이름 (스레드 간 트리 연결용)
+        """
+        stack = self._stack()
+        if parent is None and stack:
+            parent = stack[-1]
+        stack.append(name)
+        start = self.now()
+        rss_before = read_rss_kb()
+        try:
+            yield
+        finally:
+            end = self.now()
+            stack.pop()
+            with self._lock:
+                self.phases.append({
+                    "name": name,
+                    "parent": parent,
+                    "start": round(start, 4),
+                    "duration": round(end - start, 4),
+                    "rss_delta_kb": read_rss_kb() - rss_before,
+                    "thread": threading.current_thread().name
+                })
+
+    def mark(self, name: str) -> bool:
+        """마일스톤 기록 (최초 1회만 기록, 기록 시 True)"""
+        with self._lock:
+            if name in self.milestones:
+                return False
+            self.milestones[name] = round(self.now(), 4)
+            return True
+
+    def trace_imports(self):
+        """모든 신규 임포트를 구간으로 기록 (--profile-startup 전용, 임포트 트리 생성)"""
+        if self._original_import is not None:
+            return
+        original_import = self._original_import = builtins.__import__
+
+        def traced_import(name, globals=None, locals=None, fromlist=(), level=0):
+            if level == 0 and name not in sys.modules:
+                with self.measure(f"import {name}"):
+                    return original_import(name, globals, locals, fromlist, level)
+            return original_import(name, globals, locals, fromlist, level)
+
+        builtins.__import__ = traced_import
+
+    def stop_tracing_imports(self):
+        """임포트 추적 해제"""
+        if self._original_import is not None:
+            builtins.__import__ = self._original_import
+            self._original_import = None
+
+    def summary(self) -> Dict[str, Any]:
+        """단계별 시간 요약 반환"""
+        with self._lock:
+            phases = sorted(self.phases, key=lambda p: p["start"])
+            milestones = dict(self.milestones)
+
+        first_records = [v for k, v in milestones.items() if k.endswith(".first_recorded_frame")]
+        return {
+            "uptime": round(self.now(), 3),
+            "rss_kb": read_rss_kb(),
+            "phases": phases,
+            "milestones": milestones,
+            # 콜드 스타트 → 첫 녹화 프레임 (모든 카메라 중 가장 빠른 값)
+            "cold_start_to_first_record": min(first_records) if first_records else None
+        }
+
+    def format_tree(self, min_duration: float = 0.001) -> str:
+        """임포트/초기화 구간 트리 문자열 (min_duration 미만 구간은 생략)"""
+        summary = self.summary()
+        children: Dict[Optional[str], List[Dict[str, Any]]] = {}
+        for phase in summary["phases"]:
+            children.setdefault(phase["parent"], []).append(phase)
+
+        lines = [f"[PROFILE] 시작 프로파일 (경과 {summary['uptime']:.3f}초, "
+                 f"RSS {summary['rss_kb'] / 1024:.1f}MB)"]
+
+        def walk(parent: Optional[str], depth: int):
+            for phase in children.get(parent, []):
+                if phase["duration"] < min_duration:
+                    continue
+                label = "  " * depth + phase["name"]
+                rss = f"{phase['rss_delta_kb'] / 1024:+7.1f}MB" if phase["rss_delta_kb"] else ""
+                lines.append(f"  {label:<52} {phase['duration'] * 1000:9.1f} ms {rss}")
+                walk(phase["name"], depth + 1)
+
+        walk(None, 0)
+
+        lines.append("[PROFILE] 마일스톤 (프로세스 시작 기준)")
+        for name, offset in sorted(summary["milestones"].items(), key=lambda item: item[1]):
+            lines.append(f"  {name:<52} {offset * 1000:9.1f} ms")
+        if summary["cold_start_to_first_record"] is not None:
+            lines.append(f"[PROFILE] 콜드 스타트 → 첫 녹화 프레임: "
+                         f"{summary['cold_start_to_first_record'] * 1000:.1f} ms")
+        return "\n".join(lines)
+
+
+# 글로벌 시작 시간 측정기 인스턴스
+startup_profiler = StartupProfiler()
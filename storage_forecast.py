@@ -0,0 +1,215 @@
+"""
+SHT 듀얼 LIVE 카메라 - 저장 용량 집계 / 예측
+Per-camera, per-day usage totals from segment close events and time-to-full / retention forecasts
+"""
+
+import logging
+import os
+import shutil
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, Any, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# 예측 재평가 최소 간격 (세그먼트 종료 시점에 확인, 초)
+EVALUATE_INTERVAL = 300
+
+
+class StorageForecaster:
+    """카메라별·일별 녹화량 누적 + 용량 소진 시점 / 보존 기간 달성 여부 예측
+
+    - 집계: 세그먼트 종료 이벤트마다 증분 갱신 (du 스캔 없음), 기동 시 한 번 카탈로그 기록으로 초기화
+    - 쓰기 속도: 최근 rate_window_hours 동안 녹화된 바이트 / 녹화 시간 (적응형 화질 변동 포함)
+    - 예측: 저장 경로를 장치(볼륨)별로 묶어 여유 공간(statvfs) - 예약 공간(cleanup.min_free_space_gb)을
+      합산 쓰기 속도로 나눔 → 가득 찰 때까지 남은 시간,
+      (기록된 양 + 사용 가능 여유) / 일일 쓰기량 → 보존 가능 일수 (cleanup.max_age_days와 비교)
+    """
+
+    def __init__(self, config: Dict[str, Any], cleanup: Dict[str, Any],
+                 storage_path: Callable[[int], str], catalog=None):
+        self.update_config(config, cleanup)
+        self.storage_path = storage_path
+        self.catalog = catalog
+
+        self._lock = threading.Lock()
+        self._seeded = False
+        # {camera_id: {"YYYY-MM-DD": {"bytes", "seconds", "segments"}}}
+        self.days: Dict[int, Dict[str, Dict[str, float]]] = {}
+        # 쓰기 속도 계산용 최근 세그먼트 {camera_id: deque[(end, bytes, seconds)]}
+        self._recent: Dict[int, deque] = {}
+        self._last_evaluate = 0.0
+        self._at_risk: Dict[str, bool] = {}
+        # 마지막 예측 결과 (통계 API는 이 값만 반환 - 카탈로그/디렉토리/statvfs 조회 없음)
+        self._latest: Optional[Dict[str, Any]] = None
+        self._refresh_thread: Optional[threading.Thread] = None
+
+    def update_config(self, config: Dict[str, Any], cleanup: Dict[str, Any]):
+        """예측 파라미터 / 보존 정책 적용 (다음 예측부터)"""
+        self.rate_window = float(config.get('rate_window_hours', 24)) * 3600
+        self.warn_days = float(config.get('warn_days', 7))
+        self.retention_days = float(cleanup.get('max_age_days', 30)) if cleanup.get('enabled', False) else None
+        self.reserve_bytes = int(float(cleanup.get('min_free_space_gb', 10)) * 1024 ** 3)
+
+    def _ensure_seeded(self):
+        """최초 사용 시 카탈로그 기록으로 누적값 초기화 (디스크 스캔 없음)"""
+        if self._seeded:
+            return
+        self._seeded = True
+        if self.catalog is None:
+            return
+        count = 0
+        for segment in self.catalog.segments():
+            self._add(segment["camera_id"], segment["start"], segment["end"], segment.get("bytes", 0))
+            count += 1
+        if count:
+            logger.info(f"[STORAGE] 카탈로그에서 녹화량 집계 초기화 (세그먼트 {count}건)")
+
+    def _add(self, camera_id: int, start: float, end: float, size: int):
+        day = datetime.fromtimestamp(start).strftime("%Y-%m-%d")
+        seconds = max(0.0, end - start)
+        totals = self.days.setdefault(camera_id, {}).setdefault(day, {"bytes": 0, "seconds": 0.0, "segments": 0})
+        totals["bytes"] += size
+        totals["seconds"] += seconds
+        totals["segments"] += 1
+        if end >= time.time() - self.rate_window:
+            self._recent.setdefault(camera_id, deque()).append((end, size, seconds))
+
+    def add_segment(self, camera_id: int, path, start: float, end: float, size: int, quality: str = "full"):
+        """세그먼트 종료 이벤트 (GPURecorder 세그먼트 구독자 - 카탈로그 등록보다 먼저 호출)"""
+        with self._lock:
+            self._ensure_seeded()
+            self._add(camera_id, start, end, size)
+        # 예측(statvfs / 디렉토리 조회)은 백그라운드에서 - 녹화 스레드를 막지 않음
+        if time.monotonic() - self._last_evaluate >= EVALUATE_INTERVAL:
+            self._refresh_async()
+
+    def _refresh_async(self):
+        """백그라운드에서 예측 갱신 (이미 진행 중이면 생략)"""
+        with self._lock:
+            if self._refresh_thread is not None and self._refresh_thread.is_alive():
+                return
+            self._last_evaluate = time.monotonic()
+            self._refresh_thread = threading.Thread(target=self._refresh, name="storage-forecast", daemon=True)
+            self._refresh_thread.start()
+
+    def _refresh(self):
+        try:
+            self.forecast()
+        except Exception as e:
+            logger.error(f"[STORAGE] 저장 용량 예측 실패: {e}")
+
+    def _rate(self, camera_id: int, now: float) -> Optional[float]:
+        """최근 쓰기 속도 (바이트/초) - 기록이 없으면 None"""
+        recent = self._recent.get(camera_id)
+        if not recent:
+            return None
+        cutoff = now - self.rate_window
+        while recent and recent[0][0] < cutoff:
+            recent.popleft()
+        seconds = sum(item[2] for item in recent)
+        return sum(item[1] for item in recent) / seconds if seconds > 0 else None
+
+    def _prune_missing_days(self):
+        """날짜 디렉토리가 삭제된 일자는 누적값에서 제외 (정리 작업/수동 삭제 반영)"""
+        for camera_id, days in self.days.items():
+            root = Path(self.storage_path(camera_id))
+            for day in [day for day in days if not (root / day).exists()]:
+                del days[day]
+
+    def forecast(self) -> Dict[str, Any]:
+        """카메라별 사용량 + 볼륨별 용량 소진 / 보존 기간 예측"""
+        now = time.time()
+        with self._lock:
+            self._ensure_seeded()
+            self._prune_missing_days()
+            cameras = {}
+            for camera_id, days in sorted(self.days.items()):
+                rate = self._rate(camera_id, now)
+                cameras[camera_id] = {
+                    "total_bytes": int(sum(d["bytes"] for d in days.values())),
+                    "bytes_per_day": int(rate * 86400) if rate is not None else None,
+                    "days": {day: {"bytes": int(d["bytes"]), "hours": round(d["seconds"] / 3600, 2),
+                                   "segments": d["segments"]} for day, d in sorted(days.items())}
+                }
+
+        volumes: Dict[int, Dict[str, Any]] = {}
+        for camera_id, usage in cameras.items():
+            path = Path(self.storage_path(camera_id))
+            try:
+                device = os.stat(path).st_dev
+                disk = shutil.disk_usage(path)
+            except OSError:
+                continue
+            volume = volumes.setdefault(device, {
+                "path": str(path), "cameras": [], "total_bytes": disk.total, "free_bytes": disk.free,
+                "recorded_bytes": 0, "bytes_per_day": 0
+            })
+            volume["cameras"].append(camera_id)
+            volume["recorded_bytes"] += usage["total_bytes"]
+            volume["bytes_per_day"] += usage["bytes_per_day"] or 0
+
+        result_volumes = [self._volume_forecast(volume) for volume in volumes.values()]
+        self._last_evaluate = time.monotonic()
+        for volume in result_volumes:
+            key = volume["path"]
+            if volume["at_risk"] != self._at_risk.get(key, False):
+                self._at_risk[key] = volume["at_risk"]
+                if volume["at_risk"]:
+                    logger.warning(f"[STORAGE] 저장 용량 경고 ({key}): {volume['warning']}")
+                else:
+                    logger.info(f"[STORAGE] 저장 용량 경고 해제 ({key})")
+        result = {
+            "rate_window_hours": self.rate_window / 3600,
+            "retention_days": self.retention_days,
+            "cameras": cameras,
+            "volumes": result_volumes
+        }
+        self._latest = result
+        return result
+
+    def _volume_forecast(self, volume: Dict[str, Any]) -> Dict[str, Any]:
+        usable = max(0, volume["free_bytes"] - self.reserve_bytes)
+        per_day = volume["bytes_per_day"]
+        days_to_full = usable / per_day if per_day > 0 else None
+        # 기록된 양 + 사용 가능 여유를 모두 녹화에 쓸 때 보관 가능한 일수
+        capacity_days = (volume["recorded_bytes"] + usable) / per_day if per_day > 0 else None
+
+        warning = None
+        if self.retention_days is not None and capacity_days is not None and capacity_days < self.retention_days:
+            warning = (f"보존 기간 {self.retention_days:.0f}일 중 {capacity_days:.1f}일분만 저장 가능 "
+                       f"(약 {days_to_full:.1f}일 후부터 보존 기간 단축)")
+        elif self.retention_days is None and days_to_full is not None and days_to_full < self.warn_days:
+            warning = f"약 {days_to_full:.1f}일 후 저장 공간 소진 (자동 정리 비활성화)"
+
+        return {
+            "path": volume["path"],
+            "cameras": volume["cameras"],
+            "total_gb": round(volume["total_bytes"] / 1024 ** 3, 2),
+            "free_gb": round(volume["free_bytes"] / 1024 ** 3, 2),
+            "reserve_gb": round(self.reserve_bytes / 1024 ** 3, 2),
+            "recorded_gb": round(volume["recorded_bytes"] / 1024 ** 3, 2),
+            "write_gb_per_day": round(per_day / 1024 ** 3, 3),
+            "days_to_full": round(days_to_full, 2) if days_to_full is not None else None,
+            "retention_capacity_days": round(capacity_days, 2) if capacity_days is not None else None,
+            "at_risk": warning is not None,
+            "warning": warning
+        }
+
+    def summary(self) -> List[Dict[str, Any]]:
+        """볼륨별 핵심 값만 (통계 API용 - 이벤트 루프에서 호출되므로 캐시된 예측만 사용)
+
+        세그먼트 종료 시 갱신되며, EVALUATE_INTERVAL보다 오래되었거나 아직 없으면 백그라운드 갱신 요청
+        (첫 예측이 끝나기 전에는 빈 목록)
+        """
+        latest = self._latest
+        if latest is None or time.monotonic() - self._last_evaluate >= EVALUATE_INTERVAL:
+            self._refresh_async()
+        if latest is None:
+            return []
+        return [{key: volume[key] for key in ("path", "free_gb", "write_gb_per_day", "days_to_full",
+                                               "retention_capacity_days", "at_risk")}
+                for volume in latest["volumes"]]
@@ -0,0 +1,259 @@
+"""
+SHT 듀얼 LIVE 카메라 - 녹화 스테이징 저장 계층 (RAM 디스크 → 영구 저장소)
+Tiered segment storage: in-progress segments on tmpfs, background migration to persistent storage
+"""
+
+import logging
+import os
+import queue
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+# 이동 실패 시 재시도 간격 (초, 지수 백오프 상한)
+RETRY_BASE_SECONDS = 1.0
+RETRY_MAX_SECONDS = 60.0
+
+
+class StagingStore:
+    """진행 중인 세그먼트를 tmpfs(RAM 디스크)에 기록하고, 완료되면 영구 저장소로 옮기는 저장 계층
+
+    recording_storage_strategy.md §5.1의 1단계(로컬 버퍼) → 2단계(로컬 저장) 구현:
+    - stage(): 세그먼트 시작 시 예상 크기만큼 예산을 잡고 tmpfs 경로 반환
+               예산 초과 / tmpfs 여유 부족 / 이동 지연 시 최종 경로 반환 (직접 기록으로 강등)
+    - commit(): 세그먼트 종료 → 이동 대기열에 추가 (녹화 스레드는 기다리지 않음)
+    - 이동 스레드: chunk_kb 단위 순차 쓰기 → fsync → rename (영구 저장소에는 완성된 파일만 나타남)
+
+    SD 카드 쓰기 지연이 인코더 출력까지 밀리지 않고, 작은 쓰기가 큰 순차 쓰기로 모여 쓰기 증폭이 줄어든다.
+    전원이 갑자기 끊기면 아직 옮기지 못한 세그먼트(최대 budget_mb)는 사라진다.
+    """
+
+    def __init__(self, config: Dict[str, Any]):
+        self.root = Path(config.get('path', '/dev/shm/livecam'))
+        self.budget_bytes = int(float(config.get('budget_mb', 192)) * 1024 * 1024)
+        self.min_free_bytes = int(float(config.get('min_free_mb', 64)) * 1024 * 1024)
+        self.chunk_size = int(config.get('chunk_kb', 1024)) * 1024
+        self.max_backlog = int(config.get('max_backlog', 8))
+
+        self._lock = threading.Lock()
+        self._reserved: Dict[Path, int] = {}     # 기록 중인 스테이징 파일 → 예약 크기
+        self._pending: Dict[Path, Path] = {}     # 스테이징 파일 → 최종 경로 (기록 중 + 이동 대기)
+        self._queue: "queue.Queue[Optional[Path]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+
+        self.direct: Dict[int, bool] = {}   # 카메라별 직접 기록 강등 상태
+        self.staged_count = 0
+        self.direct_count = 0
+        self.moved_count = 0
+        self.moved_bytes = 0
+        self.move_seconds = 0.0
+        self.failures = 0
+        self.lost_count = 0     # 이동 전에 사라진 스테이징 파일 (tmpfs 초기화 / 수동 삭제 등)
+        self.last_error: Optional[str] = None
+
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="staging-mover", daemon=True)
+        self._thread.start()
+        logger.info(f"[STAGING] 스테이징 저장 계층 시작: {self.root} (예산 {self.budget_bytes // 1024 ** 2}MB)")
+
+    def stop(self, timeout: float = 10.0):
+        """남은 세그먼트를 모두 옮긴 뒤 종료 (timeout 초과 시 남은 파일은 다음 기동 시 recover)"""
+        self._queue.put(None)
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+        self._stop_event.set()
+
+    def _staged_path(self, camera_id: int, final_path: Path) -> Path:
+        # cam{id}/{YYYY-MM-DD}/{파일명} - 재기동 시 recover()가 최종 위치를 다시 계산할 수 있는 구조
+        return self.root / f"cam{camera_id}" / final_path.parent.name / final_path.name
+
+    def stage(self, camera_id: int, final_path: Path, expected_bytes: int) -> Path:
+        """세그먼트 기록 경로 결정 - tmpfs 예산/여유가 있으면 스테이징 경로, 없으면 final_path"""
+        staged = self._staged_path(camera_id, final_path)
+        with self._lock:
+            used = sum(self._reserved.values()) + sum(
+                self._size(path) for path in self._pending if path not in self._reserved)
+            backlog = len(self._pending) - len(self._reserved)
+            try:
+                free = shutil.disk_usage(self.root).free
+            except OSError:
+                free = 0
+            reason = None
+            if used + expected_bytes > self.budget_bytes:
+                reason = f"예산 초과 ({(used + expected_bytes) / 1024 ** 2:.0f}MB)"
+            elif free - expected_bytes < self.min_free_bytes:
+                reason = f"tmpfs 여유 부족 ({free / 1024 ** 2:.0f}MB)"
+            elif backlog >= self.max_backlog:
+                reason = f"이동 대기 {backlog}개"
+            if reason is None:
+                self._reserved[staged] = expected_bytes
+                self._pending[staged] = final_path
+                self.staged_count += 1
+            else:
+                self.direct_count += 1
+            degraded = self.direct.get(camera_id, False)
+            self.direct[camera_id] = reason is not None
+        if reason is not None:
+            if not degraded:
+                logger.warning(f"[STAGING] 카메라 {camera_id} 직접 기록으로 전환: {reason}")
+            return final_path
+        if degraded:
+            logger.info(f"[STAGING] 카메라 {camera_id} 스테이징 기록 복구")
+        staged.parent.mkdir(parents=True, exist_ok=True)
+        return staged
+
+    def is_pending(self, final_path: Path) -> bool:
+        """최종 경로가 아직 스테이징에 있는지 (파일명 중복 확인용)"""
+        with self._lock:
+            return final_path in self._pending.values()
+
+    def resolve(self, final_path) -> Path:
+        """최종 경로 → 현재 실제 파일 위치 (아직 이동 전이면 스테이징 경로)"""
+        final_path = Path(final_path)
+        with self._lock:
+            for staged, target in self._pending.items():
+                if target == final_path:
+                    return staged
+        return final_path
+
+    def commit(self, staged: Path):
+        """기록 완료 → 영구 저장소 이동 대기열에 추가"""
+        with self._lock:
+            self._reserved.pop(staged, None)
+            if staged not in self._pending:
+                return
+        self._queue.put(staged)
+
+    def discard(self, staged: Path):
+        """기록 실패/손상 파일 - 이동하지 않고 삭제"""
+        with self._lock:
+            self._reserved.pop(staged, None)
+            if self._pending.pop(staged, None) is None:
+                return
+        staged.unlink(missing_ok=True)
+
+    @staticmethod
+    def _size(path: Path) -> int:
+        try:
+            return path.stat().st_size
+        except OSError:
+            return 0
+
+    def _run(self):
+        delay = RETRY_BASE_SECONDS
+        while True:
+            staged = self._queue.get()
+            if staged is None:
+                return
+            try:
+                self._move(staged)
+                delay = RETRY_BASE_SECONDS
+            except FileNotFoundError:
+                # 원본이 없으면 재시도해도 소용없음 - 대기 목록에서 제거 (백로그 / 오류 로그 반복 방지)
+                self._drop_missing(staged)
+            except OSError as e:
+                self.failures += 1
+                self.last_error = str(e)
+                logger.error(f"[STAGING] 영구 저장소 이동 실패 ({delay:.0f}초 후 재시도): {staged.name} - {e}")
+                self._queue.put(staged)
+                if self._stop_event.wait(delay):
+                    return
+                delay = min(delay * 2, RETRY_MAX_SECONDS)
+
+    def _move(self, staged: Path):
+        """큰 순차 쓰기로 복사 → fsync → rename → 스테이징 파일 삭제"""
+        with self._lock:
+            final_path = self._pending.get(staged)
+        if final_path is None:
+            return
+        started = time.monotonic()
+        final_path.parent.mkdir(parents=True, exist_ok=True)
+        part = final_path.with_name(f".{final_path.name}.part")
+        size = 0
+        with open(staged, "rb") as src, open(part, "wb") as dst:
+            while True:
+                chunk = src.read(self.chunk_size)
+                if not chunk:
+                    break
+                dst.write(chunk)
+                size += len(chunk)
+            dst.flush()
+            os.fsync(dst.fileno())
+        os.replace(part, final_path)
+        with self._lock:
+            self._pending.pop(staged, None)
+        staged.unlink(missing_ok=True)
+        self.moved_count += 1
+        self.moved_bytes += size
+        self.move_seconds += time.monotonic() - started
+
+    def _drop_missing(self, staged: Path):
+        """사라진 스테이징 파일 - 대기 목록에서 제거하고 한 번만 경고"""
+        with self._lock:
+            final_path = self._pending.pop(staged, None)
+        if final_path is None:
+            return
+        self.lost_count += 1
+        logger.warning(f"[STAGING] 스테이징 파일이 사라져 이동 생략: {staged} → {final_path}")
+
+    def recover(self, storage_path: Callable[[int], str]) -> int:
+        """이전 실행에서 옮기지 못한 스테이징 파일을 이동 대기열에 다시 추가"""
+        recovered = 0
+        for staged in sorted(self.root.glob("cam*/*/*.mp4")):
+            try:
+                camera_id = int(staged.parent.parent.name[3:])
+            except ValueError:
+                continue
+            final_path = Path(storage_path(camera_id)) / staged.parent.name / staged.name
+            with self._lock:
+                self._pending[staged] = final_path
+            self._queue.put(staged)
+            recovered += 1
+        if recovered:
+            logger.warning(f"[STAGING] 이전 실행에서 남은 세그먼트 {recovered}개 이동 재개")
+        return recovered
+
+    @property
+    def backlog(self) -> int:
+        """영구 저장소로 아직 옮기지 못한 완료 세그먼트 수"""
+        with self._lock:
+            return len(self._pending) - len(self._reserved)
+
+    def get_status(self) -> Dict[str, Any]:
+        with self._lock:
+            recording = len(self._reserved)
+            backlog = len(self._pending) - recording
+            reserved = sum(self._reserved.values())
+        try:
+            usage = shutil.disk_usage(self.root)
+            free_mb = round(usage.free / 1024 ** 2, 1)
+        except OSError:
+            free_mb = None
+        return {
+            "enabled": True,
+            "path": str(self.root),
+            "direct_cameras": sorted(camera_id for camera_id, direct in self.direct.items() if direct),
+            "budget_mb": round(self.budget_bytes / 1024 ** 2),
+            "reserved_mb": round(reserved / 1024 ** 2, 1),
+            "tmpfs_free_mb": free_mb,
+            "recording": recording,
+            "backlog": backlog,
+            "staged_segments": self.staged_count,
+            "direct_segments": self.direct_count,
+            "moved_segments": self.moved_count,
+            "moved_mb": round(self.moved_bytes / 1024 ** 2, 1),
+            "move_mb_per_s": round(self.moved_bytes / 1024 ** 2 / self.move_seconds, 1) if self.move_seconds else None,
+            "failures": self.failures,
+            "lost_segments": self.lost_count,
+            "last_error": self.last_error
+        }
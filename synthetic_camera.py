@@ -0,0 +1,232 @@
+"""
+SHT 듀얼 LIVE 카메라 - 합성(가상) 카메라 백엔드
+Picamera2-compatible synthetic camera for running the full app without camera hardware
+
+사용: python3 webmain.py --synthetic  (또는 config.json system.camera_backend = "synthetic")
+- 움직이는 사각형이 있는 그라데이션 영상을 설정된 프레임레이트로 생성 (모션 감지 동작 확인 가능)
+- 인코더/출력은 비트레이트에 비례한 더미 데이터를 기록 (재생 가능한 MP4 아님)
+- 허브 테스트용 로컬 대역 노드, 통합 테스트, 장시간 누수 테스트에 사용
+"""
+
+import threading
+import time
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+
+# 더미 녹화 파일 크기 배율 (비트레이트 × 시간 × 배율) - 테스트 디스크 사용량 절감
+BYTES_SCALE = 0.01
+
+
+class Transform:
+    """libcamera.Transform 대역"""
+
+    def __init__(self, hflip: bool = False, vflip: bool = False):
+        self.hflip = hflip
+        self.vflip = vflip
+
+
+class SyntheticRequest:
+    """Picamera2 CompletedRequest 대역 - pre_callback에 전달 (스트림 이름 → 배열)"""
+
+    def __init__(self, config: Dict[str, Any], arrays: Dict[str, np.ndarray]):
+        self.config = config
+        self.arrays = arrays
+
+
+class MappedArray:
+    """picamera2.MappedArray 대역 - 요청 버퍼를 제자리에서 수정"""
+
+    def __init__(self, request: SyntheticRequest, stream: str):
+        self.array = request.arrays.get(stream)
+
+    def __enter__(self) -> "MappedArray":
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class SyntheticPicamera2:
+    """Picamera2 대역 - 이 앱이 사용하는 API만 구현"""
+
+    # 전체 프레임레이트 배율 (장시간 테스트 가속용)
+    speed = 1.0
+
+    def __init__(self, camera_num: int = 0):
+        self.camera_num = camera_num
+        self.config: Optional[Dict[str, Any]] = None
+        self.started = False
+        self.framerate = 30.0
+        self._epoch = time.monotonic()
+        self._frames: Dict[str, np.ndarray] = {}
+        self._encoders = []
+        self._lock = threading.Lock()
+        # 캡처 전 버퍼 가공 콜백 (Picamera2.pre_callback과 동일 - 프라이버시 마스크 등)
+        self.pre_callback = None
+
+    def create_video_configuration(self, main=None, lores=None, buffer_count=4, queue=True,
+                                   transform=None, controls=None, **kwargs) -> Dict[str, Any]:
+        return {
+            "main": dict(main or {"size": (640, 480), "format": "YUV420"}),
+            "lores": dict(lores) if lores else None,
+            "buffer_count": buffer_count,
+            "transform": transform,
+            "controls": dict(controls or {})
+        }
+
+    def configure(self, config: Dict[str, Any]):
+        self.config = config
+        self._apply_controls(config.get("controls", {}))
+        self._frames = {}
+        for name in ("main", "lores"):
+            stream = config.get(name)
+            if stream:
+                self._frames[name] = self._base_frame(stream["size"], stream.get("format", "RGB888"))
+
+    def _base_frame(self, size, fmt: str) -> np.ndarray:
+        """고정 배경 (가로 그라데이션)"""
+        width, height = size
+        gradient = np.linspace(40, 200, width, dtype=np.uint8)
+        if fmt == "YUV420":
+            frame = np.full((height * 3 // 2, width), 128, dtype=np.uint8)
+            frame[:height] = gradient[None, :]
+            return frame
+        frame = np.empty((height, width, 3), dtype=np.uint8)
+        frame[:] = gradient[None, :, None]
+        return frame
+
+    def _apply_controls(self, controls: Dict[str, Any]):
+        if "FrameRate" in controls:
+            self.framerate = float(controls["FrameRate"])
+        if "FrameDurationLimits" in controls:
+            self.framerate = 1_000_000 / controls["FrameDurationLimits"][0]
+
+    def set_controls(self, controls: Dict[str, Any]):
+        self._apply_controls(controls)
+
+    def start(self):
+        self.started = True
+        self._epoch = time.monotonic()
+
+    def stop(self):
+        self.started = False
+
+    def close(self):
+        self.started = False
+        self._frames = {}
+
+    def _wait_frame(self) -> int:
+        """다음 프레임 시점까지 대기 후 프레임 번호 반환 (실제 센서처럼 프레임 주기에 맞춰 전달)"""
+        if not self.started:
+            raise RuntimeError("Camera is not started")
+        period = 1.0 / (self.framerate * self.speed)
+        elapsed = time.monotonic() - self._epoch
+        index = int(elapsed / period) + 1
+        time.sleep(max(0.0, self._epoch + index * period - time.monotonic()))
+        return index
+
+    def _metadata(self, index: int) -> Dict[str, Any]:
+        return {
+            "SensorTimestamp": time.monotonic_ns(),
+            "FrameDuration": int(1_000_000 / self.framerate),
+            "FrameIndex": index
+        }
+
+    def capture_metadata(self) -> Dict[str, Any]:
+        return self._metadata(self._wait_frame())
+
+    def capture_array(self, name: str = "main") -> np.ndarray:
+        return self._capture([name], self._wait_frame())[0]
+
+    def capture_arrays(self, names: List[str]) -> Tuple[List[np.ndarray], Dict[str, Any]]:
+        """같은 프레임의 스트림 배열들 + 메타데이터"""
+        index = self._wait_frame()
+        return self._capture(names, index), self._metadata(index)
+
+    def _capture(self, names: List[str], index: int) -> List[np.ndarray]:
+        if self.pre_callback is None:
+            arrays = {name: self._render(name, index) for name in names}
+        else:
+            # 실제 요청처럼 구성된 모든 스트림 버퍼를 콜백에 전달
+            arrays = {name: self._render(name, index) for name in (*self._frames, *names)}
+            self.pre_callback(SyntheticRequest(self.config, arrays))
+        return [arrays[name] for name in names]
+
+    def _render(self, name: str, index: int) -> np.ndarray:
+        base = self._frames.get(name)
+        if base is None:
+            raise RuntimeError(f"Stream {name} is not configured")
+        frame = base.copy()
+        # 움직이는 사각형 (프레임 크기의 1/8, 4초에 한 번 가로지름)
+        height = base.shape[0] * 2 // 3 if base.ndim == 2 else base.shape[0]
+        width = base.shape[1]
+        box_w, box_h = max(1, width // 8), max(1, height // 8)
+        phase = (index / (self.framerate * 4)) % 1.0
+        x = int(phase * (width - box_w))
+        y = (height - box_h) // 2
+        frame[y:y + box_h, x:x + box_w] = 235
+        return frame
+
+    def start_encoder(self, encoder):
+        encoder.start(self)
+        with self._lock:
+            self._encoders.append(encoder)
+
+    def stop_encoder(self, encoder=None):
+        with self._lock:
+            encoders = [encoder] if encoder is not None else list(self._encoders)
+            for item in encoders:
+                if item in self._encoders:
+                    self._encoders.remove(item)
+        for item in encoders:
+            item.stop()
+
+
+class SyntheticH264Encoder:
+    """H264Encoder 대역 - 녹화 시간 × 비트레이트에 비례한 더미 데이터 기록"""
+
+    def __init__(self, bitrate: int = 5000000, repeat: bool = False, iperiod: int = 30,
+                 framerate: float = 30, **kwargs):
+        self.bitrate = bitrate
+        self.repeat = repeat
+        self.iperiod = iperiod
+        self.framerate = framerate
+        self.frame_skip_count = 1
+        self.output = None
+        self._started = None
+
+    def start(self, camera):
+        self._started = time.monotonic()
+        if self.output is not None:
+            self.output.start()
+
+    def stop(self):
+        if self._started is None:
+            return
+        elapsed = time.monotonic() - self._started
+        self._started = None
+        if self.output is not None:
+            self.output.write(b"\0" * int(self.bitrate / 8 * elapsed * BYTES_SCALE / self.frame_skip_count))
+            self.output.stop()
+
+
+class SyntheticFfmpegOutput:
+    """FfmpegOutput 대역 - 파일에 더미 데이터 기록"""
+
+    def __init__(self, output_filename: str, audio: bool = False, **kwargs):
+        self.output_filename = output_filename
+        self._file = None
+
+    def start(self):
+        self._file = open(self.output_filename, "wb")
+        self._file.write(b"\0\0\0\x18ftypisom")  # MP4 시그니처 (파일 형식 확인용)
+
+    def write(self, data: bytes):
+        if self._file is not None:
+            self._file.write(data)
+
+    def stop(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
@@ -0,0 +1,186 @@
+"""
+SHT 듀얼 LIVE 카메라 - 온도 / 스로틀링 모니터
+Background sysfs thermal sampler with a reading history and pressure levels for load shedding
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Callable, Dict, Any, List, Optional
+
+logger = logging.getLogger(__name__)
+
+THERMAL_ZONE = "/sys/class/thermal/thermal_zone0/temp"
+# 라즈베리파이 펌웨어 스로틀링 플래그 (vcgencmd get_throttled 와 같은 값, 16진수)
+THROTTLED_PATH = "/sys/devices/platform/soc/soc:firmware/get_throttled"
+CPU_FREQ_PATH = "/sys/devices/system/cpu/cpu0/cpufreq/scaling_cur_freq"
+
+THROTTLE_FLAGS = {
+    0: "under_voltage",
+    1: "freq_capped",
+    2: "throttled",
+    3: "soft_temp_limit",
+    16: "under_voltage_occurred",
+    17: "freq_capped_occurred",
+    18: "throttled_occurred",
+    19: "soft_temp_limit_occurred"
+}
+# 이미 스로틀링 중인 상태 (즉시 최대 단계 부하 감소)
+THROTTLE_ACTIVE_MASK = (1 << 2) | (1 << 3)
+
+# 부하 감소 단계
+LEVEL_NORMAL = 0
+LEVEL_WARM = 1
+LEVEL_CRITICAL = 2
+LEVEL_NAMES = {LEVEL_NORMAL: "normal", LEVEL_WARM: "warm", LEVEL_CRITICAL: "critical"}
+
+
+def _read_text(path: str) -> Optional[str]:
+    try:
+        return Path(path).read_text().strip()
+    except OSError:
+        return None
+
+
+def read_temperature(path: str = THERMAL_ZONE) -> Optional[float]:
+    """SoC 온도 (°C) - sysfs 직접 읽기 (vcgencmd 프로세스 생성 없음), 없으면 None"""
+    text = _read_text(path)
+    try:
+        return int(text) / 1000 if text else None
+    except ValueError:
+        return None
+
+
+def decode_throttled(flags: Optional[int]) -> List[str]:
+    """스로틀링 플래그 → 이름 목록"""
+    if flags is None:
+        return []
+    return [name for bit, name in THROTTLE_FLAGS.items() if flags & (1 << bit)]
+
+
+class ThermalMonitor:
+    """온도 / 스로틀링 플래그 / CPU 클럭 주기 샘플링 + 최근 기록 보관
+
+    온도가 warn_temp 이상이면 WARM, critical_temp 이상이거나 펌웨어가 이미 스로틀링 중이면
+    CRITICAL 단계로 올리고, 단계가 바뀔 때마다 구독자에게 알린다 (QoS 부하 감소 신호).
+    복귀는 hysteresis만큼 내려가야 한 단계씩 (경계 부근 진동 방지).
+    """
+
+    def __init__(self, config: Dict[str, Any]):
+        self.thermal_zone = config.get('thermal_zone', THERMAL_ZONE)
+        self.throttled_path = config.get('throttled_path', THROTTLED_PATH)
+
+        self.history: deque = deque(maxlen=int(config.get('history', 300)))
+        self.update_config(config)
+        self.level = LEVEL_NORMAL
+        self.level_changes = 0
+        self._listeners: List[Callable[[int, Dict[str, Any]], None]] = []
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def update_config(self, config: Dict[str, Any]):
+        """샘플링 간격 / 임계 온도 적용 (다음 샘플부터)"""
+        self.interval = max(0.5, float(config.get('interval', 2)))
+        self.warn_temp = float(config.get('warn_temp', 70))
+        self.critical_temp = float(config.get('critical_temp', 77))
+        self.hysteresis = float(config.get('hysteresis', 5))
+
+    def add_listener(self, callback: Callable[[int, Dict[str, Any]], None]):
+        """부하 감소 단계 변경 구독 - callback(level, reading)"""
+        self._listeners.append(callback)
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="thermal", daemon=True)
+        self._thread.start()
+        logger.info(f"[THERMAL] 온도 모니터 시작 ({self.interval:.0f}초 간격, "
+                    f"경고 {self.warn_temp:.0f}°C / 위험 {self.critical_temp:.0f}°C)")
+
+    def stop(self):
+        self._stop_event.set()
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            try:
+                self.sample()
+            except Exception as e:
+                logger.error(f"[THERMAL] 샘플링 오류: {e}")
+            self._stop_event.wait(self.interval)
+
+    def sample(self) -> Dict[str, Any]:
+        """1회 측정 + 단계 판정"""
+        throttled_text = _read_text(self.throttled_path)
+        freq_text = _read_text(CPU_FREQ_PATH)
+        reading = {
+            "timestamp": time.time(),
+            "temperature": read_temperature(self.thermal_zone),
+            "throttled": int(throttled_text, 16) if throttled_text else None,
+            "cpu_mhz": int(freq_text) // 1000 if freq_text and freq_text.isdigit() else None
+        }
+        with self._lock:
+            self.history.append(reading)
+            level = self._next_level(reading)
+            changed = level != self.level
+            if changed:
+                previous, self.level = self.level, level
+                self.level_changes += 1
+        if changed:
+            logger.warning(f"[THERMAL] 부하 감소 단계 {LEVEL_NAMES[previous]} → {LEVEL_NAMES[level]} "
+                           f"(온도 {reading['temperature']}°C, 플래그 {decode_throttled(reading['throttled'])})")
+            for callback in self._listeners:
+                try:
+                    callback(level, reading)
+                except Exception as e:
+                    logger.error(f"[THERMAL] 단계 변경 처리 오류: {e}")
+        return reading
+
+    def _next_level(self, reading: Dict[str, Any]) -> int:
+        temperature = reading["temperature"]
+        flags = reading["throttled"] or 0
+        if flags & THROTTLE_ACTIVE_MASK:
+            return LEVEL_CRITICAL
+        if temperature is None:
+            return LEVEL_NORMAL
+        # 경계 아래로 내려가도 hysteresis 안쪽이면 현재 단계 유지 (한 단계씩 복귀)
+        if temperature >= self.critical_temp:
+            return LEVEL_CRITICAL
+        if self.level == LEVEL_CRITICAL and temperature > self.critical_temp - self.hysteresis:
+            return LEVEL_CRITICAL
+        if temperature >= self.warn_temp:
+            return LEVEL_WARM
+        if self.level >= LEVEL_WARM and temperature > self.warn_temp - self.hysteresis:
+            return LEVEL_WARM
+        return LEVEL_NORMAL
+
+    def latest(self) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            return self.history[-1] if self.history else None
+
+    def get_history(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return list(self.history)
+
+    def summary(self) -> Dict[str, Any]:
+        """현재 값 + 기록 구간 최소/최대/평균 (통계 API용)"""
+        with self._lock:
+            readings = list(self.history)
+            level = self.level
+        temperatures = [r["temperature"] for r in readings if r["temperature"] is not None]
+        latest = readings[-1] if readings else {}
+        return {
+            "temperature": latest.get("temperature"),
+            "cpu_mhz": latest.get("cpu_mhz"),
+            "throttled": decode_throttled(latest.get("throttled")),
+            "level": LEVEL_NAMES[level],
+            "level_changes": self.level_changes,
+            "min": min(temperatures, default=None),
+            "max": max(temperatures, default=None),
+            "avg": round(sum(temperatures) / len(temperatures), 1) if temperatures else None,
+            "samples": len(readings),
+            "window_seconds": round(readings[-1]["timestamp"] - readings[0]["timestamp"]) if readings else 0
+        }
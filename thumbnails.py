@@ -0,0 +1,121 @@
+"""
+SHT 듀얼 LIVE 카메라 - 세그먼트 미리보기 (스프라이트 시트 + WebVTT)
+Thumbnail sampling from the lores stream and per-segment JPEG sprite sheets with a WebVTT index
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, Any, Optional
+
+import numpy as np
+
+from segment_catalog import sprite_paths
+
+logger = logging.getLogger(__name__)
+
+# 샘플 보관 시간 (세그먼트 최대 길이보다 충분히 길게)
+SAMPLE_RETENTION_SECONDS = 300
+
+
+def _vtt_time(seconds: float) -> str:
+    hours, remainder = divmod(seconds, 3600)
+    minutes, secs = divmod(remainder, 60)
+    return f"{int(hours):02d}:{int(minutes):02d}:{secs:06.3f}"
+
+
+class ThumbnailSampler:
+    """카메라 1대의 미리보기 프레임 수집기
+
+    interval초마다 lores 프레임 1장을 width 폭으로 축소해 메모리에 보관하고,
+    세그먼트 종료 시 해당 구간 프레임을 격자 JPEG 1장 + WebVTT(#xywh 좌표)로 기록한다.
+    재생 UI는 세그먼트당 작은 이미지 1장만 받아 타임라인 미리보기를 표시할 수 있다.
+    """
+
+    def __init__(self, camera_id: int, capture_lores: Callable[[], Optional[np.ndarray]],
+                 config: Dict[str, Any]):
+        self.camera_id = camera_id
+        self.capture_lores = capture_lores
+        self.interval = max(0.5, float(config.get('interval', 2)))
+        self.width = int(config.get('width', 160))
+        self.columns = max(1, int(config.get('columns', 5)))
+        self.quality = int(config.get('quality', 70))
+
+        self._frames: deque = deque(maxlen=int(SAMPLE_RETENTION_SECONDS / self.interval))
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.sprites_written = 0
+
+    def start(self):
+        """수집 스레드 시작"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name=f"thumbs-cam{self.camera_id}", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """수집 스레드 중지"""
+        self._stop_event.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=2)
+        self._thread = None
+
+    def _run(self):
+        # cv2는 수집 스레드에서 로드 (모듈 import 시점에 OpenCV 로드 비용을 치르지 않도록)
+        import cv2
+
+        while not self._stop_event.is_set():
+            try:
+                frame = self.capture_lores()
+                if frame is not None:
+                    height = max(1, round(frame.shape[0] * self.width / frame.shape[1]))
+                    thumb = cv2.resize(frame, (self.width, height), interpolation=cv2.INTER_AREA)
+                    with self._lock:
+                        self._frames.append((time.time(), thumb))
+            except Exception as e:
+                logger.error(f"[THUMBS] 카메라 {self.camera_id} 미리보기 캡처 오류: {e}")
+            self._stop_event.wait(self.interval)
+
+    def write_sprite(self, segment_path, start: float, end: float) -> bool:
+        """세그먼트 구간 프레임으로 스프라이트 시트 + WebVTT 기록 (백그라운드 실행용)"""
+        with self._lock:
+            frames = [(ts, thumb) for ts, thumb in self._frames if start <= ts < end]
+        if not frames:
+            return False
+        import cv2
+
+        # 해상도 변경 직후 크기가 섞일 수 있으므로 첫 프레임 크기로 통일
+        tile_h, tile_w = frames[0][1].shape[:2]
+        rows = (len(frames) + self.columns - 1) // self.columns
+        columns = min(self.columns, len(frames))
+        sheet = np.zeros((rows * tile_h, columns * tile_w, 3), dtype=np.uint8)
+
+        paths = sprite_paths(segment_path)
+        cues = ["WEBVTT", ""]
+        for index, (ts, thumb) in enumerate(frames):
+            if thumb.shape[:2] != (tile_h, tile_w):
+                thumb = cv2.resize(thumb, (tile_w, tile_h), interpolation=cv2.INTER_AREA)
+            row, col = divmod(index, self.columns)
+            x, y = col * tile_w, row * tile_h
+            sheet[y:y + tile_h, x:x + tile_w] = thumb[:, :, :3]
+
+            cue_start = ts - start if index > 0 else 0.0  # 첫 미리보기는 세그먼트 시작부터
+            cue_end = (frames[index + 1][0] if index + 1 < len(frames) else end) - start
+            cues.append(f"{_vtt_time(cue_start)} --> {_vtt_time(cue_end)}")
+            cues.append(f"{paths['sprite'].name}#xywh={x},{y},{tile_w},{tile_h}")
+            cues.append("")
+
+        success, encoded = cv2.imencode('.jpg', sheet, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+        if not success:
+            return False
+        try:
+            paths["sprite"].write_bytes(encoded.tobytes())
+            paths["vtt"].write_text("\n".join(cues), encoding='utf-8')
+        except OSError as e:
+            logger.error(f"[THUMBS] 카메라 {self.camera_id} 스프라이트 기록 실패: {e}")
+            return False
+        self.sprites_written += 1
+        return True
@@ -4,13 +4,23 @@ FastAPI 라우터 모듈
 """
 
 import asyncio
+import json
 import subprocess
-from typing import Dict, Any
+from typing import Callable, Dict, Any, Optional
 from fastapi import FastAPI, HTTPException, Request
-from fastapi.responses import StreamingResponse, HTMLResponse, Response, FileResponse
+from fastapi.responses import StreamingResponse, HTMLResponse, Response, FileResponse, JSONResponse
 from fastapi.staticfiles import StaticFiles
+from starlette.background import BackgroundTask
+from pydantic import BaseModel
+from datetime import datetime
 import logging
 
+from startup_profile import startup_profiler
+from client_registry import AdmissionRejected
+from clip_export import ExportError
+from segment_catalog import sprite_paths
+from node_status import METRICS_KEY, METRICS_HEADER
+
 # uvicorn 서버
 import os
 import signal
@@ -19,16 +29,47 @@ import time
 
 logger = logging.getLogger(__name__)
 
+# 카메라 기동(warming) 중 요청이 준비 완료를 기다리는 최대 시간 (초)
+WARMUP_WAIT_TIMEOUT = 15.0
+
+def _parse_time(value: str) -> float:
+    """Unix 시각 또는 ISO 8601 문자열 → Unix 시각"""
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid time: {value}")
+
+
+def _export_error(e: ExportError) -> HTTPException:
+    headers = {"Retry-After": str(e.retry_after)} if e.retry_after else None
+    return HTTPException(status_code=e.status_code, detail=e.detail, headers=headers)
+
+
+class ReconfigureRequest(BaseModel):
+    """카메라 실시간 설정 변경 요청"""
+    stream_resolution: Optional[str] = None   # 스트리밍 렌디션 (예: "640x480")
+    record_resolution: Optional[str] = None   # 센서 출력/녹화 해상도 (변경 시 카메라 재구성)
+    bitrate: Optional[int] = None             # 녹화 비트레이트 (bps)
+    framerate: Optional[int] = None           # 녹화/센서 프레임레이트
+    apply: str = "boundary"                   # "boundary": 다음 세그먼트 / "now": 즉시 세그먼트 전환
+
+
 class CCTVWebAPI:
     """CCTV 웹 API 관리 클래스"""
     
-    def __init__(self, camera_manager):
+    def __init__(self, camera_manager, exit_process: Optional[Callable[[], None]] = None):
         """
         Args:
             camera_manager: 카메라 관리 객체 (핵심 로직)
+            exit_process: /api/shutdown 정리 후 종료 방법 (기본: 프로세스 즉시 종료, 통합 점검은 서버만 종료)
         """
         self.app = FastAPI()
         self.camera_manager = camera_manager
+        self.exit_process = exit_process or (lambda: os._exit(0))
         self.recording_processes = {}  # 녹화 프로세스 추적
 
         # 정적 파일 서빙 설정
@@ -37,6 +78,41 @@ class CCTVWebAPI:
         # 라우트 설정
         self.setup_routes()
     
+    def _warming_response(self) -> Response:
+        """카메라 기동 중 응답 (503 + Retry-After)"""
+        return Response(
+            status_code=503,
+            headers={"Content-Type": "text/plain", "Retry-After": "1", "X-Camera-State": "warming"}
+        )
+
+    async def _wait_ready(self):
+        """카메라 기동 완료 대기 - 시간 초과 시 503"""
+        if not await self.camera_manager.wait_until_ready(WARMUP_WAIT_TIMEOUT):
+            raise HTTPException(
+                status_code=503,
+                detail="Cameras are warming up",
+                headers={"Retry-After": "1"}
+            )
+
+    def _admit(self, client_ip: str, camera_id: Optional[int] = None):
+        """스트림 접속 등록 - 할당량 초과 시 429(IP별) / 423(카메라·전체) + Retry-After"""
+        try:
+            return self.camera_manager.admit_client(client_ip, camera_id)
+        except AdmissionRejected as e:
+            raise HTTPException(
+                status_code=e.status_code,
+                detail=e.detail,
+                headers={"Retry-After": str(e.retry_after)}
+            )
+
+    def _stream_response(self, connection) -> StreamingResponse:
+        """MJPEG 스트림 응답 (응답 종료 시 접속 해제 보장 - 스트림 시작 전 끊긴 경우 포함)"""
+        return StreamingResponse(
+            self.camera_manager.generate_stream(connection),
+            media_type="multipart/x-mixed-replace; boundary=frame",
+            background=BackgroundTask(self.camera_manager.release_stream, connection)
+        )
+
     def setup_routes(self):
         """라우트 설정"""
         
@@ -50,11 +126,10 @@ class CCTVWebAPI:
             """카메라 전환 (싱글 뷰로 전환)"""
             if camera_id not in [0, 1]:
                 raise HTTPException(status_code=400, detail="Invalid camera ID")
+
+            await self._wait_ready()
             
-            # 듀얼 모드 비활성화
-            if self.camera_manager.dual_mode:
-                self.camera_manager.disable_dual_mode()
-            
+            # 듀얼 모드 비활성화 + 전환 (카메라 명령 큐에서 순차 실행)
             success = await self.camera_manager.switch_camera(camera_id)
             
             if success:
@@ -65,23 +140,29 @@ class CCTVWebAPI:
         @self.app.post("/api/dual_mode/{enable}")
         async def toggle_dual_mode(enable: bool):
             """듀얼 모드 토글"""
+            await self._wait_ready()
             if enable:
-                success = self.camera_manager.enable_dual_mode()
+                success = await self.camera_manager.run_command(self.camera_manager.enable_dual_mode)
                 if success:
                     return {"success": True, "message": "Dual mode enabled", "dual_mode": True}
                 else:
                     raise HTTPException(status_code=500, detail="Failed to enable dual mode")
             else:
-                self.camera_manager.disable_dual_mode()
+                await self.camera_manager.run_command(self.camera_manager.disable_dual_mode)
                 return {"success": True, "message": "Dual mode disabled", "dual_mode": False}
         
         @self.app.api_route("/stream", methods=["GET", "HEAD"])
         async def video_stream(request: Request):
             """비디오 스트림 (현재 선택된 카메라)"""
             client_ip = request.client.host
+
+            if not self.camera_manager.streaming_enabled:
+                raise HTTPException(status_code=503, detail="MJPEG streaming disabled")
             
             # HEAD 요청 처리 (하트비트 체크용)
             if request.method == "HEAD":
+                if self.camera_manager.is_warming():
+                    return self._warming_response()
                 if self.camera_manager.is_camera_active():
                     return Response(
                         status_code=200, 
@@ -90,22 +171,15 @@ class CCTVWebAPI:
                 else:
                     return Response(status_code=503, headers={"Content-Type": "text/plain"})
             
-            # 클라이언트 제한 확인
-            if not self.camera_manager.can_accept_client(client_ip):
-                max_clients = self.camera_manager.get_max_clients()
-                raise HTTPException(
-                    status_code=423,
-                    detail=f"Maximum {max_clients} client(s) allowed. Server at capacity."
-                )
-            
+            await self._wait_ready()
+
             # 스트림 시작
-            if not self.camera_manager.ensure_camera_started():
+            if not await self.camera_manager.ensure_camera_started():
                 raise HTTPException(status_code=500, detail="Failed to start camera")
-            
-            return StreamingResponse(
-                self.camera_manager.generate_stream(client_ip),
-                media_type="multipart/x-mixed-replace; boundary=frame"
-            )
+
+            # 클라이언트 제한 확인 (접속 단위 할당량)
+            connection = self._admit(client_ip)
+            return self._stream_response(connection)
         
         @self.app.api_route("/stream/{camera_id}", methods=["GET", "HEAD"])
         async def camera_stream(camera_id: int, request: Request):
@@ -114,9 +188,14 @@ class CCTVWebAPI:
             
             if camera_id not in [0, 1]:
                 raise HTTPException(status_code=400, detail="Invalid camera ID")
+
+            if not self.camera_manager.streaming_enabled:
+                raise HTTPException(status_code=503, detail="MJPEG streaming disabled")
             
             # HEAD 요청 처리
             if request.method == "HEAD":
+                if self.camera_manager.is_warming():
+                    return self._warming_response()
                 if camera_id in self.camera_manager.camera_instances:
                     return Response(
                         status_code=200,
@@ -125,28 +204,226 @@ class CCTVWebAPI:
                 else:
                     return Response(status_code=503, headers={"Content-Type": "text/plain"})
             
+            await self._wait_ready()
+
             # 듀얼 모드가 아닌 경우 활성화
             if not self.camera_manager.dual_mode:
-                if not self.camera_manager.enable_dual_mode():
+                if not await self.camera_manager.run_command(self.camera_manager.enable_dual_mode):
                     raise HTTPException(status_code=500, detail="Failed to enable dual mode")
             
             # 카메라가 활성화되어 있는지 확인
             if camera_id not in self.camera_manager.camera_instances:
                 raise HTTPException(status_code=503, detail=f"Camera {camera_id} not active")
-            
-            return StreamingResponse(
-                self.camera_manager.generate_stream(client_ip, camera_id),
-                media_type="multipart/x-mixed-replace; boundary=frame"
-            )
+
+            # 클라이언트 제한 확인 (접속 단위 할당량)
+            connection = self._admit(client_ip, camera_id)
+            return self._stream_response(connection)
         
         @self.app.get("/api/stats")
         async def get_stream_stats():
             """스트리밍 통계 조회"""
             return self.camera_manager.get_stats()
+
+        @self.app.get("/api/node/status")
+        async def get_node_status(request: Request):
+            """노드 상태 요약 (ETag) - 변경 없으면 304 (헤더만 전송, 계측값은 X-Node-Metrics 헤더로)"""
+            status, etag = self.camera_manager.get_node_status()
+            headers = {"ETag": etag, "Cache-Control": "no-cache"}
+            if request.headers.get("if-none-match") == etag:
+                headers[METRICS_HEADER] = json.dumps(status[METRICS_KEY], separators=(",", ":"))
+                return Response(status_code=304, headers=headers)
+            return JSONResponse(status, headers=headers)
+
+        @self.app.get("/api/config")
+        async def get_config(request: Request):
+            """현재 설정 (스냅샷 버전 ETag - 변경 없으면 304)"""
+            config = self.camera_manager.get_config()
+            etag = f'"config-{config["version"]}"'
+            headers = {"ETag": etag, "Cache-Control": "no-cache"}
+            if request.headers.get("if-none-match") == etag:
+                return Response(status_code=304, headers=headers)
+            return JSONResponse(config, headers=headers)
+
+        @self.app.patch("/api/config")
+        async def patch_config(request: Request, persist: bool = True):
+            """설정 변경 - 본문: {"점.표기.경로": 값, ...}
+
+            전체 검증 후 한 번에 적용 (하나라도 잘못되면 422 + 키별 오류, 기존 설정 유지).
+            If-Match(설정 ETag)를 보내면 그 사이 다른 변경이 있었을 때 412.
+            """
+            try:
+                changes = await request.json()
+            except ValueError:
+                raise HTTPException(status_code=400, detail="Invalid JSON body")
+            if not isinstance(changes, dict) or not changes:
+                raise HTTPException(status_code=400, detail="Body must be a non-empty object of setting paths")
+            if_match = request.headers.get("if-match")
+            if if_match and if_match != f'"config-{self.camera_manager.get_config()["version"]}"':
+                raise HTTPException(status_code=412, detail="Config changed since it was read")
+            # 파일 저장(fsync)은 이벤트 루프 밖에서
+            result = await asyncio.to_thread(self.camera_manager.patch_config, changes, persist)
+            return JSONResponse(result, status_code=200 if result["ok"] else 422,
+                                headers={"ETag": f'"config-{result["version"]}"'})
+
+        @self.app.get("/api/metrics/thermal")
+        async def get_thermal_metrics():
+            """온도 / 스로틀링 기록 (sysfs 백그라운드 샘플링) + 스트리밍 부하 감소 상태"""
+            return self.camera_manager.get_thermal_status()
+
+        @self.app.get("/api/qos")
+        async def get_qos_status():
+            """QoS 단계 / 부하 신호 / 라이브 뷰 부하 감소 결정 기록"""
+            return self.camera_manager.get_qos_status()
+
+        @self.app.get("/api/clients")
+        async def get_clients():
+            """스트림 접속 목록 + 누적 전송량 (용량 계획용)"""
+            return self.camera_manager.clients.snapshot()
+
+        @self.app.get("/api/motion")
+        async def get_motion_status():
+            """모션 감지 상태 / 최근 이벤트 / 분석 CPU 비용"""
+            return self.camera_manager.get_motion_status()
+
+        @self.app.get("/api/metrics/storage")
+        async def get_storage_metrics():
+            """카메라별·일별 녹화량 + 용량 소진 시점 / 보존 기간 달성 예측"""
+            return await asyncio.to_thread(self.camera_manager.get_storage_forecast)
+
+        @self.app.get("/api/storage/staging")
+        async def get_staging_status():
+            """RAM 디스크 스테이징 계층 상태 (예산 사용량 / 이동 대기열 / 직접 기록 강등 여부)"""
+            return self.camera_manager.get_staging_status()
+
+        @self.app.get("/api/recording/profiles")
+        async def get_recording_profiles():
+            """카메라별 녹화 프로필 (전역 설정 상속 + recording.cameras.{id} 재정의)"""
+            return self.camera_manager.get_recording_profiles()
+
+        @self.app.get("/api/recording/policy")
+        async def get_recording_policy():
+            """모션 연동 녹화 정책 상태 / 화질별 녹화량 / 예상 일일 용량"""
+            return self.camera_manager.get_recording_policy_status()
+
+        @self.app.get("/api/segments")
+        async def list_segments(camera: Optional[int] = None, start: Optional[float] = None,
+                                end: Optional[float] = None):
+            """녹화 세그먼트 목록 (start/end: Unix 시각)"""
+            return {"segments": await asyncio.to_thread(self.camera_manager.catalog.segments, camera, start, end)}
+
+        @self.app.get("/api/segments/{camera_id}/{name}/{filename}")
+        async def segment_preview(camera_id: int, name: str, filename: str):
+            """세그먼트 미리보기 - {name}.vtt (WebVTT 색인) / {name}.sprite.jpg (스프라이트 시트)
+
+            VTT의 스프라이트 참조는 상대 경로이므로 같은 URL 디렉토리에서 그대로 로드된다.
+            """
+            segment = await asyncio.to_thread(self.camera_manager.catalog.find, camera_id, name)
+            if segment is None:
+                raise HTTPException(status_code=404, detail="Segment not found")
+            paths = sprite_paths(segment["path"])
+            for kind, media_type in (("vtt", "text/vtt"), ("sprite", "image/jpeg")):
+                if filename == paths[kind].name:
+                    if not paths[kind].exists():
+                        raise HTTPException(status_code=404, detail="Preview not available")
+                    return FileResponse(paths[kind], media_type=media_type)
+            raise HTTPException(status_code=404, detail="Unknown preview file")
+
+        @self.app.get("/api/events/search")
+        async def search_events(threshold: float = 0.02, start: Optional[float] = None,
+                                end: Optional[float] = None, cameras: Optional[str] = None,
+                                zone: Optional[str] = None, min_duration: int = 1):
+            """모션 활동 구간 검색 - 세그먼트별 활동 요약만 사용 (영상 디코딩 없음)
+
+            cameras: 쉼표 구분 카메라 ID (예: "0,1"), 생략 시 전체
+            """
+            try:
+                camera_ids = [int(c) for c in cameras.split(",")] if cameras else None
+            except ValueError:
+                raise HTTPException(status_code=400, detail="Invalid camera list")
+            started = time.perf_counter()
+            ranges = await asyncio.to_thread(
+                self.camera_manager.catalog.search, threshold=threshold, start=start, end=end, cameras=camera_ids,
+                zone=zone, min_duration=min_duration
+            )
+            return {
+                "ranges": ranges,
+                "query_ms": round((time.perf_counter() - started) * 1000, 2)
+            }
+
+        @self.app.get("/api/export")
+        async def export_clip(camera: int, start: str, end: str):
+            """구간 클립 내보내기 (start/end: Unix 시각 또는 ISO 8601)
+
+            짧은 구간은 생성과 동시에 MP4로 전송, 긴 구간은 백그라운드 작업 생성 후 202 반환
+            """
+            exporter = self.camera_manager.exporter
+            start_ts, end_ts = _parse_time(start), _parse_time(end)
+            try:
+                if end_ts - start_ts > exporter.stream_max_seconds:
+                    job = await asyncio.to_thread(exporter.submit_job, camera, start_ts, end_ts)
+                    return JSONResponse(status_code=202, content={
+                        **job.to_dict(), "status_url": f"/api/export/jobs/{job.job_id}"
+                    })
+                export_stream = await asyncio.to_thread(exporter.open_stream, camera, start_ts, end_ts)
+            except ExportError as e:
+                raise _export_error(e)
+
+            filename = (f"cam{camera}_{datetime.fromtimestamp(start_ts).strftime('%Y%m%d_%H%M%S')}"
+                        f"-{datetime.fromtimestamp(end_ts).strftime('%H%M%S')}.mp4")
+            return StreamingResponse(
+                iter(export_stream),
+                media_type="video/mp4",
+                headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+                background=BackgroundTask(export_stream.close)
+            )
+
+        @self.app.post("/api/export/jobs")
+        async def create_export_job(camera: int, start: str, end: str):
+            """백그라운드 내보내기 작업 생성"""
+            try:
+                job = await asyncio.to_thread(self.camera_manager.exporter.submit_job,
+                                              camera, _parse_time(start), _parse_time(end))
+            except ExportError as e:
+                raise _export_error(e)
+            return JSONResponse(status_code=202, content={
+                **job.to_dict(), "status_url": f"/api/export/jobs/{job.job_id}"
+            })
+
+        @self.app.get("/api/export/jobs")
+        async def list_export_jobs():
+            """내보내기 작업 목록"""
+            return {"jobs": self.camera_manager.exporter.list_jobs()}
+
+        @self.app.get("/api/export/jobs/{job_id}")
+        async def get_export_job(job_id: str):
+            """내보내기 작업 진행률 조회"""
+            job = self.camera_manager.exporter.get_job(job_id)
+            if job is None:
+                raise HTTPException(status_code=404, detail="Export job not found")
+            return job.to_dict()
+
+        @self.app.get("/api/export/jobs/{job_id}/download")
+        async def download_export(job_id: str):
+            """완료된 내보내기 결과 다운로드"""
+            job = self.camera_manager.exporter.get_job(job_id)
+            if job is None:
+                raise HTTPException(status_code=404, detail="Export job not found")
+            if job.status != "done":
+                raise HTTPException(status_code=409, detail=f"Export job is {job.status}")
+            return FileResponse(job.output, media_type="video/mp4", filename=job.output.name)
+
+        @self.app.get("/api/startup")
+        async def get_startup_timing():
+            """시작 시간 분석 (imports / 카메라 open·configure / 첫 프레임 / 녹화 시작)"""
+            return {
+                "state": self.camera_manager.startup_state,
+                **startup_profiler.summary()
+            }
         
         @self.app.post("/api/resolution/{resolution}")
         async def change_resolution(resolution: str):
             """해상도 변경"""
+            await self._wait_ready()
             success = await self.camera_manager.change_resolution(resolution)
             
             if success:
@@ -154,6 +431,21 @@ class CCTVWebAPI:
             else:
                 raise HTTPException(status_code=500, detail="Failed to change resolution")
         
+        @self.app.post("/api/reconfigure/{camera_id}")
+        async def reconfigure_camera(camera_id: int, request: ReconfigureRequest):
+            """카메라 설정 실시간 변경 (렌디션 / 비트레이트 / 프레임레이트 / 센서 모드)"""
+            if camera_id not in [0, 1]:
+                raise HTTPException(status_code=400, detail="Invalid camera ID")
+
+            await self._wait_ready()
+
+            result = await self.camera_manager.reconfigure(camera_id, **dict(request))
+            if not result["success"]:
+                error = result.get("error", "Reconfiguration failed")
+                status_code = 400 if error.startswith("Unsupported") else 500
+                raise HTTPException(status_code=status_code, detail=error)
+            return result
+        
         @self.app.get("/exit")
         async def exit_system():
             """시스템 종료 페이지"""
@@ -169,7 +461,7 @@ class CCTVWebAPI:
             #Uvicorn 서버 즉시 종료
             def force_shutdown():
                 time.sleep(1)
-                os._exit(0)  # 즉시 종료
+                self.exit_process()  # 즉시 종료
             
             shutdown_thread = threading.Thread(target=force_shutdown)
             shutdown_thread.daemon = True
@@ -0,0 +1,501 @@
+"""
+허브 서버 모듈 (여러 엣지 노드 통합)
+Hub mode: pooled async HTTP connections to edge nodes, concurrent fan-out queries and shared stream relays
+"""
+
+import asyncio
+import json
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, Any, List, Optional, Tuple
+
+import httpx
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import StreamingResponse
+
+logger = logging.getLogger(__name__)
+
+# 엣지 노드 MJPEG 경계 (webmain.generate_stream 과 동일)
+BOUNDARY = b"--frame\r\n"
+HEADER_END = b"\r\n\r\n"
+# 업스트림 파싱 버퍼 상한 (프레임 경계를 찾지 못하면 버림)
+MAX_BUFFER_SIZE = 4 * 1024 * 1024
+# 하트비트를 이 횟수만큼 놓치면 오프라인 판정
+HEARTBEAT_MISSES = 3
+# 노드 상태의 계측값 블록 / 304 응답 헤더 (node_status 와 동일 - ETag에 포함되지 않아 따로 갱신)
+METRICS_KEY = "metrics"
+METRICS_HEADER = "X-Node-Metrics"
+
+
+class EdgeNode:
+    """엣지 노드 1대에 대한 영구 연결 풀 + 짧은 응답 캐시
+
+    - httpx.AsyncClient 1개를 재사용 (keep-alive, 노드별 최대 연결 수 제한)
+    - 같은 요청이 동시에 들어오면 업스트림 호출 1번으로 합침 (in-flight 공유)
+    - 성공 응답은 cache_ttl초 동안 캐시
+    """
+
+    def __init__(self, name: str, url: str, timeout: float, cache_ttl: float, max_connections: int):
+        self.name = name
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+        self.cache_ttl = cache_ttl
+        self.client = httpx.AsyncClient(
+            base_url=self.url,
+            timeout=httpx.Timeout(timeout),
+            limits=httpx.Limits(max_connections=max_connections,
+                                max_keepalive_connections=max_connections)
+        )
+        self._cache: Dict[Tuple, Tuple[float, Any]] = {}
+        self._inflight: Dict[Tuple, asyncio.Future] = {}
+
+        self.online: Optional[bool] = None
+        self.last_seen: Optional[float] = None
+        self.latency_ms: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.requests = 0
+        self.cache_hits = 0
+        # 노드 상태 요약 (조건부 요청 - 변경 없으면 304)
+        self.status: Optional[Dict[str, Any]] = None
+        self.status_etag: Optional[str] = None
+        self.not_modified = 0
+
+    async def get_json(self, path: str, params: Optional[Dict[str, Any]] = None) -> Any:
+        """GET 요청 JSON 응답 (캐시 / 동시 요청 합치기) - 실패 시 예외"""
+        params = {k: v for k, v in (params or {}).items() if v is not None}
+        key = (path, tuple(sorted(params.items())))
+        cached = self._cache.get(key)
+        if cached is not None and time.monotonic() - cached[0] < self.cache_ttl:
+            self.cache_hits += 1
+            return cached[1]
+
+        pending = self._inflight.get(key)
+        if pending is not None:
+            return await asyncio.shield(pending)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            data = await self._fetch(path, params)
+            self._cache[key] = (time.monotonic(), data)
+            future.set_result(data)
+            return data
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # 대기자가 없을 때 "never retrieved" 경고 방지
+            raise
+        finally:
+            del self._inflight[key]
+
+    async def _fetch(self, path: str, params: Dict[str, Any]) -> Any:
+        self.requests += 1
+        started = time.perf_counter()
+        try:
+            response = await self.client.get(path, params=params)
+            response.raise_for_status()
+            data = response.json()
+        except httpx.HTTPStatusError as e:
+            # 노드는 응답함 (요청 오류) - 온라인 유지
+            self._mark_seen(started)
+            self.last_error = f"HTTP {e.response.status_code}"
+            raise
+        except Exception as e:
+            self.online = False
+            self.last_error = str(e) or type(e).__name__
+            raise
+        self._mark_seen(started)
+        self.last_error = None
+        return data
+
+    async def get_node_status(self) -> Optional[Dict[str, Any]]:
+        """노드 상태 요약 - ETag 조건부 요청 (변경 없으면 본문 없이 304)"""
+        headers = {"If-None-Match": self.status_etag} if self.status_etag else {}
+        self.requests += 1
+        started = time.perf_counter()
+        try:
+            response = await self.client.get("/api/node/status", headers=headers)
+            if response.status_code == 304:
+                self.not_modified += 1
+                metrics = response.headers.get(METRICS_HEADER)
+                if metrics and self.status is not None:
+                    self.status[METRICS_KEY] = json.loads(metrics)
+            else:
+                response.raise_for_status()
+                self.status = response.json()
+                self.status_etag = response.headers.get("ETag")
+        except Exception as e:
+            self.online = False
+            self.last_error = str(e) or type(e).__name__
+            return None
+        self._mark_seen(started)
+        self.last_error = None
+        return self.status
+
+    def _mark_seen(self, started: float):
+        self.online = True
+        self.last_seen = time.time()
+        self.latency_ms = round((time.perf_counter() - started) * 1000, 1)
+
+    def get_status(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "url": self.url,
+            "online": self.online,
+            "last_seen": self.last_seen,
+            "latency_ms": self.latency_ms,
+            "error": self.last_error,
+            "requests": self.requests,
+            "cache_hits": self.cache_hits,
+            "not_modified": self.not_modified
+        }
+
+    async def close(self):
+        await self.client.aclose()
+
+
+class StreamRelay:
+    """노드 카메라 1대의 업스트림 스트림 1개를 N명의 허브 시청자에게 분배
+
+    업스트림 multipart 응답을 프레임 단위로 파싱해 최신 프레임만 보관하고,
+    시청자는 각자 속도로 최신 프레임을 받는다 (느린 시청자는 중간 프레임 건너뜀).
+    마지막 시청자가 떠난 뒤 idle_timeout초가 지나면 업스트림 연결을 닫는다.
+    """
+
+    def __init__(self, node: EdgeNode, camera_id: int, idle_timeout: float):
+        self.node = node
+        self.camera_id = camera_id
+        self.idle_timeout = idle_timeout
+
+        self.part: Optional[bytes] = None      # 최신 프레임 (경계 + 헤더 + JPEG + CRLF)
+        self.sequence = 0
+        self.subscribers = 0
+        self.closed = False
+        self.error: Optional[str] = None
+        self.status_code: Optional[int] = None
+        self.retry_after: Optional[str] = None
+        self.frames_in = 0
+        self.bytes_in = 0
+        self.frames_out = 0
+        self.started = time.time()
+
+        self._condition = asyncio.Condition()
+        self._connected = asyncio.Event()
+        self._idle_since = time.monotonic()
+        self._task = asyncio.create_task(self._run())
+
+    async def wait_connected(self) -> bool:
+        """업스트림 응답 수신 대기 - 연결 성공 여부"""
+        try:
+            await asyncio.wait_for(self._connected.wait(), self.node.timeout)
+        except asyncio.TimeoutError:
+            self.error = "Upstream connect timeout"
+            await self.close()
+        return not self.closed
+
+    async def _run(self):
+        path = f"/stream/{self.camera_id}"
+        try:
+            # 프레임 간격이 길어질 수 있으므로 읽기 타임아웃은 여유 있게
+            timeout = httpx.Timeout(self.node.timeout, read=max(10.0, self.node.timeout * 5))
+            async with self.node.client.stream("GET", path, timeout=timeout) as response:
+                self.status_code = response.status_code
+                if response.status_code != 200:
+                    self.error = f"Upstream HTTP {response.status_code}"
+                    self.retry_after = response.headers.get("Retry-After")
+                    return
+                self._connected.set()
+                logger.info(f"[HUB] 중계 시작: {self.node.name}/카메라 {self.camera_id}")
+
+                buffer = bytearray()
+                async for chunk in response.aiter_bytes():
+                    self.bytes_in += len(chunk)
+                    buffer += chunk
+                    await self._parse(buffer)
+                    if len(buffer) > MAX_BUFFER_SIZE:
+                        buffer.clear()
+                    if self.subscribers == 0 and time.monotonic() - self._idle_since > self.idle_timeout:
+                        logger.info(f"[HUB] 시청자 없음 - 중계 종료: {self.node.name}/카메라 {self.camera_id}")
+                        break
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            self.error = str(e) or type(e).__name__
+            logger.warning(f"[HUB] 중계 오류 {self.node.name}/카메라 {self.camera_id}: {self.error}")
+        finally:
+            self.closed = True
+            self._connected.set()
+            async with self._condition:
+                self._condition.notify_all()
+
+    async def _parse(self, buffer: bytearray):
+        """버퍼에서 완성된 프레임을 꺼내 게시 (가장 최근 것만 유지)"""
+        latest = None
+        while True:
+            start = buffer.find(BOUNDARY)
+            if start < 0:
+                break
+            header_end = buffer.find(HEADER_END, start)
+            if header_end < 0:
+                break
+            length = None
+            for line in bytes(buffer[start + len(BOUNDARY):header_end]).split(b"\r\n"):
+                name, _, value = line.partition(b":")
+                if name.strip().lower() == b"content-length":
+                    length = int(value.strip())
+            if length is None:
+                del buffer[:header_end + len(HEADER_END)]  # 길이 없는 파트는 건너뜀
+                continue
+            frame_end = header_end + len(HEADER_END) + length + 2  # JPEG + CRLF
+            if len(buffer) < frame_end:
+                break
+            latest = bytes(buffer[start:frame_end])
+            del buffer[:frame_end]
+            self.frames_in += 1
+        if latest is not None:
+            async with self._condition:
+                self.part = latest
+                self.sequence += 1
+                self._condition.notify_all()
+
+    async def frames(self):
+        """시청자 1명의 프레임 스트림 (비동기 제너레이터)"""
+        self.subscribers += 1
+        sequence = self.sequence
+        try:
+            while True:
+                async with self._condition:
+                    await self._condition.wait_for(lambda: self.sequence != sequence or self.closed)
+                    if self.sequence == sequence:
+                        break  # 업스트림 종료
+                    sequence = self.sequence
+                    part = self.part
+                self.frames_out += 1
+                yield part
+        finally:
+            self.subscribers -= 1
+            if self.subscribers == 0:
+                self._idle_since = time.monotonic()
+
+    async def close(self):
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+
+    def get_status(self) -> Dict[str, Any]:
+        return {
+            "node": self.node.name,
+            "camera_id": self.camera_id,
+            "subscribers": self.subscribers,
+            "closed": self.closed,
+            "error": self.error,
+            "frames_in": self.frames_in,
+            "frames_out": self.frames_out,
+            "bytes_in": self.bytes_in,
+            "uptime": round(time.time() - self.started, 1)
+        }
+
+
+class HubAPI:
+    """허브 웹 API - 여러 엣지 노드의 통계/카탈로그/스트림 통합
+
+    config (config.json "hub"):
+        nodes: [{"name": "...", "url": "http://host:8001"}, ...]
+        timeout: 노드 요청 타임아웃 (초), cache_ttl: 응답 캐시 시간 (초)
+        max_connections_per_node: 노드별 연결 풀 크기, stream_idle_timeout: 시청자 없는 중계 유지 시간
+    """
+
+    def __init__(self, config: Dict[str, Any]):
+        self.app = FastAPI(lifespan=self._lifespan)
+        self.timeout = float(config.get('timeout', 2.0))
+        cache_ttl = float(config.get('cache_ttl', 2.0))
+        max_connections = int(config.get('max_connections_per_node', 8))
+        self.stream_idle_timeout = float(config.get('stream_idle_timeout', 5))
+
+        self.nodes: Dict[str, EdgeNode] = {}
+        for entry in config.get('nodes', []):
+            self.nodes[entry['name']] = EdgeNode(entry['name'], entry['url'], self.timeout,
+                                                 cache_ttl, max_connections)
+        self.relays: Dict[Tuple[str, int], StreamRelay] = {}
+        # 노드가 보낸 하트비트 {노드 이름: {...}} - 설정에 없는 노드도 등록
+        self.heartbeats: Dict[str, Dict[str, Any]] = {}
+        self._relay_lock: Optional[asyncio.Lock] = None
+
+        logger.info(f"[HUB] 엣지 노드 {len(self.nodes)}대: {', '.join(self.nodes) or '-'}")
+        self.setup_routes()
+
+    def _get_node(self, name: str) -> EdgeNode:
+        node = self.nodes.get(name)
+        if node is None:
+            raise HTTPException(status_code=404, detail=f"Unknown node: {name}")
+        return node
+
+    async def _gather(self, path: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """모든 노드에 동시 요청 → {노드 이름: 응답 또는 None}, 오류는 errors에"""
+        names = list(self.nodes)
+        results = await asyncio.gather(
+            *(self.nodes[name].get_json(path, params) for name in names),
+            return_exceptions=True
+        )
+        data, errors = {}, {}
+        for name, result in zip(names, results):
+            if isinstance(result, Exception):
+                data[name] = None
+                errors[name] = self.nodes[name].last_error or str(result)
+            else:
+                data[name] = result
+        return {"data": data, "errors": errors}
+
+    async def _get_relay(self, node: EdgeNode, camera_id: int) -> StreamRelay:
+        """노드/카메라별 중계 (없거나 종료됐으면 새로 연결)"""
+        if self._relay_lock is None:
+            self._relay_lock = asyncio.Lock()
+        async with self._relay_lock:
+            key = (node.name, camera_id)
+            relay = self.relays.get(key)
+            if relay is None or relay.closed:
+                relay = StreamRelay(node, camera_id, self.stream_idle_timeout)
+                self.relays[key] = relay
+            return relay
+
+    @asynccontextmanager
+    async def _lifespan(self, app):
+        yield
+        await self.close()
+
+    def _heartbeat_fresh(self, name: str) -> bool:
+        beat = self.heartbeats.get(name)
+        return beat is not None and time.time() - beat["last_seen"] <= beat["interval"] * HEARTBEAT_MISSES
+
+    async def _node_health(self, name: str) -> Dict[str, Any]:
+        """노드 1대 상태 - 최근 하트비트가 있으면 그대로, 없으면 조건부 폴링"""
+        beat = self.heartbeats.get(name)
+        if self._heartbeat_fresh(name):
+            return {"name": name, "online": True, "source": "heartbeat",
+                    "last_seen": beat["last_seen"], "status": beat["status"]}
+        node = self.nodes.get(name)
+        if node is None:
+            return {"name": name, "online": False, "source": "heartbeat",
+                    "last_seen": beat["last_seen"] if beat else None,
+                    "status": beat["status"] if beat else None}
+        status = await node.get_node_status()
+        return {"name": name, "online": status is not None, "source": "poll",
+                "last_seen": node.last_seen, "status": node.status, "error": node.last_error}
+
+    async def close(self):
+        for relay in list(self.relays.values()):
+            await relay.close()
+        for node in self.nodes.values():
+            await node.close()
+
+    def setup_routes(self):
+        """라우트 설정"""
+
+        @self.app.get("/api/nodes")
+        async def list_nodes():
+            """노드 목록 + 상태 (통계 동시 조회)"""
+            gathered = await self._gather("/api/stats")
+            nodes = []
+            for name, node in self.nodes.items():
+                status = node.get_status()
+                status["stats"] = gathered["data"][name]
+                nodes.append(status)
+            return {"nodes": nodes, "online": sum(1 for n in nodes if n["online"])}
+
+        @self.app.post("/api/hub/heartbeat")
+        async def heartbeat(request: Request):
+            """노드 하트비트 수신 - 상태가 바뀐 경우에만 본문에 상태 요약 포함
+
+            허브가 해당 ETag의 상태를 모르면 need_status=true → 노드가 다음 하트비트에 전체 상태 전송
+            """
+            body = await request.json()
+            name = body.get("node")
+            if not name:
+                raise HTTPException(status_code=400, detail="node is required")
+            beat = self.heartbeats.setdefault(name, {"status": None, "etag": None, "count": 0})
+            if "status" in body:
+                beat["status"] = body["status"]
+                beat["etag"] = body.get("etag")
+            if body.get(METRICS_KEY) is not None and beat["status"] is not None:
+                beat["status"][METRICS_KEY] = body[METRICS_KEY]
+            beat["last_seen"] = time.time()
+            beat["interval"] = float(body.get("interval", 10))
+            beat["address"] = f"{request.client.host}:{body.get('port')}"
+            beat["count"] += 1
+            return {"need_status": beat["etag"] != body.get("etag")}
+
+        @self.app.get("/api/hub/health")
+        async def hub_health():
+            """전체 노드 온라인/오프라인 + 상태 요약 (하트비트 우선, 없으면 ETag 조건부 폴링)"""
+            names = list(self.nodes) + [name for name in self.heartbeats if name not in self.nodes]
+            nodes = await asyncio.gather(*(self._node_health(name) for name in names))
+            return {"nodes": nodes, "online": sum(1 for n in nodes if n["online"]), "total": len(nodes)}
+
+        @self.app.get("/api/nodes/{name}/stats")
+        async def node_stats(name: str):
+            """노드 1대 통계"""
+            node = self._get_node(name)
+            try:
+                return await node.get_json("/api/stats")
+            except Exception:
+                raise HTTPException(status_code=502, detail=node.last_error or "Node unreachable")
+
+        @self.app.get("/api/hub/segments")
+        async def hub_segments(camera: Optional[int] = None, start: Optional[float] = None,
+                               end: Optional[float] = None):
+            """전체 노드 녹화 세그먼트 (노드 이름 포함, 시작 시각순)"""
+            gathered = await self._gather("/api/segments", {"camera": camera, "start": start, "end": end})
+            segments = []
+            for name, data in gathered["data"].items():
+                for segment in (data or {}).get("segments", []):
+                    segments.append(dict(segment, node=name))
+            segments.sort(key=lambda s: s["start"])
+            return {"segments": segments, "errors": gathered["errors"]}
+
+        @self.app.get("/api/hub/events/search")
+        async def hub_search(threshold: float = 0.02, start: Optional[float] = None,
+                             end: Optional[float] = None, cameras: Optional[str] = None,
+                             zone: Optional[str] = None, min_duration: int = 1):
+            """전체 노드 모션 활동 구간 검색 (노드별 검색을 동시 실행 후 병합)"""
+            started = time.perf_counter()
+            gathered = await self._gather("/api/events/search", {
+                "threshold": threshold, "start": start, "end": end,
+                "cameras": cameras, "zone": zone, "min_duration": min_duration
+            })
+            ranges: List[Dict[str, Any]] = []
+            for name, data in gathered["data"].items():
+                for item in (data or {}).get("ranges", []):
+                    ranges.append(dict(item, node=name))
+            ranges.sort(key=lambda r: r["start"])
+            return {
+                "ranges": ranges,
+                "errors": gathered["errors"],
+                "query_ms": round((time.perf_counter() - started) * 1000, 2)
+            }
+
+        @self.app.get("/hub/stream/{name}/{camera_id}")
+        async def hub_stream(name: str, camera_id: int, request: Request):
+            """노드 카메라 스트림 중계 (시청자 수와 무관하게 노드당 업스트림 1개)"""
+            node = self._get_node(name)
+            relay = await self._get_relay(node, camera_id)
+            if not await relay.wait_connected():
+                status = relay.status_code if relay.status_code in (423, 429, 503) else 502
+                raise HTTPException(
+                    status_code=status,
+                    detail=relay.error or "Upstream stream unavailable",
+                    headers={"Retry-After": relay.retry_after} if relay.retry_after else None
+                )
+            logger.info(f"[HUB] 시청자 연결: {request.client.host} → {name}/카메라 {camera_id}")
+            return StreamingResponse(relay.frames(), media_type="multipart/x-mixed-replace; boundary=frame")
+
+        @self.app.get("/api/hub/streams")
+        async def hub_streams():
+            """중계 상태 (업스트림 수 vs 시청자 수)"""
+            relays = [relay.get_status() for relay in self.relays.values() if not relay.closed]
+            return {
+                "relays": relays,
+                "upstreams": len(relays),
+                "viewers": sum(r["subscribers"] for r in relays)
+            }
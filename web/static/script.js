@@ -264,17 +264,17 @@ function updateStats() {
         });
 }
 
-// 스트림 활성 상태 체크
+// 스트림 활성 상태 체크 (노드 상태 요약 - 변경 없으면 서버가 304로 응답)
 function checkStreamActivity() {
     console.log('[HEARTBEAT] 상태 체크 시작, 모드:', currentViewMode);
 
-    // 현재 뷰 모드에 따라 적절한 스트림 체크
-    const checkUrl = currentViewMode === 'dual' ? '/stream/0' : '/stream';
-
-    fetch(checkUrl, { method: 'HEAD' })
-        .then(response => {
-            console.log('[HEARTBEAT] 응답 상태:', response.status);
+    // 현재 뷰 모드에 따라 확인할 카메라
+    const cameraId = currentViewMode === 'dual' ? 0 : (currentCamera ?? 0);
 
+    // cache: 'no-cache' → 브라우저가 If-None-Match로 재검증, 304면 캐시된 본문 사용
+    fetch('/api/node/status', { cache: 'no-cache' })
+        .then(response => response.ok ? response.json() : Promise.reject(response.status))
+        .then(status => {
             const indicator = document.getElementById('heartbeat-indicator');
             const text = document.getElementById('heartbeat-text');
             const statusElement = document.getElementById('stream-status');
@@ -284,30 +284,33 @@ function checkStreamActivity() {
                 return;
             }
 
-            if (response.status === 200) {
+            const camera = status.cameras[String(cameraId)] || {};
+            const live = camera.state === 'streaming' || camera.state === 'recording';
+
+            if (status.state === 'warming') {
+                indicator.className = 'heartbeat-indicator yellow';
+                text.textContent = 'WARMING';
+                statusElement.textContent = '카메라 준비 중';
+                statusElement.style.color = '#ffc107';
+                console.log('[HEARTBEAT] WARMING 상태');
+            } else if (live) {
                 indicator.className = 'heartbeat-indicator green';
                 text.textContent = 'LIVE';
-                statusElement.textContent = '연속 녹화 중';
+                statusElement.textContent = camera.recording ? '연속 녹화 중' : '스트리밍 중';
                 statusElement.style.color = '#27ae60';
                 console.log('[HEARTBEAT] LIVE 상태');
-            } else if (response.status === 503) {
+            } else if (camera.state === 'starting' || camera.state === 'reconfiguring') {
+                indicator.className = 'heartbeat-indicator yellow';
+                text.textContent = 'DELAY';
+                statusElement.textContent = '지연';
+                statusElement.style.color = '#ffc107';
+                console.log('[HEARTBEAT] DELAY 상태:', camera.state);
+            } else {
                 indicator.className = 'heartbeat-indicator black';
                 text.textContent = 'OFFLINE';
                 statusElement.textContent = '오프라인';
                 statusElement.style.color = '#6c757d';
                 console.log('[HEARTBEAT] OFFLINE 상태');
-            } else if (response.status === 423) {
-                indicator.className = 'heartbeat-indicator yellow';
-                text.textContent = 'BUSY';
-                statusElement.textContent = '접속 제한';
-                statusElement.style.color = '#ffc107';
-                console.log('[HEARTBEAT] BUSY 상태');
-            } else {
-                indicator.className = 'heartbeat-indicator yellow';
-                text.textContent = 'DELAY';
-                statusElement.textContent = '지연';
-                statusElement.style.color = '#ffc107';
-                console.log('[HEARTBEAT] DELAY 상태:', response.status);
             }
         })
         .catch(error => {
@@ -4,41 +4,161 @@ Picamera2 기반 CCTV 시스템 - 통합 버전
 스트리밍과 녹화 기능이 통합된 최적화 버전
 """
 
+# 시작 시간 측정기 (가장 먼저 임포트)
+from startup_profile import startup_profiler
+
+import argparse
 import asyncio
 import signal
 import sys
 import time
 import threading
 import atexit
-import io
-from datetime import datetime
+import shutil
+import socket
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Dict, Any, Set
+from typing import Dict, Any, List, Set
 import logging
-import uvicorn
-
-# Picamera2 imports
-try:
-    from picamera2 import Picamera2
-    from picamera2.encoders import H264Encoder
-    from picamera2.outputs import FfmpegOutput
-    import libcamera
-    import cv2
-except ImportError as e:
-    print(f"[ERROR] Picamera2 not installed: {e}")
-    print("[INSTALL] Run: sudo apt install -y python3-picamera2")
-    sys.exit(1)
-
-# 웹 API 임포트
-from web.api import CCTVWebAPI
 
 # 설정 관리자 임포트
-from config_manager import config_manager
+from config_manager import config_manager, requires_restart, check_setting, PROFILE_KEYS
+
+# 카메라 상태 머신 / 명령 큐
+from camera_control import CameraState, CameraSlot, CameraCommandQueue
+
+# 스트림 접속 레지스트리
+from client_registry import ClientRegistry, StreamConnection
+
+# 모션 연동 녹화 정책
+from recording_policy import RecordingPolicy
+
+# 세그먼트 카탈로그 + 모션 활동 인덱스
+from segment_catalog import SegmentCatalog
+
+# 클립 내보내기 (카탈로그 기반 스트림 복사)
+from clip_export import ClipExporter
+
+# 노드 상태 요약 (ETag) + 허브 하트비트
+from node_status import HeartbeatSender, status_digest, METRICS_KEY
+
+# 온도 / 스로틀링 모니터 (sysfs)
+from thermal_monitor import ThermalMonitor
+
+# QoS 컨트롤러 (라이브 뷰 단계적 부하 감소 - 녹화 우선)
+from qos_controller import QoSController
 
+# RAM 디스크 스테이징 저장 계층 (진행 중 세그먼트 → 영구 저장소 백그라운드 이동)
+from storage_tier import StagingStore
+
+# 저장 용량 집계 / 소진 시점 예측
+from storage_forecast import StorageForecaster
+
+# MJPEG 프레임 브로드캐스트 (카메라당 1회 인코딩, 시청자 간 버퍼 공유)
+from mjpeg_stream import FrameBroadcaster, FrameSubscription, StreamEnded
 # 로깅 설정
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# 무거운 의존성은 해당 서브시스템이 활성화될 때만 로드
+# (cv2는 수백 ms / 수십 MB - MJPEG 스트리밍 비활성화 시 로드하지 않음)
+Picamera2 = None
+H264Encoder = None
+FfmpegOutput = None
+MappedArray = None
+libcamera = None
+PrivacyMask = None
+cv2 = None
+MotionDetector = None
+ThumbnailSampler = None
+_import_lock = threading.Lock()
+
+
+def load_camera_modules(backend: str = None):
+    """Picamera2 / libcamera 로드 (카메라 서브시스템)
+
+    backend: "picamera2" (기본) 또는 "synthetic" (하드웨어 없는 합성 카메라)
+    """
+    global Picamera2, H264Encoder, FfmpegOutput, MappedArray, libcamera, PrivacyMask
+    if backend is None:
+        backend = config_manager.get('system.camera_backend', 'picamera2')
+    with _import_lock:
+        if Picamera2 is not None:
+            return
+        if backend == "synthetic":
+            with startup_profiler.measure("imports.synthetic_camera"):
+                import synthetic_camera as _libcamera
+                from synthetic_camera import SyntheticPicamera2 as _Picamera2
+                from synthetic_camera import SyntheticH264Encoder as _H264Encoder
+                from synthetic_camera import SyntheticFfmpegOutput as _FfmpegOutput
+                from synthetic_camera import MappedArray as _MappedArray
+            logger.info("[INIT] 합성 카메라 백엔드 사용 (하드웨어 없음)")
+        else:
+            with startup_profiler.measure("imports.picamera2"):
+                from picamera2 import Picamera2 as _Picamera2
+                from picamera2 import MappedArray as _MappedArray
+                from picamera2.encoders import H264Encoder as _H264Encoder
+                from picamera2.outputs import FfmpegOutput as _FfmpegOutput
+                import libcamera as _libcamera
+        # 프라이버시 마스크 (numpy - 카메라 백엔드와 함께 로드, 녹화/스트림 프레임에 제자리 적용)
+        from privacy_mask import PrivacyMask as _PrivacyMask
+        H264Encoder, FfmpegOutput, MappedArray, libcamera = _H264Encoder, _FfmpegOutput, _MappedArray, _libcamera
+        PrivacyMask = _PrivacyMask
+        Picamera2 = _Picamera2
+
+
+def load_mjpeg_modules():
+    """OpenCV 로드 (MJPEG 스트리밍 서브시스템)"""
+    global cv2
+    with _import_lock:
+        if cv2 is not None:
+            return
+        with startup_profiler.measure("imports.cv2"):
+            import cv2 as _cv2
+        cv2 = _cv2
+
+
+def load_motion_modules():
+    """모션 감지 엔진 로드 (NumPy)"""
+    global MotionDetector
+    with _import_lock:
+        if MotionDetector is not None:
+            return
+        with startup_profiler.measure("imports.motion"):
+            from motion_detector import MotionDetector as _MotionDetector
+        MotionDetector = _MotionDetector
+
+
+def load_thumbnail_modules():
+    """세그먼트 미리보기(스프라이트) 생성기 로드 (OpenCV)"""
+    global ThumbnailSampler
+    with _import_lock:
+        if ThumbnailSampler is not None:
+            return
+        with startup_profiler.measure("imports.thumbnails"):
+            from thumbnails import ThumbnailSampler as _ThumbnailSampler
+        ThumbnailSampler = _ThumbnailSampler
+
+
+# 정렬된 세그먼트의 최소 길이 (이보다 짧게 남으면 다음 구간과 합침)
+MIN_SEGMENT_SECONDS = 2.0
+# 스테이징 예산 예약 시 예상 세그먼트 크기 여유 (비트레이트 변동 / 컨테이너 오버헤드)
+STAGING_SIZE_MARGIN = 1.25
+
+
+def segment_window(timestamp: float, duration: float):
+    """timestamp가 속한 세그먼트 구간 (자정 기준 duration 배수로 정렬, 자정에서 강제 분할)
+
+    반환: (구간 시작, 구간 끝) - Unix 시각
+    """
+    midnight = datetime.fromtimestamp(timestamp).replace(hour=0, minute=0, second=0, microsecond=0)
+    day_start = midnight.timestamp()
+    day_end = (midnight + timedelta(days=1)).timestamp()
+    index = int((timestamp - day_start) // duration)
+    slot_start = day_start + index * duration
+    return slot_start, min(slot_start + duration, day_end)
+
 
 class GPURecorder:
     """GPU 가속 H.264 녹화 클래스 - rec_dual.py 방식"""
@@ -52,6 +172,9 @@ class GPURecorder:
         self.save_dir = Path(storage_path)
         self.save_dir.mkdir(parents=True, exist_ok=True)
 
+        # RAM 디스크 스테이징 계층 (CameraManager가 설정, None이면 save_dir에 직접 기록)
+        self.staging = None
+
         # 녹화 상태
         self.is_recording = False
         self.encoder = None
@@ -60,161 +183,327 @@ class GPURecorder:
         self.recording_thread = None
         self.continuous_recording = False
 
+        # 인코더 시작/중지 보호 (녹화 스레드 ↔ 중지 요청 스레드)
+        self._encoder_lock = threading.Lock()
+        # 세그먼트 대기 중단용 이벤트 (중지 요청 시 즉시 깨어남)
+        self._stop_event = threading.Event()
+        # 세그먼트 대기를 깨우는 이벤트 (중지 또는 세그먼트 조기 종료 요청)
+        self._wake_event = threading.Event()
+        self._cut_requested = False
+
+        # 실시간 변경된 인코딩 설정 (None이면 설정 파일 값 사용)
+        # 다음 세그먼트 경계에서 적용 - 인코더는 세그먼트마다 새로 생성됨
+        self.bitrate_override = None
+        self.framerate_override = None
+        # 센서 프레임레이트 (인코더 프레임 건너뛰기 계산용)
+        self.sensor_framerate = config_manager.get_framerate(camera_id)
+        # 녹화 정책의 유휴 화질 (None이면 최고 화질) - {"bitrate": int, "framerate": int}
+        self.idle_encoding = None
+        self.current_quality = "full"
+        self._frame_skip_warned = False
+
+        # 세그먼트 전환 간격 측정 (이전 인코더 중지 → 다음 인코더 시작)
+        self._last_encoder_stop = None
+        self.last_segment_gap = None
+
         # 통계
         self.recording_count = 0
         self.success_count = 0
         self.fail_count = 0
         self.total_size = 0
+        # 화질별 누적 녹화량 (저장 공간 절감 효과 측정)
+        self.usage_by_quality = {"full": {"bytes": 0, "seconds": 0.0}, "idle": {"bytes": 0, "seconds": 0.0}}
+        # 세그먼트 완료 구독자 - callback(camera_id, path, start, end, size, quality)
+        self.segment_listeners = []
 
         logger.info(f"[GPU-RECORDER] 카메라 {camera_id} GPU 녹화기 초기화")
 
-    def _generate_filename(self):
-        """파일명 생성"""
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        return self.save_dir / f"cam{self.camera_id}_{timestamp}.mp4"
+    def _generate_filename(self, timestamp: float):
+        """파일명 생성 - {storage_path}/{YYYY-MM-DD}/cam{id}_{YYYYMMDD}_{HHMMSS}.mp4"""
+        moment = datetime.fromtimestamp(timestamp)
+        day_dir = self.save_dir / moment.strftime("%Y-%m-%d")
+        day_dir.mkdir(parents=True, exist_ok=True)
+        stamp = moment.strftime("%Y%m%d_%H%M%S")
+        path = day_dir / f"cam{self.camera_id}_{stamp}.mp4"
+        # 세그먼트 조기 종료로 같은 초에 새 세그먼트가 시작되면 덮어쓰지 않도록 번호 추가
+        index = 1
+        while path.exists() or (self.staging is not None and self.staging.is_pending(path)):
+            path = day_dir / f"cam{self.camera_id}_{stamp}_{index}.mp4"
+            index += 1
+        return path
+
+    def _stop_encoder(self) -> bool:
+        """현재 인코더 중지 (중복 호출 안전) - 실제로 중지했으면 True"""
+        with self._encoder_lock:
+            encoder = self.encoder
+            if encoder is None:
+                return False
+            self.encoder = None
+            self.current_output = None
+            self.is_recording = False
+            try:
+                self.picam2.stop_encoder(encoder)
+            except Exception as e:
+                # 이미 중지된 경우 무시
+                if "already stopped" not in str(e).lower():
+                    logger.error(f"녹화 중지 오류: {e}")
+            self._last_encoder_stop = time.monotonic()
+            return True
+
+    def _record_single_video(self, duration: int = None, aligned: bool = False):
+        """단일 비디오 녹화 (GPU 가속)
 
-    def _record_single_video(self, duration: int = None):
-        """단일 비디오 녹화 (GPU 가속)"""
+        aligned=True: 자정 기준 duration 배수 경계에서 종료 (연속 녹화용 - 경계가 밀리지 않음)
+        시간 측정은 단조 시계 기준, 벽시계는 세그먼트 시작 시 한 번만 읽음
+        """
         # 설정에서 녹화 시간 가져오기
         if duration is None:
-            duration = config_manager.get_segment_duration()
-
-        start_time = datetime.now()
-        start_str = start_time.strftime("%H:%M:%S")
-
+            duration = config_manager.get_segment_duration(self.camera_id)
+
+        start_wall = time.time()
+        start_mono = time.monotonic()
+        start_str = datetime.fromtimestamp(start_wall).strftime("%H:%M:%S")
+
+        # 세그먼트 종료 시점 (단조 시계)
+        name_time = start_wall
+        deadline = start_mono + duration
+        if aligned:
+            slot_start, slot_end = segment_window(start_wall, duration)
+            if slot_end - start_wall < MIN_SEGMENT_SECONDS:
+                slot_end = segment_window(slot_end, duration)[1]
+            deadline = start_mono + (slot_end - start_wall)
+            if start_wall - slot_start < 1.0:
+                name_time = slot_start  # 경계에서 시작한 세그먼트는 경계 시각으로 이름 지정
+
+        output_path = None
         try:
-            # 파일명 생성
-            output_path = self._generate_filename()
-            logger.info(f"[{start_str}] [CAM{self.camera_id}] GPU 녹화 시작: {output_path.name}")
+            # 파일명 생성 (영구 저장 위치 기준)
+            final_path = self._generate_filename(name_time)
+            logger.info(f"[{start_str}] [CAM{self.camera_id}] GPU 녹화 시작: {final_path.name}")
+
+            # H.264 인코더 생성 (GPU 하드웨어 가속)
+            # 설정에서 인코딩 파라미터 가져오기 (녹화 정책 유휴 화질 > 실시간 변경값 > 카메라 프로필)
+            profile = config_manager.get_camera_profile(self.camera_id)
+            idle_encoding = self.idle_encoding
+            quality = "idle" if idle_encoding else "full"
+            if idle_encoding:
+                bitrate = idle_encoding["bitrate"]
+                framerate = min(idle_encoding["framerate"], self.sensor_framerate)
+            else:
+                bitrate = self.bitrate_override or profile.bitrate
+                framerate = self.framerate_override or profile.framerate
+            frame_skip = max(1, round(self.sensor_framerate / framerate))
+            # GOP 길이(초)는 프레임레이트가 바뀌어도 프로필 값 유지
+            iperiod = max(1, round(profile.gop * framerate / profile.framerate))
+
+            # 기록 위치: RAM 디스크 스테이징 (예산 부족 시 영구 저장소 직접 기록)
+            output_path = final_path
+            if self.staging is not None:
+                expected_bytes = int(bitrate / 8 * (deadline - start_mono) * STAGING_SIZE_MARGIN)
+                output_path = self.staging.stage(self.camera_id, final_path, expected_bytes)
 
             # 현재 파일 추적
             self.current_file = output_path
 
-            # H.264 인코더 생성 (GPU 하드웨어 가속)
-            # 설정에서 인코딩 파라미터 가져오기
-            bitrate = config_manager.get_bitrate()
-            framerate = config_manager.get_framerate()
-
-            self.encoder = H264Encoder(
-                bitrate=bitrate,    # 설정에서 가져온 비트레이트
-                repeat=True,        # SPS/PPS 반복
-                iperiod=framerate,  # I-프레임 주기 (프레임레이트와 동일)
-                framerate=framerate # 설정에서 가져온 프레임레이트
-            )
-
-            # MP4 파일 출력 설정
-            self.current_output = FfmpegOutput(str(output_path))
-            self.encoder.output = self.current_output
-
-            # 녹화 시작 (GPU 인코딩)
-            self.picam2.start_encoder(self.encoder)
-            self.is_recording = True
-
-            # 지정된 시간 동안 녹화
-            time.sleep(duration)
-
-            # 녹화 중지
-            self.picam2.stop_encoder(self.encoder)
-            self.is_recording = False
-
-            # 인코더 정리 (재사용 방지)
-            self.encoder = None
-            self.current_output = None
+            with self._encoder_lock:
+                if self._stop_event.is_set():
+                    self.current_file = None
+                    self._discard_staged(output_path)
+                    return False
+
+                self.encoder = H264Encoder(
+                    bitrate=bitrate,    # 설정에서 가져온 비트레이트
+                    repeat=True,        # SPS/PPS 반복
+                    iperiod=iperiod,    # I-프레임 주기 (카메라 프로필 GOP)
+                    framerate=framerate # 설정에서 가져온 프레임레이트
+                )
+
+                # 센서보다 낮은 프레임레이트: N프레임 중 1프레임만 인코딩
+                if frame_skip > 1:
+                    if hasattr(self.encoder, 'frame_skip_count'):
+                        self.encoder.frame_skip_count = frame_skip
+                    else:
+                        # 구버전 Picamera2: 프레임 건너뛰기 미지원 → 센서 프레임레이트로 인코딩
+                        self.encoder.framerate = self.sensor_framerate
+                        if not self._frame_skip_warned:
+                            self._frame_skip_warned = True
+                            logger.warning(f"[GPU-RECORDER] 카메라 {self.camera_id} 인코더 프레임 건너뛰기 미지원 "
+                                           f"- 비트레이트만 조정")
+
+                # MP4 파일 출력 설정
+                self.current_output = FfmpegOutput(str(output_path))
+                self.encoder.output = self.current_output
+
+                # 녹화 시작 (GPU 인코딩)
+                self.picam2.start_encoder(self.encoder)
+                self.is_recording = True
+                self.current_quality = quality
+
+                if self._last_encoder_stop is not None:
+                    self.last_segment_gap = time.monotonic() - self._last_encoder_stop
+
+            # 첫 세그먼트: 녹화 시작 → 첫 녹화 프레임까지 시간 기록
+            if startup_profiler.mark(f"cam{self.camera_id}.recorder_start"):
+                self.picam2.capture_metadata()  # 인코더에 전달되는 다음 프레임까지 대기
+                startup_profiler.mark(f"cam{self.camera_id}.first_recorded_frame")
+
+            # 세그먼트 경계까지 녹화 (중지 / 세그먼트 조기 종료 요청 시 즉시 종료)
+            self._wake_event.wait(max(0.0, deadline - time.monotonic()))
+            self._wake_event.clear()
+
+            # 녹화 중지 + 인코더 정리 (재사용 방지)
+            self._stop_encoder()
 
             # 파일 크기 확인
             if output_path.exists():
                 file_size = output_path.stat().st_size
+                # 스테이징 파일은 백그라운드에서 영구 저장소로 이동 (구독자에게는 최종 경로 전달)
+                if output_path != final_path:
+                    self.staging.commit(output_path)
+                    output_path = final_path
                 size_mb = file_size / (1024 * 1024)
-                end_time = datetime.now()
-                end_str = end_time.strftime("%H:%M:%S")
-                duration_actual = (end_time - start_time).total_seconds()
+                duration_actual = time.monotonic() - start_mono
+                end_wall = start_wall + duration_actual
+                end_str = datetime.fromtimestamp(end_wall).strftime("%H:%M:%S")
 
-                logger.info(f"[{end_str}] [CAM{self.camera_id}] GPU 녹화 완료: {output_path.name} ({size_mb:.1f}MB, {duration_actual:.1f}초)")
+                logger.info(f"[{end_str}] [CAM{self.camera_id}] GPU 녹화 완료: {output_path.name} "
+                            f"({size_mb:.1f}MB, {duration_actual:.1f}초, {quality})")
 
                 # 통계 업데이트
                 self.success_count += 1
                 self.total_size += file_size
+                self.usage_by_quality[quality]["bytes"] += file_size
+                self.usage_by_quality[quality]["seconds"] += duration_actual
+                for callback in self.segment_listeners:
+                    try:
+                        callback(self.camera_id, output_path, start_wall, end_wall, file_size, quality)
+                    except Exception as e:
+                        logger.error(f"[CAM{self.camera_id}] 세그먼트 구독자 오류: {e}")
                 self.current_file = None
                 return True
             else:
                 logger.error(f"[CAM{self.camera_id}] 파일 생성 실패: {output_path.name}")
+                self._discard_staged(output_path)
                 self.fail_count += 1
                 return False
 
         except Exception as e:
             logger.error(f"카메라 {self.camera_id} GPU 녹화 오류: {e}")
-            self.is_recording = False
+            self._stop_encoder()
+            if output_path is not None and self.current_file == output_path:
+                # 중단된 세그먼트도 기록된 데이터는 보존 (스테이징이면 이동, 없으면 예약 해제)
+                if output_path.exists() and self.staging is not None:
+                    self.staging.commit(output_path)
+                else:
+                    self._discard_staged(output_path)
+                self.current_file = None
             self.fail_count += 1
             return False
 
-    def start_continuous_recording(self, interval: int = None):
-        """연속 녹화 시작 (30초 단위)"""
-        # 설정에서 녹화 간격 가져오기
-        if interval is None:
-            interval = config_manager.get_segment_duration()
+    def _discard_staged(self, path):
+        if self.staging is not None and path is not None:
+            self.staging.discard(path)
 
+    def start_continuous_recording(self, interval: int = None):
+        """연속 녹화 시작 (interval 미지정 시 세그먼트마다 카메라 프로필 길이 - 설정 변경은 다음 세그먼트부터)"""
         if self.continuous_recording:
             logger.warning(f"[GPU-RECORDER] 카메라 {self.camera_id} 이미 연속 녹화 중 - 무시")
             return True  # 이미 실행 중이면 성공으로 처리
 
         logger.info(f"[GPU-RECORDER] 카메라 {self.camera_id} 연속 녹화 시작 요청")
+        self._stop_event.clear()
+        self._wake_event.clear()
+        self._cut_requested = False
         self.continuous_recording = True
         self.recording_thread = threading.Thread(
             target=self._continuous_recording_loop,
             args=(interval,),
+            name=f"recorder-cam{self.camera_id}",
             daemon=True
         )
         self.recording_thread.start()
-        logger.info(f"[GPU-RECORDER] 카메라 {self.camera_id} 연속 녹화 시작 완료 ({interval}초 간격)")
+        logger.info(f"[GPU-RECORDER] 카메라 {self.camera_id} 연속 녹화 시작 완료 "
+                    f"({interval or config_manager.get_segment_duration(self.camera_id)}초 간격)")
         return True
 
-    def _continuous_recording_loop(self, interval: int):
+    def _continuous_recording_loop(self, interval: int = None):
         """연속 녹화 루프 (스레드에서 실행)"""
         logger.info(f"[CAM{self.camera_id}] 연속 녹화 루프 시작")
 
         while self.continuous_recording:
             self.recording_count += 1
 
-            # 녹화 실행
-            success = self._record_single_video(interval)
+            # 녹화 실행 (세그먼트 경계는 벽시계 interval 배수로 정렬)
+            success = self._record_single_video(interval or config_manager.get_segment_duration(self.camera_id),
+                                                aligned=True)
 
             if success:
                 logger.info(f"[CAM{self.camera_id}] 진행: 성공 {self.success_count}개 / 실패 {self.fail_count}개 / 총 {self.total_size/1024/1024:.1f}MB")
-            else:
+            elif self.continuous_recording:
                 logger.warning(f"[CAM{self.camera_id}] 실패: {self.recording_count}번째 녹화")
                 # 실패해도 계속 진행 (중지하지 않음)
 
-            # 다음 녹화를 위한 대기
-            if self.continuous_recording:
+            # 설정 변경으로 조기 종료된 세그먼트도 대기 없이 바로 다음 세그먼트 시작
+            self._cut_requested = False
+
+            # 정렬된 세그먼트는 경계에서 바로 이어서 녹화 - 실패 시에만 잠시 대기 (재시도 폭주 방지)
+            if not success and self.continuous_recording:
                 logger.info(f"[CAM{self.camera_id}] 다음 녹화까지 0.5초 대기 중...")
-                time.sleep(0.5)
-                logger.info(f"[CAM{self.camera_id}] 연속 녹화 상태 확인: {self.continuous_recording}")
+                self._stop_event.wait(0.5)
 
         logger.info(f"[CAM{self.camera_id}] 연속 녹화 루프 종료 (continuous_recording = {self.continuous_recording})")
 
+    def record_once(self, duration: int = None) -> bool:
+        """단일 세그먼트 녹화 (연속 녹화 아님)"""
+        self._stop_event.clear()
+        self._wake_event.clear()
+        return self._record_single_video(duration)
+
+    def update_encoding(self, bitrate: int = None, framerate: int = None, apply_now: bool = False):
+        """인코딩 설정 실시간 변경
+
+        기본: 다음 세그먼트 경계에서 적용 (녹화 끊김 없음)
+        apply_now=True: 현재 세그먼트를 즉시 닫고 새 설정으로 다음 세그먼트 시작
+                        (새 인코더는 키프레임부터 시작 - 끊김은 최대 1 GOP)
+        """
+        if bitrate is not None:
+            self.bitrate_override = bitrate
+        if framerate is not None:
+            self.framerate_override = framerate
+        logger.info(f"[GPU-RECORDER] 카메라 {self.camera_id} 인코딩 설정 변경 예약: "
+                    f"bitrate={self.bitrate_override}, framerate={self.framerate_override} "
+                    f"({'즉시' if apply_now else '다음 세그먼트'})")
+        if apply_now and self.continuous_recording:
+            self.request_segment_cut()
+
+    def set_idle_encoding(self, idle_encoding=None, apply_now: bool = False):
+        """녹화 정책 화질 전환 (None: 최고 화질 / dict: 유휴 화질)
+
+        apply_now=True: 현재 세그먼트를 닫고 다음 키프레임(새 인코더)부터 새 화질로 녹화
+        """
+        self.idle_encoding = idle_encoding
+        if apply_now and self.continuous_recording:
+            self.request_segment_cut()
+
+    def request_segment_cut(self):
+        """현재 세그먼트 조기 종료 요청 (연속 녹화는 유지)"""
+        self._cut_requested = True
+        self._wake_event.set()
+
     def stop_recording(self):
         """녹화 중지"""
         self.continuous_recording = False
+        self._stop_event.set()
+        self._wake_event.set()
 
-        # 현재 녹화 중이면 중지
-        if self.is_recording and self.encoder:
-            try:
-                self.picam2.stop_encoder(self.encoder)
-                self.is_recording = False
-                self.encoder = None  # 인코더 정리
-                self.current_output = None
-                logger.info(f"[GPU-RECORDER] 카메라 {self.camera_id} 녹화 중지")
-            except Exception as e:
-                # 이미 중지된 경우 무시
-                if "already stopped" not in str(e).lower():
-                    logger.error(f"녹화 중지 오류: {e}")
-                self.is_recording = False
-                self.encoder = None
-                self.current_output = None
+        # 현재 녹화 중이면 중지 (녹화 스레드가 먼저 정리했으면 무시)
+        if self._stop_encoder():
+            logger.info(f"[GPU-RECORDER] 카메라 {self.camera_id} 녹화 중지")
 
         # 스레드 종료 대기
-        if self.recording_thread:
+        if self.recording_thread and self.recording_thread is not threading.current_thread():
             self.recording_thread.join(timeout=2)
+        self.recording_thread = None
 
         # 미완성 파일 처리
         if self.current_file and self.current_file.exists():
@@ -222,30 +511,90 @@ class GPURecorder:
                 file_size = self.current_file.stat().st_size
                 if file_size < 10240:  # 10KB 미만 파일은 삭제
                     self.current_file.unlink()
+                    self._discard_staged(self.current_file)
                     logger.info(f"[CAM{self.camera_id}] 손상된 파일 삭제: {self.current_file.name}")
                 else:
+                    if self.staging is not None:
+                        self.staging.commit(self.current_file)
                     logger.info(f"[CAM{self.camera_id}] 마지막 파일 보존: {self.current_file.name} ({file_size/1024/1024:.1f}MB)")
             except Exception as e:
                 logger.error(f"파일 처리 오류: {e}")
+        self.current_file = None
 
 
 class CameraManager:
-    """카메라 관리 핵심 클래스 (보호 대상)"""
-    
+    """카메라 관리 핵심 클래스 (보호 대상)
+
+    스레드 안전성:
+    - 카메라 인스턴스/상태는 카메라별 CameraSlot(잠금 + 상태 머신)이 관리
+    - 카메라 조작(시작/중지/전환/해상도 변경/듀얼 모드)은 단일 명령 큐에서 순차 실행
+    - 스트림 접속은 ClientRegistry, 통계는 전용 잠금으로 보호
+    """
+
     def __init__(self):
         self.current_camera = 0
         # 설정에서 기본 해상도 가져오기
         default_quality = config_manager.get('streaming.default_quality', '640x480')
         self.current_resolution = default_quality
-        self.camera_instances = {}
-        self.active_clients: Set[str] = set()
-        self.dual_mode = False  # 듀얼 카메라 모드 플래그
-        self.is_recording = False  # 녹화 상태 플래그 (리소스 경합 방지용)
+
+        # 카메라별 상태 머신 + 단일 명령 큐
+        self.slots: Dict[int, CameraSlot] = {camera_id: CameraSlot(camera_id) for camera_id in (0, 1)}
+        self.commands = CameraCommandQueue()
+
+        # 스트림 접속 레지스트리 (IP가 아닌 접속 단위 - 같은 NAT 뒤의 탭도 각각 집계)
+        self.clients = ClientRegistry(
+            max_connections=config_manager.get('streaming.max_connections', 4),
+            max_per_ip=config_manager.get('streaming.max_connections_per_ip', 4),
+            max_bandwidth_mbps=config_manager.get('streaming.max_bandwidth_mbps', 0),
+            retry_after=config_manager.get('streaming.retry_after', 2),
+            latency_target_ms=config_manager.get('streaming.latency_target_ms', 150)
+        )
+        self.dual_mode = False  # 듀얼 카메라 모드 플래그 (명령 큐에서만 변경)
+
+        # MJPEG 스트리밍 서브시스템 활성화 여부 (비활성화 시 OpenCV 미로드)
+        self.streaming_enabled = config_manager.get('streaming.enabled', True)
+
+        # 모션 감지 (카메라별 전용 스레드, 저해상도 Y 평면 분석)
+        self.motion_enabled = config_manager.get('motion.enabled', True)
+        self.motion_detectors: Dict[int, Any] = {}
+        # 모션 연동 녹화 화질 정책 (모션 감지 활성화 시에만 적용)
+        self.recording_policies: Dict[int, RecordingPolicy] = {}
+        # 세그먼트 미리보기 (lores 축소 프레임 → 세그먼트 종료 시 스프라이트 시트 + WebVTT)
+        self.thumbnails_enabled = config_manager.get('recording.thumbnails.enabled', True)
+        self.thumbnail_samplers: Dict[int, Any] = {}
+        self._sprite_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sprites")
+        # 녹화 세그먼트 카탈로그 (세그먼트별 초 단위 모션 활동 요약, 파일 로드는 start_warmup에서 백그라운드로)
+        self.catalog = SegmentCatalog(config_manager.get('recording.catalog_path', 'videos/catalog.jsonl'),
+                                      retention_days=self._catalog_retention(config_manager.get('recording.cleanup', {})))
+        # 카메라별·일별 녹화량 집계 + 용량 소진 / 보존 기간 예측 (세그먼트 종료 이벤트로 증분 갱신)
+        self.storage_forecast = StorageForecaster(
+            config_manager.get('forecast', {}),
+            config_manager.get('recording.cleanup', {}),
+            storage_path=lambda camera_id: config_manager.get_storage_path(str(camera_id)),
+            catalog=self.catalog
+        )
+        # RAM 디스크 스테이징 (SD 카드 쓰기 지연이 인코더에 전달되지 않도록)
+        self.staging = None
+        staging_config = config_manager.get('recording.staging', {})
+        if staging_config.get('enabled', True):
+            try:
+                self.staging = StagingStore(staging_config)
+            except OSError as e:
+                logger.warning(f"[STAGING] 스테이징 경로 사용 불가 - 직접 기록: {e}")
+        self.exporter = ClipExporter(self.catalog, config_manager.get('export', {}),
+                                     resolve_path=self.staging.resolve if self.staging is not None else None)
+        # 카메라별 마지막 세그먼트 종료 시각 (노드 상태 요약용)
+        self.last_segment_end: Dict[int, float] = {}
+        self.heartbeat = None
+
+        # 시작 상태: warming(카메라 준비 중) → ready / degraded / failed
+        self.startup_state = "warming"
+        self.ready_event = threading.Event()
 
         # 연속 녹화 시스템
         self.recording_enabled = False
         self.recording_threads = {}
-        
+
         # 해상도 설정
         # 설정에서 해상도 및 최대 클라이언트 수 가져오기
         resolution = config_manager.get_resolution()
@@ -255,275 +604,718 @@ class CameraManager:
             "640x480": {"width": 640, "height": 480, "name": "480p", "max_clients": max_clients},
             "1280x720": {"width": 1280, "height": 720, "name": "720p", "max_clients": max_clients}
         }
-        
+
+        # 카메라별 캡처 크기 (센서 출력 main/lores 크기 - 변경 시에만 카메라 재구성)
+        self.capture_sizes: Dict[int, tuple] = {}
+        # 카메라별 프라이버시 마스크 (privacy.cameras.{id} 다각형, 설정 변경 시 교체)
+        self.privacy_masks = {camera_id: PrivacyMask(camera_id, self._privacy_polygons(config_manager.snapshot, camera_id))
+                              for camera_id in (0, 1)}
+        # 카메라별 스트리밍 렌디션 (캡처 크기 이하에서는 소프트웨어 축소 - 재구성 불필요)
+        self.stream_renditions: Dict[int, str] = {}
+
+        # 온도 / 스로틀링 모니터 (sysfs 백그라운드 샘플링)
+        thermal_config = config_manager.get('thermal', {})
+        self.thermal = ThermalMonitor(thermal_config) if thermal_config.get('enabled', True) else None
+
+        # QoS 부하 감소 (녹화는 건드리지 않음 - 스트리밍 FPS/렌디션/접속 수만 제한)
+        qos_config = config_manager.get('qos', {})
+        self.qos = QoSController(
+            qos_config,
+            storage_path=config_manager.get_storage_path("0"),
+            thermal_level=(lambda: self.thermal.level) if self.thermal is not None else None
+        ) if qos_config.get('enabled', True) else None
+        self.stream_fps_limit = None        # 스트림별 최대 FPS (None = 제한 없음)
+        self.stream_rendition_cap = None    # 스트리밍 렌디션 상한 (None = 제한 없음)
+        if self.qos is not None:
+            self.qos.add_listener(self._on_qos_tier)
+
+        # 설정 파일 변경 → 재시작 없이 적용 가능한 항목 반영
+        config_manager.subscribe(self._on_config_changed)
+
         # 녹화 시스템
         self.recorders = {}
+        self._recorders_lock = threading.Lock()
 
         # 통계 정보
+        self._stats_lock = threading.Lock()
         self.stream_stats = {
             0: {"frame_count": 0, "avg_frame_size": 0, "fps": 0, "last_update": 0, "recording": False},
             1: {"frame_count": 0, "avg_frame_size": 0, "fps": 0, "last_update": 0, "recording": False}
         }
-        
+        # FPS / 평균 크기 계산 구간 {camera_id: [시작 시각, 프레임 수, 바이트]}
+        self._stats_windows: Dict[int, list] = {}
+
+        # 카메라별 MJPEG 브로드캐스트 (시청자가 있을 때만 캡처/인코딩)
+        self.broadcasters = {camera_id: FrameBroadcaster(camera_id, self._stream_producer(camera_id))
+                             for camera_id in self.slots}
+        # 접속별 구독 {conn_id: FrameSubscription} - 응답 종료 시 release_stream()에서 해제
+        self._stream_subscriptions: Dict[str, FrameSubscription] = {}
+
         # 직접 캡처 방식으로 변경 - 버퍼 시스템 제거
-    
+
+    @property
+    def camera_instances(self) -> Dict[int, Any]:
+        """기동된 카메라 인스턴스 (읽기 전용 스냅샷)"""
+        instances = {}
+        for camera_id, slot in self.slots.items():
+            picam2 = slot.picam2
+            if picam2 is not None and slot.state != CameraState.STARTING:
+                instances[camera_id] = picam2
+        return instances
+
+    async def run_command(self, fn, *args, **kwargs):
+        """카메라 명령 큐에서 실행 후 결과 대기 (HTTP 핸들러용)"""
+        return await self.commands.run(fn, *args, **kwargs)
+
+    def _reset_stats(self, camera_id: int):
+        """카메라 통계 초기화"""
+        recorder = self.recorders.get(camera_id)
+        with self._stats_lock:
+            self._stats_windows.pop(camera_id, None)
+            self.stream_stats[camera_id] = {
+                "frame_count": 0,
+                "avg_frame_size": 0,
+                "fps": 0,
+                "last_update": 0,
+                "recording": recorder is not None and recorder.continuous_recording
+            }
+
     def get_max_clients(self) -> int:
-        """현재 해상도에 따른 최대 클라이언트 수"""
+        """현재 해상도에 따른 카메라별 최대 클라이언트 수"""
         return self.RESOLUTIONS.get(self.current_resolution, {}).get("max_clients", 1)
-    
-    def can_accept_client(self, client_ip: str) -> bool:
-        """클라이언트 접속 가능 여부 확인"""
-        max_clients = self.get_max_clients()
-        return len(self.active_clients) < max_clients or client_ip in self.active_clients
-    
+
+    def admit_client(self, client_ip: str, camera_id: int = None) -> StreamConnection:
+        """스트림 접속 등록 - 할당량 초과 시 AdmissionRejected"""
+        target_camera = camera_id if camera_id is not None else self.current_camera
+        rendition = self.stream_renditions.get(target_camera, self.current_resolution)
+        return self.clients.admit(client_ip, target_camera, rendition, self.get_max_clients())
+
     def is_camera_active(self) -> bool:
         """카메라 활성 상태 확인"""
         return self.current_camera in self.camera_instances
-    
-    def ensure_camera_started(self) -> bool:
+
+    async def ensure_camera_started(self) -> bool:
         """카메라 시작 보장"""
-        if self.current_camera not in self.camera_instances:
-            return self.start_camera_stream(self.current_camera)
-        return True
-    
+        if self.is_camera_active():
+            return True
+        return await self.run_command(lambda: self.start_camera_stream(self.current_camera))
+
+    def _sensor_framerate(self, camera_id: int) -> int:
+        """센서 프레임레이트 (실시간 변경값 > 카메라 프로필)"""
+        recorder = self.recorders.get(camera_id)
+        if recorder is not None:
+            return recorder.sensor_framerate
+        return config_manager.get_framerate(camera_id)
+
+    def _create_configuration(self, picam2, width: int, height: int, framerate: int = None):
+        """Pi5 듀얼 스트림 최적화 설정
+        메인: H.264 녹화 우선, 서브: MJPEG 스트리밍
+        framerate: 센서 프레임레이트 (카메라 프로필 - 저조도 카메라는 낮춰서 노출 시간 확보)
+        """
+        return picam2.create_video_configuration(
+            main={
+                "size": (width, height),
+                "format": "YUV420"  # H.264 녹화 최적화 (GPU 가속)
+            },
+            lores={
+                "size": (width, height),  # 스트리밍도 동일 해상도 유지
+                "format": "RGB888"        # MJPEG 스트리밍 최적화
+            },
+            buffer_count=2,  # 버퍼 수 감소로 리소스 분산
+            queue=False,     # 레이턴시 최소화
+            transform=libcamera.Transform(hflip=True),  # 좌우 반전 (거울모드)
+            controls={"FrameDurationLimits": (int(1_000_000 / framerate),) * 2} if framerate else {}
+        )
+
     def start_camera_stream(self, camera_id: int, resolution: str = None) -> bool:
         """카메라 스트리밍 시작 - GPU 버전"""
         logger.info(f"[START] 카메라 {camera_id} 스트리밍 시작 요청 (해상도: {resolution or self.current_resolution})")
 
-        # 기존 카메라 인스턴스가 있으면 재사용 (연속 녹화 유지)
-        if camera_id in self.camera_instances:
-            logger.info(f"기존 카메라 {camera_id} 인스턴스 재사용 (녹화 유지)")
-            return True
-        
+        slot = self.slots[camera_id]
+        with slot.lock:
+            # 기존 카메라 인스턴스가 있으면 재사용 (연속 녹화 유지)
+            if slot.state != CameraState.STOPPED:
+                logger.info(f"기존 카메라 {camera_id} 인스턴스 재사용 (녹화 유지)")
+                return True
+            slot.transition(CameraState.STARTING)
+
         # 해상도 설정
         if resolution is None:
             resolution = self.current_resolution
-        
+
         res_config = self.RESOLUTIONS.get(resolution, self.RESOLUTIONS["640x480"])
         width = res_config["width"]
         height = res_config["height"]
-        
+        # 카메라 프로필에 녹화 해상도가 지정되어 있으면 센서 출력 크기로 사용 (스트림은 렌디션으로 축소)
+        profile = config_manager.get_camera_profile(camera_id)
+        if "resolution" in profile.overrides:
+            width, height = profile.resolution
+
+        picam2 = None
         try:
             # Picamera2 인스턴스 생성
-            picam2 = Picamera2(camera_num=camera_id)
-            
-            # Pi5 듀얼 스트림 최적화 설정
-            # 메인: H.264 녹화 우선, 서브: MJPEG 스트리밍
-            config = picam2.create_video_configuration(
-                main={
-                    "size": (width, height),
-                    "format": "YUV420"  # H.264 녹화 최적화 (GPU 가속)
-                },
-                lores={
-                    "size": (width, height),  # 스트리밍도 동일 해상도 유지
-                    "format": "RGB888"        # MJPEG 스트리밍 최적화
-                },
-                buffer_count=2,  # 버퍼 수 감소로 리소스 분산
-                queue=False,     # 레이턴시 최소화
-                transform=libcamera.Transform(hflip=True)  # 좌우 반전 (거울모드)
-            )
-
-            picam2.configure(config)
-            picam2.start()
-            
-            self.camera_instances[camera_id] = picam2
-
-            # 녹화기 초기화 (GPU 레코더 사용)
-            if camera_id not in self.recorders:
-                self.recorders[camera_id] = GPURecorder(camera_id, picam2)
+            with startup_profiler.measure(f"cam{camera_id}.open"):
+                picam2 = Picamera2(camera_num=camera_id)
+            # 인코더/캡처로 넘어가기 전에 프레임 버퍼에 프라이버시 마스크 적용
+            picam2.pre_callback = self._privacy_callback(camera_id)
+
+            with startup_profiler.measure(f"cam{camera_id}.configure"):
+                picam2.configure(self._create_configuration(picam2, width, height, profile.framerate))
+
+            with startup_profiler.measure(f"cam{camera_id}.start"):
+                picam2.start()
+
+            # 첫 프레임 수신까지 대기 (최초 기동 시에만 측정)
+            if f"cam{camera_id}.first_frame" not in startup_profiler.milestones:
+                with startup_profiler.measure(f"cam{camera_id}.first_frame"):
+                    picam2.capture_metadata()
+                startup_profiler.mark(f"cam{camera_id}.first_frame")
+
+            # 녹화기 초기화 (GPU 레코더 사용) - 재시작 시 새 인스턴스로 교체
+            with self._recorders_lock:
+                if camera_id not in self.recorders:
+                    self.recorders[camera_id] = GPURecorder(camera_id, picam2)
+                    self.recorders[camera_id].staging = self.staging
+                    self.recorders[camera_id].segment_listeners.append(self._on_segment_closed)
+                else:
+                    self.recorders[camera_id].picam2 = picam2
 
+            self.capture_sizes[camera_id] = (width, height)
+            self.stream_renditions[camera_id] = resolution
+            slot.transition(CameraState.STREAMING, picam2=picam2)
             logger.info(f"[OK] Picamera2 카메라 {camera_id} 시작됨 ({width}x{height})")
 
+            if self.motion_enabled:
+                self._start_motion_detector(camera_id)
+            if self.thumbnails_enabled:
+                self._start_thumbnail_sampler(camera_id)
+
             # 녹화는 나중에 enable_recording()에서 일괄 시작
             # (듀얼 모드 시 타이밍 이슈 방지)
 
             return True
-            
+
         except Exception as e:
             logger.error(f"[ERROR] 카메라 {camera_id} 시작 실패: {e}")
-            if camera_id in self.camera_instances:
-                del self.camera_instances[camera_id]
+            if picam2 is not None:
+                try:
+                    picam2.close()
+                except Exception:
+                    pass
+            slot.transition(CameraState.STOPPED)
             return False
-    
-    def stop_camera_stream(self, camera_id: int):
-        """카메라 스트리밍 중지 - 연속 녹화는 유지"""
-        # 연속 녹화는 중지하지 않음 (24시간 연속 녹화 유지)
-        # 듀얼 모드에서는 카메라 인스턴스를 유지하고 스트리밍만 중지
 
-        # 듀얼 모드인 경우 카메라 인스턴스 유지 (녹화 지속을 위해)
-        if self.dual_mode and camera_id in self.camera_instances:
-            logger.info(f"[DUAL-MODE] 카메라 {camera_id} 스트리밍 중지 (녹화 유지)")
+    def stop_camera_stream(self, camera_id: int, force: bool = False):
+        """카메라 스트리밍 중지 - 연속 녹화는 유지
+
+        force=True: 녹화/듀얼 모드와 무관하게 카메라 완전 중지 (시스템 종료용)
+        """
+        slot = self.slots[camera_id]
+        recorder = self.recorders.get(camera_id)
+
+        # 연속 녹화는 중지하지 않음 (24시간 연속 녹화 유지)
+        # 듀얼 모드 또는 녹화 중인 카메라는 인스턴스를 유지하고 스트리밍만 중지
+        recording = slot.state == CameraState.RECORDING or (recorder is not None and recorder.continuous_recording)
+        if not force and (self.dual_mode or recording) and slot.state != CameraState.STOPPED:
+            logger.info(f"[STREAM] 카메라 {camera_id} 스트리밍 중지 (녹화 유지)")
             # 통계만 초기화, 카메라 인스턴스는 유지
-            self.stream_stats[camera_id] = {
-                "frame_count": 0,
-                "avg_frame_size": 0,
-                "fps": 0,
-                "last_update": 0,
-                "recording": camera_id in self.recorders and self.recorders[camera_id].continuous_recording
-            }
+            self._reset_stats(camera_id)
             return
 
-        # 싱글 모드로 전환 시에만 카메라 완전 중지
-        if camera_id in self.camera_instances:
-            try:
-                logger.info(f"[STOP] 카메라 {camera_id} 완전 중지 중...")
-                picam2 = self.camera_instances[camera_id]
+        if slot.state == CameraState.STOPPED:
+            return
+
+        try:
+            logger.info(f"[STOP] 카메라 {camera_id} 완전 중지 중...")
+            self._stop_motion_detector(camera_id)
+            sampler = self.thumbnail_samplers.get(camera_id)
+            if sampler is not None:
+                sampler.stop()
+            # 신규 캡처 차단 + 진행 중인 캡처 완료 대기 후 정리
+            picam2 = slot.drain(CameraState.STOPPED)
+            if picam2 is not None:
                 picam2.stop()
                 picam2.close()
-                del self.camera_instances[camera_id]
-
-                # 통계 초기화
-                self.stream_stats[camera_id] = {
-                    "frame_count": 0,
-                    "avg_frame_size": 0,
-                    "fps": 0,
-                    "last_update": 0,
-                    "recording": False
-                }
 
-                # 클라이언트 목록 클리어
-                self.active_clients.clear()
+            # 통계 초기화
+            self._reset_stats(camera_id)
+
+            logger.info(f"[OK] 카메라 {camera_id} 완전 중지됨")
+        except Exception as e:
+            logger.error(f"[ERROR] 카메라 {camera_id} 중지 실패: {e}")
+
+    @staticmethod
+    def _privacy_polygons(snapshot, camera_id: int):
+        """설정의 카메라 프라이버시 다각형 (privacy.enabled=false면 없음)"""
+        if not snapshot.value('privacy.enabled', True):
+            return ()
+        return snapshot.value(f'privacy.cameras.{camera_id}', ())
+
+    def _privacy_callback(self, camera_id: int):
+        """Picamera2 pre_callback - 녹화(main YUV420)와 스트림/미리보기(lores RGB) 버퍼를 제자리에서 가림
+
+        ISP / H.264 인코더에는 영역 가림 기능이 없어 요청 버퍼에 직접 적용 (마스크 없으면 즉시 반환)
+        """
+        mask = self.privacy_masks[camera_id]
 
-                logger.info(f"[OK] 카메라 {camera_id} 완전 중지됨")
+        def apply(request):
+            if not mask.active:
+                return
+            try:
+                width, height = request.config["main"]["size"]
+                with MappedArray(request, "main") as mapped:
+                    mask.apply_yuv420(mapped.array, width, height)
+                with MappedArray(request, "lores") as mapped:
+                    mask.apply_rgb(mapped.array)
             except Exception as e:
-                logger.error(f"[ERROR] 카메라 {camera_id} 중지 실패: {e}")
-    
+                logger.error(f"[PRIVACY] 카메라 {camera_id} 마스크 적용 오류: {e}")
+
+        return apply
+
+    def _capture_luma(self, camera_id: int):
+        """메인(YUV420) 스트림의 Y 평면 캡처 - 모션 감지용 (카메라 사용 불가 시 None)"""
+        slot = self.slots[camera_id]
+        with slot.lease(timeout=0.5) as picam2:
+            if picam2 is None:
+                return None
+            yuv = picam2.capture_array('main')
+        width, height = self.capture_sizes.get(camera_id, (yuv.shape[1], yuv.shape[0] * 2 // 3))
+        return yuv[:height, :width]
+
+    def _capture_lores(self, camera_id: int):
+        """lores(RGB) 스트림 프레임 캡처 - 미리보기용 (카메라 사용 불가 시 None)"""
+        with self.slots[camera_id].lease(timeout=0.5) as picam2:
+            if picam2 is None:
+                return None
+            return picam2.capture_array('lores')
+
+    def _start_thumbnail_sampler(self, camera_id: int):
+        """카메라 미리보기 프레임 수집 시작 (이미 실행 중이면 유지)"""
+        try:
+            load_thumbnail_modules()
+            sampler = self.thumbnail_samplers.get(camera_id)
+            if sampler is None:
+                sampler = ThumbnailSampler(camera_id, lambda: self._capture_lores(camera_id),
+                                           config_manager.get('recording.thumbnails', {}))
+                self.thumbnail_samplers[camera_id] = sampler
+            sampler.start()
+        except Exception as e:
+            # 미리보기 실패는 스트리밍/녹화에 영향을 주지 않음
+            logger.error(f"[ERROR] 카메라 {camera_id} 미리보기 수집 시작 실패: {e}")
+
+    def _start_motion_detector(self, camera_id: int):
+        """카메라 모션 감지 시작 (이미 실행 중이면 유지)"""
+        try:
+            load_motion_modules()
+            detector = self.motion_detectors.get(camera_id)
+            if detector is None:
+                detector = MotionDetector(camera_id, lambda: self._capture_luma(camera_id),
+                                          config_manager.get('motion', {}))
+                self.motion_detectors[camera_id] = detector
+                detector.add_sample_listener(self.catalog.add_sample)
+
+                recorder = self.recorders.get(camera_id)
+                if recorder is not None and camera_id not in self.recording_policies:
+                    policy = RecordingPolicy(camera_id, recorder, config_manager.get('recording.policy', {}))
+                    self.recording_policies[camera_id] = policy
+                    detector.add_listener(policy.on_motion)
+            detector.start()
+        except Exception as e:
+            # 모션 감지 실패는 스트리밍/녹화에 영향을 주지 않음
+            logger.error(f"[ERROR] 카메라 {camera_id} 모션 감지 시작 실패: {e}")
+
+    def _stop_motion_detector(self, camera_id: int):
+        """카메라 모션 감지 중지"""
+        detector = self.motion_detectors.get(camera_id)
+        if detector is not None:
+            detector.stop()
+
+    def get_motion_status(self) -> Dict[str, Any]:
+        """카메라별 모션 감지 상태 + CPU 비용"""
+        return {
+            "enabled": self.motion_enabled,
+            "cameras": {camera_id: detector.get_status() for camera_id, detector in self.motion_detectors.items()}
+        }
+
+    def _on_segment_closed(self, camera_id: int, path, start: float, end: float, size: int, quality: str):
+        """녹화 세그먼트 완료 → 활동 요약과 함께 카탈로그 등록"""
+        self.last_segment_end[camera_id] = end
+        # 용량 집계는 카탈로그 등록 전에 (최초 집계 시 카탈로그 기록과 중복 방지)
+        self.storage_forecast.add_segment(camera_id, path, start, end, size, quality)
+        detector = self.motion_detectors.get(camera_id)
+        zone_names = [zone.name for zone in detector.zones] if detector is not None else []
+        self.catalog.add_segment(camera_id, path, start, end, size, quality, zone_names)
+
+        # 스프라이트 인코딩은 녹화 스레드 밖에서 (다음 세그먼트 시작 지연 방지)
+        sampler = self.thumbnail_samplers.get(camera_id)
+        if sampler is not None:
+            self._sprite_executor.submit(sampler.write_sprite, path, start, end)
+
+    def get_recording_policy_status(self) -> Dict[str, Any]:
+        """카메라별 녹화 정책 상태 + 화질별 녹화량"""
+        return {camera_id: policy.get_status() for camera_id, policy in self.recording_policies.items()}
+
+    def get_storage_forecast(self) -> Dict[str, Any]:
+        """카메라별·일별 녹화량 + 볼륨별 용량 소진 시점 / 보존 기간 예측"""
+        return self.storage_forecast.forecast()
+
+    def get_staging_status(self) -> Dict[str, Any]:
+        """RAM 디스크 스테이징 상태 (예산 / 이동 대기 / 이동 속도 / 직접 기록 강등)"""
+        if self.staging is None:
+            return {"enabled": False}
+        return self.staging.get_status()
+
+    def get_recording_profiles(self) -> Dict[str, Any]:
+        """카메라별 녹화 프로필 (설정값 + 현재 적용 중인 인코딩)"""
+        profiles = {}
+        for camera_id in self.slots:
+            profile = config_manager.get_camera_profile(camera_id).to_dict()
+            recorder = self.recorders.get(camera_id)
+            if recorder is not None:
+                profile["active"] = {
+                    "bitrate_override": recorder.bitrate_override,
+                    "framerate_override": recorder.framerate_override,
+                    "sensor_framerate": recorder.sensor_framerate,
+                    "quality": recorder.current_quality
+                }
+            profile["capture_size"] = list(self.capture_sizes[camera_id]) if camera_id in self.capture_sizes else None
+            profiles[camera_id] = profile
+        return profiles
+
     # 직접 캡처 방식
-    
-    def generate_stream(self, client_ip: str, camera_id: int = None):
-        """MJPEG 스트림 생성 - 원본과 동일한 직접 캡처 방식"""
-        logger.info(f"[STREAM] 클라이언트 연결: {client_ip}")
-        self.active_clients.add(client_ip)
-        
-        # 카메라 인스턴스 가져오기
-        target_camera = camera_id if camera_id is not None else self.current_camera
-        picam2 = self.camera_instances.get(target_camera)
-        if not picam2:
+
+    def _stream_producer(self, camera_id: int):
+        """카메라 MJPEG 프레임 생산 함수 (브로드캐스트 스레드에서 실행 - 시청자 수와 무관하게 카메라당 1회)
+
+        캡처 → 렌디션 축소 → JPEG 인코딩 후 인코더 출력 배열을 그대로 반환 (tobytes() 복사 없음)
+        캡처와 렌디션의 화면비가 다르면 (예: 16:9 캡처 → 4:3 렌디션) 비율을 유지해 축소하고 남는 부분은 검은 띠로 채움
+        """
+        slot = self.slots[camera_id]
+        rendition = None
+        rendition_size = None
+        layout_key = None
+        fit_size, border = None, None
+        frame_min_size = 2000
+        frame_max_size = 200000
+        last_capture = 0.0
+
+        def produce():
+            nonlocal rendition, rendition_size, frame_min_size, frame_max_size, last_capture, layout_key, fit_size, border
+
+            # 부하 감소 중이면 캡처/인코딩 자체를 건너뛰어 FPS 제한
+            fps_limit = self.stream_fps_limit
+            if fps_limit:
+                wait = last_capture + 1.0 / fps_limit - time.monotonic()
+                if wait > 0:
+                    time.sleep(wait)
+            last_capture = time.monotonic()
+            capture_started = time.perf_counter()
+
+            # Picamera2 lores 스트림에서 RGB 배열 + 같은 프레임의 메타데이터 캡처 (캡처 중에는 카메라 중지/재구성 대기)
+            with slot.lease() as picam2:
+                if picam2 is None:
+                    raise StreamEnded()
+                (rgb_array,), metadata = picam2.capture_arrays(['lores'])
+            encode_started = time.perf_counter()
+            captured = self._sensor_time(metadata)
+
+            # 스트리밍 렌디션 적용 (캡처 크기보다 작으면 소프트웨어 축소)
+            if self._stream_rendition(camera_id) != rendition:
+                rendition = self._stream_rendition(camera_id)
+                res_config = self.RESOLUTIONS.get(rendition, self.RESOLUTIONS["640x480"])
+                rendition_size = (res_config["width"], res_config["height"])
+                is_720p = rendition == "1280x720"
+                frame_min_size = 5000 if is_720p else 2000
+                frame_max_size = 500000 if is_720p else 200000
+            frame_size = (rgb_array.shape[1], rgb_array.shape[0])
+            if (frame_size, rendition_size) != layout_key:
+                layout_key = (frame_size, rendition_size)
+                fit_size, border = self._letterbox(frame_size, rendition_size)
+            if frame_size != fit_size:
+                rgb_array = cv2.resize(rgb_array, fit_size, interpolation=cv2.INTER_AREA)
+            if border is not None:
+                rgb_array = cv2.copyMakeBorder(rgb_array, *border, cv2.BORDER_CONSTANT, value=(0, 0, 0))
+
+            # RGB를 JPEG로 인코딩
+            success, jpeg = cv2.imencode('.jpg', rgb_array, [cv2.IMWRITE_JPEG_QUALITY, 80])
+            if not success:
+                return None
+            if self.qos is not None:
+                self.qos.record_frame(encode_started - capture_started, time.perf_counter() - encode_started)
+
+            # 프레임 크기 검증 (원본과 동일)
+            if not frame_min_size < jpeg.nbytes < frame_max_size:
+                return None
+            self._record_stream_frame(camera_id, jpeg.nbytes)
+            return jpeg, captured
+
+        return produce
+
+    @staticmethod
+    def _letterbox(frame_size: tuple, rendition_size: tuple) -> tuple:
+        """화면비 유지 축소 크기 + 검은 띠 (top, bottom, left, right) - 화면비가 같으면 띠는 None"""
+        frame_w, frame_h = frame_size
+        width, height = rendition_size
+        if frame_w * height == frame_h * width:
+            return rendition_size, None
+        scale = min(width / frame_w, height / frame_h)
+        fit_w = min(width, max(2, round(frame_w * scale / 2) * 2))
+        fit_h = min(height, max(2, round(frame_h * scale / 2) * 2))
+        top, left = (height - fit_h) // 2, (width - fit_w) // 2
+        return (fit_w, fit_h), (top, height - fit_h - top, left, width - fit_w - left)
+
+    @staticmethod
+    def _sensor_time(metadata: Dict[str, Any]) -> float:
+        """프레임 센서 타임스탬프 → monotonic 초
+
+        SensorTimestamp는 부팅 이후 ns (time.monotonic_ns()와 같은 기준), 없거나 기준이 어긋나면 현재 시각
+        """
+        now = time.monotonic()
+        timestamp = metadata.get("SensorTimestamp") if metadata else None
+        if timestamp is None:
+            return now
+        captured = timestamp / 1e9
+        return captured if now - 5.0 <= captured <= now else now
+
+    def _record_stream_frame(self, camera_id: int, frame_size: int):
+        """스트림 통계 갱신 (프레임 수 누적, FPS / 평균 크기는 1초 구간마다 계산)"""
+        now = time.time()
+        recorder = self.recorders.get(camera_id)
+        with self._stats_lock:
+            window = self._stats_windows.setdefault(camera_id, [now, 0, 0])
+            window[1] += 1
+            window[2] += frame_size
+            stats = self.stream_stats[camera_id]
+            stats["frame_count"] += 1
+            if now - window[0] >= 1.0:
+                stats["fps"] = round(window[1] / (now - window[0]), 1)
+                stats["avg_frame_size"] = window[2] / window[1]
+                stats["last_update"] = now
+                stats["recording"] = recorder.is_recording if recorder else False
+                self._stats_windows[camera_id] = [now, 0, 0]
+
+    def generate_stream(self, connection: StreamConnection):
+        """MJPEG 스트림 - 카메라 프레임 브로드캐스트 구독
+
+        캡처/인코딩은 카메라당 한 번, 프레임은 multipart 파트 버퍼 하나를 모든 시청자가 공유 (프레임당 send 1회)
+        전송이 밀린 시청자는 다음 요청 시 가장 최근 프레임으로 건너뜀 (건너뛴 수 = frames_dropped),
+        제너레이터가 재개되는 시점(이전 파트 전송 완료)에 캡처 → 전송 지연 기록
+        connection: admit_client()로 등록된 접속 (종료 시 레지스트리에서 해제)
+        """
+        client_ip = connection.client_ip
+        logger.info(f"[STREAM] 클라이언트 연결: {client_ip} ({connection.conn_id})")
+
+        # 카메라 슬롯 가져오기
+        target_camera = connection.camera_id
+        slot = self.slots.get(target_camera)
+        if slot is None or slot.picam2 is None:
             logger.error(f"[ERROR] 카메라 {target_camera} 인스턴스 없음")
+            self.clients.release(connection)
             return
 
-        # 녹화기 가져오기
-        recorder = self.recorders.get(target_camera)
-        
-        # 통계 변수
-        frame_count = 0
-        total_frame_size = 0
-        start_time = time.time()
-        last_fps_update = start_time
-        
-        # 해상도별 설정
-        is_720p = self.current_resolution == "1280x720"
-        frame_min_size = 5000 if is_720p else 2000
-        frame_max_size = 500000 if is_720p else 200000
-        
+        load_mjpeg_modules()
+        connection.rendition = self._stream_rendition(target_camera)
+        subscription = self.broadcasters[target_camera].subscribe()
+        self._stream_subscriptions[connection.conn_id] = subscription
+
         try:
-            while True:
-                try:
-                    # 카메라가 중지되었는지 확인
-                    if target_camera not in self.camera_instances:
-                        logger.info(f"[STREAM] 카메라 {target_camera} 중지됨, 스트림 종료")
-                        break
-                    
-                    # Picamera2 lores 스트림에서 RGB 배열 캡처 후 JPEG 변환 (스트리밍 전용)
-                    rgb_array = picam2.capture_array('lores')  # lores 스트림에서 RGB 배열 캡처
-
-                    # RGB를 JPEG로 인코딩
-                    success, frame_data = cv2.imencode('.jpg', rgb_array, [cv2.IMWRITE_JPEG_QUALITY, 80])
-                    if not success:
-                        continue
-                    frame_data = frame_data.tobytes()
-                    
-                    if not frame_data:
-                        logger.warning(f"[WARN] 카메라 {target_camera}에서 데이터 없음")
-                        break
-                    
-                    frame_size = len(frame_data)
-
-                    # GPU 녹화기는 별도 스레드에서 자동으로 처리됨
-                    # (프레임 전달 불필요)
-
-                    # 프레임 크기 검증 (원본과 동일)
-                    if frame_min_size < frame_size < frame_max_size:
-                        try:
-                            yield b'--frame\r\n'
-                            yield b'Content-Type: image/jpeg\r\n'
-                            yield f'Content-Length: {frame_size}\r\n\r\n'.encode()
-                            yield frame_data
-                            yield b'\r\n'
-                            
-                            # 통계 업데이트
-                            frame_count += 1
-                            total_frame_size += frame_size
-                            
-                            # 프레임 카운터 자동 리셋 (10만 프레임마다 = 약 55분)
-                            if frame_count >= 100000:
-                                logger.info(f"[RESET] Auto-reset: Frame counter reached 100K, resetting for memory stability")
-                                frame_count = 1  # 나누기 오류 방지를 위해 1로 설정
-                                total_frame_size = frame_size
-                                start_time = time.time()
-                                last_fps_update = start_time
-                                # 통계 초기화
-                                self.stream_stats[self.current_camera] = {
-                                    "frame_count": 1,
-                                    "avg_frame_size": frame_size,
-                                    "fps": 30.0,
-                                    "last_update": start_time,
-                                    "recording": recorder.is_recording if recorder else False
-                                }
-                            
-                        except Exception as stream_error:
-                            logger.error(f"[ERROR] 스트림 전송 오류: {stream_error}")
-                            break
-                    
-                    # FPS 통계 업데이트 (1초마다)
-                    current_time = time.time()
-                    if current_time - last_fps_update >= 1.0:
-                        elapsed = current_time - start_time
-                        fps = frame_count / elapsed if elapsed > 0 else 0
-                        avg_size = total_frame_size / frame_count if frame_count > 0 else 0
-                        
-                        # 누적 프레임 수 계산 (100K 리셋 고려)
-                        if frame_count == 1:
-                            # 리셋된 경우: 새로 시작
-                            cumulative_frames = 1
-                        else:
-                            # 정상 증가: 기존 값에서 1씩 증가
-                            cumulative_frames = self.stream_stats[self.current_camera]["frame_count"] + 1
-                        
-                        self.stream_stats[self.current_camera] = {
-                            "frame_count": cumulative_frames,
-                            "avg_frame_size": avg_size,
-                            "fps": round(fps, 1),
-                            "last_update": current_time,
-                            "recording": recorder.is_recording if recorder else False
-                        }
-                        
-                        last_fps_update = current_time
-                    
-                except Exception as capture_error:
-                    logger.error(f"[ERROR] 캡처 오류: {capture_error}")
-                    time.sleep(0.1)  # 오류 시 잠시 대기
-                    
+            while not connection.closed:
+                if connection.evicted:
+                    logger.info(f"[STREAM] QoS 부하 감소로 스트림 종료: {client_ip} ({connection.conn_id})")
+                    break
+
+                frame = subscription.next(timeout=1.0)
+                if subscription.ended:
+                    logger.info(f"[STREAM] 카메라 {target_camera} 중지됨, 스트림 종료")
+                    break
+                if frame is None:
+                    continue
+
+                yield frame.part
+                connection.frames_sent += 1
+                connection.bytes_sent += len(frame.part)
+                connection.frames_dropped = subscription.skipped
+                connection.record_latency(time.monotonic() - frame.captured,
+                                          self.clients.latency_target_ms / 1000)
+
         except Exception as e:
             logger.error(f"[ERROR] 스트림 오류: {e}")
         finally:
-            self.active_clients.discard(client_ip)
-            logger.info(f"[STREAM] 클라이언트 연결 해제: {client_ip}")
-    
+            self.release_stream(connection)
+            logger.info(f"[STREAM] 클라이언트 연결 해제: {client_ip} ({connection.conn_id})")
+
+    def release_stream(self, connection: StreamConnection):
+        """스트림 접속 해제 - 구독 해제 + 레지스트리 해제 (중복 호출 안전)
+
+        클라이언트가 끊으면 응답 제너레이터는 재개되지 않으므로 응답 종료 시점(BackgroundTask)에도 호출
+        """
+        subscription = self._stream_subscriptions.pop(connection.conn_id, None)
+        if subscription is not None:
+            subscription.close()
+        self.clients.release(connection)
+
+    @staticmethod
+    def _catalog_retention(cleanup: Dict[str, Any]):
+        """카탈로그 인덱스 보존 일수 - 자동 정리(cleanup) 사용 시에만 (정리하지 않으면 파일이 남으므로 인덱스도 유지)"""
+        return float(cleanup.get('max_age_days', 30)) if cleanup.get('enabled', False) else None
+
+    def _stream_rendition(self, camera_id: int) -> str:
+        """카메라 스트리밍 렌디션 (QoS 부하 감소 상한 적용)"""
+        rendition = self.stream_renditions.get(camera_id, self.current_resolution)
+        cap = self.stream_rendition_cap
+        if cap is not None and cap in self.RESOLUTIONS and rendition in self.RESOLUTIONS:
+            size = self.RESOLUTIONS[rendition]
+            cap_size = self.RESOLUTIONS[cap]
+            if size["width"] * size["height"] > cap_size["width"] * cap_size["height"]:
+                return cap
+        return rendition
+
+    def _on_qos_tier(self, tier: int, limits: Dict[str, Any]):
+        """QoS 단계 변경 → 스트리밍 FPS / 렌디션 / 접속 수 제한 (녹화 인코더는 그대로)"""
+        self.stream_fps_limit = limits.get("stream_fps")
+        self.stream_rendition_cap = limits.get("rendition")
+        self.clients.shed(limits.get("max_connections"))
+
+    def _on_config_changed(self, changed: Set[str], snapshot):
+        """설정 변경 반영 - 스냅샷 값으로 각 서브시스템 갱신 (녹화 화질은 다음 세그먼트부터)
+
+        값은 스냅샷 교체 전에 이미 검증됨 - 그래도 한 서브시스템의 오류가 나머지 반영을 막지 않도록 단계별로 격리
+        """
+        def touched(*prefixes):
+            return any(key == p or key.startswith(p + ".") for key in changed for p in prefixes)
+
+        def apply_streaming():
+            self.clients.max_connections = snapshot.value('streaming.max_connections', 4)
+            self.clients.max_per_ip = snapshot.value('streaming.max_connections_per_ip', 4)
+            self.clients.max_bandwidth_mbps = snapshot.value('streaming.max_bandwidth_mbps', 0)
+            self.clients.retry_after = snapshot.value('streaming.retry_after', 2)
+            self.clients.latency_target_ms = snapshot.value('streaming.latency_target_ms', 150)
+            for rendition in self.RESOLUTIONS.values():
+                rendition["max_clients"] = snapshot.max_clients
+
+        def apply_qos():
+            self.qos.update_config(config_manager.get('qos', {}))
+            self._on_qos_tier(self.qos.tier, self.qos.limits)
+
+        def apply_motion():
+            motion_config = config_manager.get('motion', {})
+            for detector in list(self.motion_detectors.values()):
+                detector.update_config(motion_config)
+
+        def apply_privacy():
+            for camera_id, mask in self.privacy_masks.items():
+                mask.set_polygons(self._privacy_polygons(snapshot, camera_id))
+
+        def apply_catalog():
+            self.catalog.retention_days = self._catalog_retention(config_manager.get('recording.cleanup', {}))
+            self.catalog.prune()
+
+        def apply_policy():
+            policy_config = config_manager.get('recording.policy', {})
+            for policy in list(self.recording_policies.values()):
+                policy.update_config(policy_config)
+
+        def apply_profile():
+            logger.info(f"[CONFIG] 녹화 프로필 변경은 다음 세그먼트부터 적용: {', '.join(sorted(profile_keys))}")
+            # 센서 프레임레이트는 즉시 (실시간 변경값이 없는 카메라만)
+            for camera_id in list(self.camera_instances.keys()):
+                recorder = self.recorders.get(camera_id)
+                framerate = snapshot.profile(camera_id).framerate
+                if (recorder is not None and recorder.framerate_override is None
+                        and recorder.sensor_framerate != framerate):
+                    self.commands.submit(self._set_sensor_framerate, camera_id, framerate)
+
+        profile_keys = {key for key in changed
+                        if key.rsplit(".", 1)[-1] in PROFILE_KEYS and not requires_restart(key)
+                        and key.startswith("recording.")}
+        steps = [
+            ("streaming", touched("streaming"), apply_streaming),
+            ("thermal", touched("thermal") and self.thermal is not None,
+             lambda: self.thermal.update_config(config_manager.get('thermal', {}))),
+            ("qos", touched("qos") and self.qos is not None, apply_qos),
+            ("motion", touched("motion"), apply_motion),
+            ("privacy", touched("privacy"), apply_privacy),
+            ("forecast", touched("forecast", "recording.cleanup"),
+             lambda: self.storage_forecast.update_config(config_manager.get('forecast', {}),
+                                                         config_manager.get('recording.cleanup', {}))),
+            ("catalog", touched("recording.cleanup"), apply_catalog),
+            ("recording.policy", touched("recording.policy"), apply_policy),
+            ("recording profile", bool(profile_keys), apply_profile),
+        ]
+        for name, needed, apply in steps:
+            if not needed:
+                continue
+            try:
+                apply()
+            except Exception as e:
+                logger.error(f"[CONFIG] {name} 설정 반영 실패 (다른 항목은 계속 반영): {e}")
+
+        restart_keys = sorted(key for key in changed if requires_restart(key))
+        if restart_keys:
+            logger.warning(f"[CONFIG] 재시작 후 적용되는 설정: {', '.join(restart_keys)}")
+
+    def get_config(self) -> Dict[str, Any]:
+        """현재 설정 스냅샷 (버전 포함 - 설정 API용)"""
+        snapshot = config_manager.snapshot
+        return {
+            "version": snapshot.version,
+            "loaded_at": snapshot.loaded_at,
+            "last_error": config_manager.last_error,
+            "config": snapshot.to_dict()
+        }
+
+    def patch_config(self, changes: Dict[str, Any], persist: bool = True) -> Dict[str, Any]:
+        """설정 일부 변경 (검증 실패 시 아무것도 바꾸지 않음) - 적용 가능한 항목은 즉시 반영"""
+        errors, changed = config_manager.patch(changes, persist=persist)
+        return {
+            "ok": not errors,
+            "errors": errors,
+            "version": config_manager.snapshot.version,
+            "changed": sorted(changed),
+            "restart_required": sorted(key for key in changed if requires_restart(key)),
+            "persisted": persist and not errors and bool(changed)
+        }
+
+    def get_qos_status(self) -> Dict[str, Any]:
+        """QoS 단계 / 신호 / 부하 감소 결정 기록"""
+        if self.qos is None:
+            return {"enabled": False}
+        return dict(self.qos.get_status(), enabled=True)
+
+    def get_thermal_status(self) -> Dict[str, Any]:
+        """온도 기록 + 부하 감소 상태"""
+        if self.thermal is None:
+            return {"enabled": False}
+        return {
+            "enabled": True,
+            "summary": self.thermal.summary(),
+            "shedding": {"qos_tier": self.qos.tier if self.qos is not None else None,
+                         "stream_fps_limit": self.stream_fps_limit,
+                         "stream_rendition_cap": self.stream_rendition_cap},
+            "history": self.thermal.get_history()
+        }
+
     async def switch_camera(self, camera_id: int) -> bool:
-        """카메라 전환"""
+        """카메라 전환 (싱글 뷰) - 명령 큐에서 실행"""
+        return await self.run_command(self._switch_camera, camera_id)
+
+    def _switch_camera(self, camera_id: int) -> bool:
+        """카메라 전환 (명령 큐 워커에서 실행)"""
+        # 듀얼 모드 비활성화
+        if self.dual_mode:
+            self.disable_dual_mode()
+
         if camera_id == self.current_camera:
             return True
-        
+
         logger.info(f"[SWITCH] 카메라 {self.current_camera} → {camera_id}")
-        
-        # 기존 카메라 정지
+
+        # 기존 카메라 정지 (진행 중인 캡처가 끝날 때까지 대기하므로 별도 지연 불필요)
         self.stop_camera_stream(self.current_camera)
-        await asyncio.sleep(0.5)
-        
+
         # 새 카메라 시작
         success = self.start_camera_stream(camera_id)
-        
+
         if success:
             self.current_camera = camera_id
             logger.info(f"[OK] 카메라 {camera_id}로 전환 완료")
@@ -532,46 +1324,174 @@ class CameraManager:
             # 실패 시 기존 카메라 다시 시작
             self.start_camera_stream(self.current_camera)
             return False
-    
+
     async def change_resolution(self, resolution: str) -> bool:
-        """해상도 변경"""
+        """해상도 변경 - 명령 큐에서 실행"""
+        return await self.run_command(self._change_resolution, resolution)
+
+    async def reconfigure(self, camera_id: int, **changes) -> Dict[str, Any]:
+        """카메라 설정 실시간 변경 - 명령 큐에서 실행"""
+        return await self.run_command(self.reconfigure_camera, camera_id, **changes)
+
+    def _change_resolution(self, resolution: str) -> bool:
+        """해상도 변경 (명령 큐 워커에서 실행) - 활성 카메라 전체(듀얼 모드 포함)에 적용"""
         if resolution not in self.RESOLUTIONS:
             return False
-        
+
         if resolution == self.current_resolution:
             return True
-        
+
         logger.info(f"[RESOLUTION] {self.current_resolution} → {resolution}")
-        
+
         old_resolution = self.current_resolution
+        old_renditions = dict(self.stream_renditions)
         self.current_resolution = resolution
-        
-        # 현재 스트리밍 중인 카메라가 있으면 재시작
-        if self.current_camera in self.camera_instances:
-            self.stop_camera_stream(self.current_camera)
-            await asyncio.sleep(2.0)
-            
-            success = self.start_camera_stream(self.current_camera, resolution)
-            
-            if success:
-                await asyncio.sleep(1.0)
-                logger.info(f"[OK] 해상도 변경 완료: {resolution}")
-                return True
-            else:
-                logger.error(f"[ERROR] 해상도 변경 실패, 복구 중...")
-                self.current_resolution = old_resolution
-                await asyncio.sleep(1.0)
-                self.start_camera_stream(self.current_camera, old_resolution)
+
+        switched = []
+        for camera_id in list(self.camera_instances.keys()):
+            if not self.reconfigure_camera(camera_id, stream_resolution=resolution)["success"]:
+                break
+            switched.append(camera_id)
+        else:
+            logger.info(f"[OK] 해상도 변경 완료: {resolution}")
+            return True
+
+        # 일부 카메라만 바뀐 상태로 두지 않도록 이미 바뀐 카메라를 이전 해상도로 되돌림
+        logger.error(f"[ERROR] 해상도 변경 실패: {old_resolution} 유지 (변경된 카메라 {switched} 복원)")
+        self.current_resolution = old_resolution
+        for camera_id in switched:
+            previous = old_renditions.get(camera_id, old_resolution)
+            if not self.reconfigure_camera(camera_id, stream_resolution=previous)["success"]:
+                logger.error(f"[ERROR] 카메라 {camera_id} 해상도 복원 실패 ({previous})")
+        return False
+
+    def reconfigure_camera(self, camera_id: int, stream_resolution: str = None, record_resolution: str = None,
+                           bitrate: int = None, framerate: int = None, apply: str = "boundary") -> Dict[str, Any]:
+        """카메라 설정 실시간 변경 (명령 큐 워커에서 실행)
+
+        - stream_resolution: 캡처 크기 이하이면 소프트웨어 축소로 즉시 적용 (카메라 재구성 없음)
+          화면비가 다르면 비율 유지 + 레터박스 (녹화 해상도를 스트림 때문에 바꾸지 않음)
+        - bitrate / framerate: 다음 세그먼트 경계에서 적용 (apply="now"면 즉시 세그먼트 전환, 최대 1 GOP)
+          framerate는 센서 프레임 주기도 즉시 변경
+        - record_resolution 또는 캡처 크기를 넘는 stream_resolution: 센서 모드 변경 → 카메라 재구성
+        """
+        result = {"success": True, "camera_id": camera_id, "reconfigured": False, "applied": {}}
+
+        for name, value in (("stream_resolution", stream_resolution), ("record_resolution", record_resolution)):
+            if value is not None and value not in self.RESOLUTIONS:
+                return {**result, "success": False, "error": f"Unsupported {name}: {value}"}
+        if apply not in ("boundary", "now"):
+            return {**result, "success": False, "error": f"Unsupported apply mode: {apply}"}
+        # 비트레이트/프레임레이트는 설정 파일과 같은 범위만 허용 (카메라/인코더를 건드리기 전에 거부)
+        for name, value in (("bitrate", bitrate), ("framerate", framerate)):
+            error = check_setting(f"recording.{name}", value) if value is not None else None
+            if error:
+                return {**result, "success": False, "error": f"Unsupported {name}: {value} ({error})"}
+
+        slot = self.slots[camera_id]
+        if slot.state in (CameraState.STOPPED, CameraState.STARTING):
+            return {**result, "success": False, "error": f"Camera {camera_id} not active"}
+
+        # 센서 모드(캡처 크기) 변경 필요 여부
+        capture_size = self.capture_sizes.get(camera_id)
+        target_capture = record_resolution
+        if target_capture is None and stream_resolution is not None and capture_size is not None:
+            res_config = self.RESOLUTIONS[stream_resolution]
+            if res_config["width"] > capture_size[0] or res_config["height"] > capture_size[1]:
+                target_capture = stream_resolution
+
+        if target_capture is not None:
+            res_config = self.RESOLUTIONS[target_capture]
+            if (res_config["width"], res_config["height"]) != capture_size:
+                if not self._reconfigure_sensor(camera_id, target_capture):
+                    return {**result, "success": False, "error": "Sensor reconfiguration failed"}
+                result["reconfigured"] = True
+                result["applied"]["record_resolution"] = target_capture
+
+        # 스트리밍 렌디션 (재구성 없이 즉시 적용)
+        if stream_resolution is not None:
+            self.stream_renditions[camera_id] = stream_resolution
+            result["applied"]["stream_resolution"] = stream_resolution
+
+        # 센서 프레임레이트 즉시 변경 (하드웨어 지원 시)
+        if framerate is not None and self._set_sensor_framerate(camera_id, framerate):
+            result["applied"]["sensor_framerate"] = framerate
+
+        # 인코더 비트레이트/프레임레이트 (세그먼트 경계 또는 즉시)
+        recorder = self.recorders.get(camera_id)
+        if recorder is not None and (bitrate is not None or framerate is not None):
+            recorder.update_encoding(bitrate=bitrate, framerate=framerate, apply_now=(apply == "now"))
+            result["applied"]["encoder"] = {"bitrate": bitrate, "framerate": framerate, "apply": apply}
+
+        logger.info(f"[RECONFIG] 카메라 {camera_id} 설정 변경: {result['applied']}")
+        return result
+
+    def _set_sensor_framerate(self, camera_id: int, framerate: int) -> bool:
+        """센서 프레임 주기 변경 (재구성 없음) - 녹화기 프레임 건너뛰기 계산에도 반영"""
+        frame_duration = int(1_000_000 / framerate)
+        with self.slots[camera_id].lease() as picam2:
+            if picam2 is None:
                 return False
-        
+            try:
+                picam2.set_controls({"FrameDurationLimits": (frame_duration, frame_duration)})
+            except Exception as e:
+                logger.warning(f"[RECONFIG] 카메라 {camera_id} 센서 프레임레이트 변경 실패: {e}")
+                return False
+        recorder = self.recorders.get(camera_id)
+        if recorder is not None:
+            recorder.sensor_framerate = framerate
         return True
-    
-    def start_continuous_recording(self, camera_id: int, interval: int = None):
-        """GPU 가속 연속 녹화 시작"""
-        # 설정에서 녹화 간격 가져오기
-        if interval is None:
-            interval = config_manager.get_segment_duration()
 
+    def _reconfigure_sensor(self, camera_id: int, resolution: str) -> bool:
+        """센서 출력(main/lores) 크기 변경 - 인스턴스를 유지한 채 stop → configure → start
+
+        녹화 중이면 현재 세그먼트를 닫고, 재구성 직후 새 세그먼트로 이어서 녹화
+        """
+        res_config = self.RESOLUTIONS[resolution]
+        width, height = res_config["width"], res_config["height"]
+        slot = self.slots[camera_id]
+        recorder = self.recorders.get(camera_id)
+        was_recording = recorder is not None and recorder.continuous_recording
+
+        logger.info(f"[RECONFIG] 카메라 {camera_id} 센서 모드 변경: {self.capture_sizes.get(camera_id)} → {width}x{height}")
+        started = time.monotonic()
+
+        if was_recording:
+            recorder.stop_recording()
+
+        # 신규 캡처 차단 + 진행 중인 캡처 완료 대기
+        picam2 = slot.drain(CameraState.RECONFIGURING)
+        success = False
+        try:
+            picam2.stop()
+            try:
+                picam2.configure(self._create_configuration(picam2, width, height, self._sensor_framerate(camera_id)))
+                self.capture_sizes[camera_id] = (width, height)
+                success = True
+            except Exception as e:
+                logger.error(f"[ERROR] 카메라 {camera_id} 재구성 실패, 이전 설정 복구: {e}")
+                old_width, old_height = self.capture_sizes[camera_id]
+                picam2.configure(self._create_configuration(picam2, old_width, old_height,
+                                                            self._sensor_framerate(camera_id)))
+            picam2.start()
+        except Exception as e:
+            logger.error(f"[ERROR] 카메라 {camera_id} 재시작 실패: {e}")
+            slot.transition(CameraState.STOPPED)
+            try:
+                picam2.close()
+            except Exception:
+                pass
+            return False
+
+        slot.transition(CameraState.STREAMING)
+        if was_recording:
+            self.start_continuous_recording(camera_id)
+
+        logger.info(f"[RECONFIG] 카메라 {camera_id} 센서 재구성 완료 ({(time.monotonic() - started) * 1000:.0f}ms)")
+        return success
+
+    def start_continuous_recording(self, camera_id: int, interval: int = None):
+        """GPU 가속 연속 녹화 시작 (interval 미지정 시 카메라 프로필 세그먼트 길이)"""
         if camera_id not in self.recorders:
             logger.error(f"[ERROR] 카메라 {camera_id} 레코더 없음")
             return
@@ -579,12 +1499,15 @@ class CameraManager:
         # GPU 레코더의 연속 녹화 시작
         recorder = self.recorders[camera_id]
         recorder.start_continuous_recording(interval)
+        self.slots[camera_id].transition(CameraState.RECORDING)
 
         # 통계 업데이트
-        self.stream_stats[camera_id]["recording"] = True
+        with self._stats_lock:
+            self.stream_stats[camera_id]["recording"] = True
         self.recording_threads[camera_id] = True
 
-        logger.info(f"[GPU-RECORDING] 카메라 {camera_id} GPU 연속 녹화 시작 ({interval}초 간격)")
+        logger.info(f"[GPU-RECORDING] 카메라 {camera_id} GPU 연속 녹화 시작 "
+                    f"({interval or config_manager.get_segment_duration(camera_id)}초 간격)")
 
     def enable_recording(self):
         """모든 활성 카메라에 대해 GPU 녹화 활성화"""
@@ -604,9 +1527,14 @@ class CameraManager:
             self.recording_threads[camera_id] = False
 
         # GPU 레코더 중지
-        for camera_id, recorder in self.recorders.items():
+        with self._recorders_lock:
+            recorders = list(self.recorders.items())
+        for camera_id, recorder in recorders:
             recorder.stop_recording()
-            self.stream_stats[camera_id]["recording"] = False
+            if self.slots[camera_id].state == CameraState.RECORDING:
+                self.slots[camera_id].transition(CameraState.STREAMING)
+            with self._stats_lock:
+                self.stream_stats[camera_id]["recording"] = False
 
         logger.info("[GPU-RECORDING] 모든 GPU 녹화 비활성화")
 
@@ -614,7 +1542,7 @@ class CameraManager:
         """단일 GPU 녹화 (웹 UI용)"""
         # 설정에서 녹화 시간 가져오기
         if duration is None:
-            duration = config_manager.get_segment_duration()
+            duration = config_manager.get_segment_duration(camera_id)
 
         if camera_id not in self.recorders:
             logger.error(f"[ERROR] 카메라 {camera_id} 레코더 없음")
@@ -626,7 +1554,7 @@ class CameraManager:
             return False
 
         # 단일 녹화 실행
-        success = recorder._record_single_video(duration)
+        success = recorder.record_once(duration)
         logger.info(f"[GPU-RECORDING] 카메라 {camera_id} 단일 녹화 {'성공' if success else '실패'} ({duration}초)")
         return success
 
@@ -649,39 +1577,201 @@ class CameraManager:
 
         return self.recorders[camera_id].is_recording
 
+    def _camera_snapshot(self, camera_id: int) -> Dict[str, Any]:
+        """카메라별 상태 요약 (상태 머신 + 캡처 크기 + 렌디션 + 녹화 세그먼트 전환 간격)"""
+        snapshot = self.slots[camera_id].snapshot()
+        capture_size = self.capture_sizes.get(camera_id)
+        snapshot["capture_size"] = f"{capture_size[0]}x{capture_size[1]}" if capture_size else None
+        snapshot["stream_resolution"] = self.stream_renditions.get(camera_id)
+        snapshot["clients"] = self.clients.count(camera_id)
+        recorder = self.recorders.get(camera_id)
+        if recorder is not None and recorder.last_segment_gap is not None:
+            snapshot["recording_gap_ms"] = round(recorder.last_segment_gap * 1000, 1)
+        return snapshot
+
     def get_stats(self) -> Dict[str, Any]:
         """통계 정보 반환"""
+        active_clients = self.clients.count(self.current_camera)
+        with self._stats_lock:
+            stats = dict(self.stream_stats[self.current_camera])
         return {
             "current_camera": self.current_camera,
             "resolution": self.current_resolution,
             "codec": "MJPEG",
             "quality": "80-85%",
             "engine": "Picamera2",
-            "active_clients": len(self.active_clients),
+            "active_clients": active_clients,
             "max_clients": self.get_max_clients(),
+            "connections": self.clients.count(),
             "recording_enabled": self.recording_enabled,
-            "stats": self.stream_stats[self.current_camera]
+            "state": self.startup_state,
+            "cameras": {camera_id: self._camera_snapshot(camera_id) for camera_id in self.slots},
+            "pending_commands": self.commands.pending(),
+            "thermal": self.thermal.summary() if self.thermal is not None else None,
+            "qos": {"tier": self.qos.tier, "limits": self.qos.limits} if self.qos is not None else None,
+            "staging": self.get_staging_status(),
+            "storage": self.storage_forecast.summary(),
+            "streams": {camera_id: broadcaster.get_status() for camera_id, broadcaster in self.broadcasters.items()},
+            "privacy": {camera_id: mask.get_status() for camera_id, mask in self.privacy_masks.items()},
+            "stats": stats
         }
-    
+
+    def get_node_status(self):
+        """노드 상태 요약 + ETag - 폴링/하트비트용 (값은 변화가 의미 있는 단위로 반올림)
+
+        상태가 그대로면 ETag도 같으므로 조건부 요청(If-None-Match)은 304로 끝난다.
+        세그먼트마다 / 수시로 바뀌는 값(마지막 세그먼트, 여유 공간, 온도, 업로드 대기)은
+        metrics 블록에 모아 ETag에서 제외 - 304 응답 헤더와 매 하트비트로 따로 전달
+        """
+        cameras = {}
+        last_segments = {}
+        for camera_id, slot in self.slots.items():
+            recorder = self.recorders.get(camera_id)
+            last_segment = self.last_segment_end.get(camera_id)
+            cameras[str(camera_id)] = {
+                "state": slot.state.value,
+                "recording": bool(recorder is not None and recorder.is_recording),
+                "quality": recorder.current_quality if recorder is not None else None
+            }
+            last_segments[str(camera_id)] = int(last_segment) if last_segment is not None else None
+        try:
+            disk_free_gb = round(shutil.disk_usage(config_manager.get_storage_path("0")).free / 1024 ** 3, 1)
+        except OSError:
+            disk_free_gb = None
+        reading = self.thermal.latest() if self.thermal is not None else None
+        temperature = reading["temperature"] if reading else None
+        status = {
+            "state": self.startup_state,
+            "cameras": cameras,
+            "cameras_up": sum(1 for slot in self.slots.values() if slot.is_active()),
+            METRICS_KEY: {
+                "last_segment": last_segments,
+                "disk_free_gb": disk_free_gb,
+                "temperature": round(temperature) if temperature is not None else None,
+                # 영구 저장소로 아직 옮기지 못한 세그먼트 수 (스테이징 미사용 시 None)
+                "upload_backlog": self.staging.backlog if self.staging is not None else None
+            }
+        }
+        return status, status_digest(status)
+
+    def start_heartbeat(self, port: int):
+        """허브 하트비트 시작 (config.json heartbeat.hub_url 설정 시)"""
+        config = config_manager.get('heartbeat', {})
+        if not config.get('hub_url'):
+            return
+        self.heartbeat = HeartbeatSender(
+            node_name=config.get('node_name') or socket.gethostname(),
+            hub_url=config['hub_url'],
+            interval=config.get('interval', 10),
+            port=port,
+            get_status=self.get_node_status
+        )
+        self.heartbeat.start()
+
+    def _start_cameras_parallel(self, camera_ids: List[int], start_recording: bool = False) -> Dict[int, bool]:
+        """여러 카메라 동시 기동 (카메라별 open/configure/start 병렬 실행)
+
+        start_recording=True이면 각 카메라가 준비되는 즉시 해당 카메라의 녹화를 시작
+        (다른 카메라의 기동 완료를 기다리지 않음)
+        """
+        parent = "cameras.bring_up"
+
+        def bring_up(camera_id: int) -> bool:
+            with startup_profiler.measure(f"cam{camera_id}", parent=parent):
+                if not self.start_camera_stream(camera_id, self.current_resolution):
+                    return False
+                if start_recording:
+                    self.start_continuous_recording(camera_id)
+                return True
+
+        with ThreadPoolExecutor(max_workers=len(camera_ids), thread_name_prefix="cam-init") as pool:
+            futures = {camera_id: pool.submit(bring_up, camera_id) for camera_id in camera_ids}
+            return {camera_id: future.result() for camera_id, future in futures.items()}
+
+    def start_warmup(self, enable_recording: bool = True):
+        """백그라운드 카메라 기동 시작 (웹 서버는 즉시 접속 허용, 상태는 warming)
+
+        기동은 카메라 명령 큐의 첫 명령으로 실행되므로, 기동 중 들어온
+        카메라 조작 요청은 기동 완료 후 순서대로 처리된다.
+        """
+        self.startup_state = "warming"
+        self.ready_event.clear()
+        self.catalog.preload()
+        if self.thermal is not None:
+            self.thermal.start()
+        if self.qos is not None:
+            self.qos.start()
+        if self.staging is not None:
+            self.staging.recover(lambda camera_id: config_manager.get_storage_path(str(camera_id)))
+            self.staging.start()
+        if enable_recording:
+            self.recording_enabled = True
+
+        return self.commands.submit(self._warmup, enable_recording)
+
+    def _warmup(self, enable_recording: bool):
+        """카메라 병렬 기동 + 녹화 시작 (명령 큐 워커에서 실행)"""
+        logger.info("[INIT] 카메라 병렬 기동 시작 (warming)")
+
+        # MJPEG 스트리밍 사용 시 OpenCV를 카메라 기동과 병렬로 미리 로드
+        # (첫 시청자 접속 지연 방지, 카메라 기동 경로에는 포함되지 않음)
+        if self.streaming_enabled:
+            threading.Thread(target=load_mjpeg_modules, name="cv2-preload", daemon=True).start()
+
+        try:
+            with startup_profiler.measure("cameras.bring_up"):
+                results = self._start_cameras_parallel([0, 1], start_recording=enable_recording)
+
+            started = [camera_id for camera_id, ok in results.items() if ok]
+            if len(started) == len(results):
+                self.dual_mode = True
+                self.startup_state = "ready"
+            elif started:
+                # 일부 카메라만 기동된 경우 살아있는 카메라로 계속 운영
+                logger.warning(f"[INIT] 일부 카메라만 기동됨: {started}")
+                self.current_camera = started[0]
+                self.startup_state = "degraded"
+            else:
+                logger.error("[INIT] 모든 카메라 기동 실패")
+                self.startup_state = "failed"
+
+            startup_profiler.mark("cameras.ready")
+            summary = startup_profiler.summary()
+            logger.info(f"[INIT] 카메라 기동 완료: {self.startup_state} "
+                        f"(콜드 스타트 → 첫 녹화 프레임: {summary['cold_start_to_first_record']}초)")
+            for phase in summary["phases"]:
+                logger.info(f"[INIT]   {phase['name']:<28} {phase['duration'] * 1000:8.1f} ms")
+        except Exception as e:
+            logger.error(f"[INIT] 카메라 기동 오류: {e}")
+            self.startup_state = "failed"
+        finally:
+            self.ready_event.set()
+
+    def is_warming(self) -> bool:
+        """카메라 기동 진행 중 여부"""
+        return not self.ready_event.is_set()
+
+    async def wait_until_ready(self, timeout: float) -> bool:
+        """카메라 기동 완료 대기 (이벤트 루프 차단 없음)"""
+        if self.ready_event.is_set():
+            return True
+        return await asyncio.to_thread(self.ready_event.wait, timeout)
+
     def enable_dual_mode(self) -> bool:
         """듀얼 카메라 모드 활성화 - 두 카메라 동시 녹화"""
         logger.info("[DUAL] 듀얼 카메라 모드 활성화 중...")
 
-        # 카메라 0 시작
-        success_cam0 = self.start_camera_stream(0, self.current_resolution)
-        if not success_cam0:
-            logger.error("[DUAL] 카메라 0 시작 실패")
-            return False
-
-        # 잠시 대기 (카메라 초기화 시간)
-        time.sleep(0.5)
-
-        # 카메라 1 시작
-        success_cam1 = self.start_camera_stream(1, self.current_resolution)
-        if not success_cam1:
-            logger.error("[DUAL] 카메라 1 시작 실패")
-            # 카메라 0도 정리
-            self.stop_camera_stream(0)
+        # 두 카메라 병렬 시작
+        already_active = set(self.camera_instances.keys())
+        results = self._start_cameras_parallel([0, 1])
+
+        failed = [camera_id for camera_id, ok in results.items() if not ok]
+        if failed:
+            logger.error(f"[DUAL] 카메라 {failed} 시작 실패")
+            # 이번에 새로 시작한 카메라만 정리
+            for camera_id, ok in results.items():
+                if ok and camera_id not in already_active:
+                    self.stop_camera_stream(camera_id)
             return False
 
         self.dual_mode = True
@@ -706,22 +1796,117 @@ class CameraManager:
 
         logger.info("[DUAL] 듀얼 카메라 모드 비활성화 완료 (모든 카메라 녹화 유지)")
     
-    async def shutdown(self):
-        """시스템 종료"""
+    def shutdown_sync(self):
+        """시스템 종료 (동기) - 시그널 핸들러 / atexit / 웹 종료 요청 공용
+
+        진행 중인 명령을 기다리지 않고 카메라별 잠금으로 직접 정리
+        """
         # 녹화 중지
         self.disable_recording()
+        for policy in self.recording_policies.values():
+            policy.stop()
+        self._sprite_executor.shutdown(wait=False)
+        if self.heartbeat is not None:
+            self.heartbeat.stop()
+        if self.thermal is not None:
+            self.thermal.stop()
+        if self.qos is not None:
+            self.qos.stop()
+        # 녹화 중지 후 스테이징에 남은 세그먼트를 영구 저장소로 (tmpfs는 재부팅 시 사라짐)
+        if self.staging is not None:
+            self.staging.stop()
 
         # 카메라 종료
         for camera_id in list(self.camera_instances.keys()):
             logger.info(f"[SHUTDOWN] 카메라 {camera_id} 중지 중...")
-            self.stop_camera_stream(camera_id)
+            self.stop_camera_stream(camera_id, force=True)
+        self.commands.stop()
         logger.info("[SHUTDOWN] 모든 카메라 중지 완료")
 
+    async def shutdown(self):
+        """시스템 종료"""
+        await asyncio.to_thread(self.shutdown_sync)
+
+
+def start_profile_reporter(camera_manager, timeout: float = 30.0):
+    """--profile-startup: 카메라 기동 + 첫 녹화 프레임 이후 트리 출력 후 종료"""
+    def report():
+        camera_manager.ready_event.wait(timeout)
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if startup_profiler.summary()["cold_start_to_first_record"] is not None:
+                break
+            time.sleep(0.05)
+        startup_profiler.stop_tracing_imports()
+        print(startup_profiler.format_tree(), flush=True)
+        # 일반 종료 경로(시그널 핸들러)로 카메라/녹화 정리
+        signal.raise_signal(signal.SIGINT)
+
+    threading.Thread(target=report, name="profile-reporter", daemon=True).start()
+
+
+def parse_args(argv=None):
+    """명령행 인자 파싱"""
+    parser = argparse.ArgumentParser(description="SHT 듀얼 LIVE 카메라 CCTV 시스템")
+    parser.add_argument(
+        "--profile-startup",
+        action="store_true",
+        help="임포트/초기화 시간 트리를 출력하고 종료 (첫 녹화 프레임까지 측정)"
+    )
+    parser.add_argument(
+        "--synthetic",
+        action="store_true",
+        help="카메라 하드웨어 없이 합성 카메라 백엔드로 실행 (테스트/허브 대역 노드용)"
+    )
+    parser.add_argument(
+        "--port",
+        type=int,
+        default=None,
+        help="웹 서버 포트 (기본: config.json system.web_port, 허브 모드는 hub.port)"
+    )
+    parser.add_argument(
+        "--hub",
+        action="store_true",
+        help="허브 모드 - 카메라 없이 config.json hub.nodes 의 엣지 노드들을 통합"
+    )
+    return parser.parse_args(argv)
+
+
+def run_hub(port: int = None):
+    """허브 서버 실행 (카메라 서브시스템 로드 안 함)"""
+    import uvicorn
+    from web.hub import HubAPI
+
+    hub_config = config_manager.get('hub', {})
+    hub_api = HubAPI(hub_config)
+    logger.info("[INIT] SHT CCTV 허브 서버 시작")
+    uvicorn.run(hub_api.app, host="0.0.0.0", port=port or hub_config.get('port', 8000), log_level="info")
+
 
 def main():
     """메인 함수"""
+    args = parse_args()
+    if args.hub:
+        run_hub(args.port)
+        return
+    if args.profile_startup:
+        startup_profiler.trace_imports()
+
     logger.info("[INIT] SHT CCTV 시스템 시작")
-    
+
+    # 카메라 서브시스템 로드 (실패 시 즉시 종료)
+    try:
+        load_camera_modules("synthetic" if args.synthetic else None)
+    except ImportError as e:
+        print(f"[ERROR] Picamera2 not installed: {e}")
+        print("[INSTALL] Run: sudo apt install -y python3-picamera2")
+        sys.exit(1)
+
+    # 웹 서버 의존성 (FastAPI / uvicorn)
+    with startup_profiler.measure("imports.web"):
+        import uvicorn
+        from web.api import CCTVWebAPI
+
     # 카메라 관리자 생성 (핵심 로직)
     camera_manager = CameraManager()
     
@@ -730,14 +1915,8 @@ def main():
         logger.info(f"\n[SIGNAL] Received signal {sig} - Immediate shutdown")
         logger.info("[SHUTDOWN] 시스템 정리 중...")
 
-        # 녹화 중지
-        camera_manager.disable_recording()
-
-        # 카메라 정리 (동기적으로 처리)
-        for camera_id in list(camera_manager.camera_instances.keys()):
-            camera_manager.stop_camera_stream(camera_id)
-
-        logger.info("[SHUTDOWN] 모든 카메라 중지 완료")
+        # 녹화 중지 + 카메라 정리 (동기적으로 처리)
+        camera_manager.shutdown_sync()
 
         # 즉시 강제 종료
         import os
@@ -753,22 +1932,18 @@ def main():
     # 종료 시 클린업
     def cleanup():
         logger.info("[CLEANUP] 시스템 종료 중...")
-        camera_manager.disable_recording()
-        for camera_id in list(camera_manager.camera_instances.keys()):
-            camera_manager.stop_camera_stream(camera_id)
+        camera_manager.shutdown_sync()
     
     atexit.register(cleanup)
     
-    # 듀얼 카메라 모드 시작 (두 카메라 동시 녹화)
-    success = camera_manager.enable_dual_mode()
-
-    if not success:
-        # 듀얼 모드 실패 시 카메라 0만 시작
-        logger.warning("[INIT] 듀얼 모드 실패, 카메라 0만 시작")
-        camera_manager.start_camera_stream(0)
-
-    # GPU 가속 연속 녹화 활성화 (모든 활성 카메라에 대해)
-    camera_manager.enable_recording()  # GPU 자동 연속 녹화 시작
+    # 듀얼 카메라 병렬 기동 + GPU 연속 녹화 (백그라운드)
+    # 웹 서버는 카메라 준비를 기다리지 않고 즉시 바인딩 (기동 중에는 warming 상태)
+    camera_manager.start_warmup(enable_recording=True)
+    camera_manager.start_heartbeat(args.port or config_manager.get_web_port())
+    config_manager.start_watching(config_manager.get('system.config_watch_interval', 2))
+
+    if args.profile_startup:
+        start_profile_reporter(camera_manager)
     
     # 서버 실행 - 시그널 핸들링 제어
     try:
@@ -776,7 +1951,7 @@ def main():
         config = uvicorn.Config(
             web_api.app,
             host="0.0.0.0",
-            port=config_manager.get_web_port(),
+            port=args.port or config_manager.get_web_port(),
             log_level="info"
         )
         server = uvicorn.Server(config)